@@ -0,0 +1,67 @@
+"""
+DictMatcher の構築時間と照合・分割のスループット(MB/s)
+
+使い方:
+    python benchmarks/bench_matcher.py --words 100000 --text-kb 1024 --workers 4
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import DictMatcher
+
+# 合成する語とテキストに使う文字
+ALPHABET = "あいうえおかきくけこさしすせそたちつてとアイウエオ生成推活東京都"
+
+
+def synthetic_words(count: int, rng: random.Random) -> list:
+    """2〜8文字の合成語"""
+    return ["".join(rng.choices(ALPHABET, k=rng.randint(2, 8))) for _ in range(count)]
+
+
+def synthetic_texts(size_kb: int, rng: random.Random, line_chars: int = 200) -> list:
+    """句読点を含む合成テキスト(1行 line_chars 文字)"""
+    chars = ALPHABET + "、。"
+    lines = size_kb * 1024 // 3 // line_chars
+    return ["".join(rng.choices(chars, k=line_chars)) for _ in range(max(lines, 1))]
+
+
+def throughput(func, texts: list) -> dict:
+    """テキスト全体を処理する時間とUTF-8換算のスループット"""
+    size = sum(len(text.encode("utf-8")) for text in texts)
+    start = time.perf_counter()
+    func(texts)
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), "mb_per_s": round(size / 2**20 / elapsed, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=100000, help="合成する語数")
+    parser.add_argument("--text-kb", type=int, default=1024, help="合成するテキストの大きさ(KB)")
+    parser.add_argument("--workers", type=int, default=1, help="segment_many のプロセス数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = synthetic_words(args.words, rng)
+    texts = synthetic_texts(args.text_kb, rng)
+
+    start = time.perf_counter()
+    matcher = DictMatcher(words)
+    print(f"words={len(matcher)} build_seconds={time.perf_counter() - start:.3f}")
+
+    print("find_all     ", throughput(lambda items: [matcher.find_all(text) for text in items], texts))
+    print("segment      ", throughput(lambda items: [matcher.segment(text) for text in items], texts))
+    if args.workers > 1:
+        print(f"segment_many ({args.workers} workers)", throughput(
+            lambda items: list(matcher.segment_many(items, workers=args.workers)), texts
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+get_all_words(WordEntry)と get_all_records(WordRecord)の速度・メモリ比較
+
+使い方:
+    python benchmarks/bench_records.py --words 100000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import DictStorage
+
+
+def build_storage(db_path: str, words: int) -> DictStorage:
+    """合成データの辞書を作成"""
+    import sqlite3
+    from datetime import datetime
+
+    storage = DictStorage(db_path)
+    now = datetime.now()
+    rows = (
+        (f"新語{i}", f"シンゴ{i}", f"シンゴ{i}", "名詞", "一般", "*", "*", "*", "*",
+         f"新語{i}", i % 1000, "news", "news_katakana", now, now)
+        for i in range(words)
+    )
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO words (
+            surface, reading, pronunciation, pos, pos_detail1, pos_detail2, pos_detail3,
+            conjugation_type, conjugation_form, base_form, frequency, source, category,
+            added_date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+    return storage
+
+
+def measure(func) -> dict:
+    """実行時間と確保メモリのピークを計測(tracemalloc の影響を避けるため別々に実行)"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"rows": len(result), "seconds": round(elapsed, 3), "peak_mb": round(peak / 2**20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=100000, help="合成する単語数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = build_storage(str(Path(tmp_dir) / "bench.db"), args.words)
+
+        print(f"words={args.words}")
+        print("get_all_words   ", measure(storage.get_all_words))
+        print("get_all_records ", measure(storage.get_all_records))
+
+
+if __name__ == "__main__":
+    main()
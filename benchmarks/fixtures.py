@@ -0,0 +1,207 @@
+"""
+ベンチマーク用の合成データとローカルHTTPサーバー
+
+辞書・コーパスは乱数の種を固定して生成するため、同じ規模なら毎回同じ内容になる。
+"""
+
+import json
+import random
+import sqlite3
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+HIRAGANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん"
+KATAKANA = "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワン"
+KANJI = "生成推活東京都新型技術情報人工知能会社選挙経済政策気候変動宇宙開発医療研究"
+ALPHANUM = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+SOURCES = ["wikipedia", "news", "twitter", "manual"]
+
+# ニュース一覧・カテゴリページあたりの項目数
+FIXTURE_ITEMS = 50
+
+
+def parse_size(value: str) -> int:
+    """"10k" "1m" のような規模の指定を数に変換"""
+    value = value.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(value.rstrip("km")) * scale
+
+
+def format_size(size: int) -> str:
+    """parse_size の逆変換"""
+    if size % 1000000 == 0:
+        return f"{size // 1000000}m"
+    if size % 1000 == 0:
+        return f"{size // 1000}k"
+    return str(size)
+
+
+def synthetic_word(rng: random.Random) -> Tuple[str, str]:
+    """新語らしい合成語と、その収集カテゴリ"""
+    kind = rng.randrange(3)
+    if kind == 0:
+        return "".join(rng.choices(KATAKANA, k=rng.randint(3, 8))), "katakana"
+    if kind == 1:
+        return "".join(rng.choices(KANJI, k=rng.randint(2, 5))), "kanji_compounds"
+    return "".join(rng.choices(ALPHANUM, k=rng.randint(2, 6))), "alphanum"
+
+
+def synthetic_vocabulary(count: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """重複のない count 語の (表層形, カテゴリ)"""
+    rng = random.Random(seed)
+    seen = set()
+    words = []
+    while len(words) < count:
+        surface, category = synthetic_word(rng)
+        # 短い語は衝突しやすいため、足りない分は通し番号で一意にする
+        if surface in seen:
+            surface = f"{surface}{len(words)}"
+            if surface in seen:
+                continue
+        seen.add(surface)
+        words.append((surface, category))
+    return words
+
+
+def build_dictionary(db_path: str, vocabulary: List[Tuple[str, str]]):
+    """
+    合成語で辞書を作成
+
+    add_word を1件ずつ呼ぶと100万語で数分かかるため、スキーマを作った後に直接挿入する。
+    """
+    from core import DictStorage
+
+    DictStorage(db_path).close()
+
+    rng = random.Random(1)
+    now = datetime.now()
+    rows = (
+        (surface, "シンゴ", "シンゴ", "名詞", "一般", "*", "*", "*", "*", surface,
+         rng.randint(1, 1000), SOURCES[i % len(SOURCES)], category, now, now)
+        for i, (surface, category) in enumerate(vocabulary)
+    )
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO words (
+            surface, reading, pronunciation, pos, pos_detail1, pos_detail2, pos_detail3,
+            conjugation_type, conjugation_form, base_form, frequency, source, category,
+            added_date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def synthetic_corpus(vocabulary: List[Tuple[str, str]], sentences: int, seed: int = 2) -> List[str]:
+    """辞書の語とひらがなの機能語を混ぜた合成文"""
+    rng = random.Random(seed)
+    particles = ["は", "が", "を", "に", "で", "と", "の", "も"]
+    corpus = []
+    for _ in range(sentences):
+        parts = []
+        for _ in range(rng.randint(4, 10)):
+            parts.append(rng.choice(vocabulary)[0])
+            parts.append(rng.choice(particles))
+        parts.append("".join(rng.choices(HIRAGANA, k=rng.randint(2, 6))))
+        corpus.append("".join(parts) + "。")
+    return corpus
+
+
+def fixture_pages(vocabulary: List[Tuple[str, str]], items: int = FIXTURE_ITEMS) -> Dict[str, Tuple[str, bytes]]:
+    """
+    クローラーが取得するページ(パス -> (Content-Type, 本文))
+
+    NHK・Yahoo!ニュースの一覧、Wikipedia の最近の更新API・カテゴリページを模す。
+    """
+    rng = random.Random(3)
+    corpus = synthetic_corpus(vocabulary, items * 2, seed=4)
+    html = "text/html; charset=utf-8"
+
+    nhk_items = "".join(
+        f'<article class="content--list-item"><a href="/news/html/{i}.html">'
+        f'<em class="content--list-title">{corpus[i * 2][:40]}</em></a>'
+        f'<p class="content--summary">{corpus[i * 2 + 1]}</p></article>'
+        for i in range(items)
+    )
+    yahoo_items = "".join(
+        f'<li><a href="/articles/{i}"><div class="newsFeed_item_title">{corpus[i]}</div></a></li>'
+        for i in range(items)
+    )
+    category_items = "".join(
+        f'<li><a href="/wiki/{surface}">{surface}</a></li>'
+        for surface, _ in rng.sample(vocabulary, min(items, len(vocabulary)))
+    )
+    recent_changes = {
+        "batchcomplete": "",
+        "query": {"recentchanges": [
+            {"type": "new", "ns": 0, "title": surface, "rcid": items - i,
+             "timestamp": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}Z"}
+            for i, (surface, _) in enumerate(rng.sample(vocabulary, min(items, len(vocabulary))))
+        ]},
+    }
+
+    return {
+        "/news/": (html, f"<html><body>{nhk_items}</body></html>".encode("utf-8")),
+        "/yahoo/": (html, f"<html><body><ul>{yahoo_items}</ul></body></html>".encode("utf-8")),
+        "/wiki/Category:新語": (
+            html, f'<html><body><div id="mw-pages"><ul>{category_items}</ul></div></body></html>'.encode("utf-8")
+        ),
+        "/w/api.php": ("application/json", json.dumps(recent_changes, ensure_ascii=False).encode("utf-8")),
+    }
+
+
+class FixtureServer:
+    """
+    固定のページを返すローカルHTTPサーバー(別スレッドで動く)
+
+    使い方:
+        with FixtureServer(pages) as server:
+            crawler.BASE_URL = server.url
+    """
+
+    def __init__(self, pages: Dict[str, Tuple[str, bytes]]):
+        self.pages = pages
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                from urllib.parse import unquote
+
+                server.requests += 1
+                page = server.pages.get(unquote(self.path.split("?", 1)[0]))
+                if page is None:
+                    self.send_error(404)
+                    return
+
+                content_type, body = page
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
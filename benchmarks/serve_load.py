@@ -0,0 +1,129 @@
+"""
+neodict serve の負荷試験(keep-alive 接続で同時に /word を要求し、p50/p99 レイテンシとQPSを表示)
+
+使い方:
+    # 起動済みのサーバーに対して
+    python benchmarks/serve_load.py --port 8765 --concurrency 64 --duration 10
+
+    # 合成データの辞書でサーバーを同じプロセス内に起動して
+    python benchmarks/serve_load.py --spawn --words 100000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def percentile(values: list, ratio: float) -> float:
+    """昇順に並べた値の分位点"""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * ratio), len(values) - 1)]
+
+
+async def client(host: str, port: int, paths: list, deadline: float, latencies: list, errors: list):
+    """1本の keep-alive 接続で deadline まで要求を送り続ける"""
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+    try:
+        while time.perf_counter() < deadline:
+            path = rng.choice(paths)
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("ascii"))
+            await writer.drain()
+
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+
+            status = int(head.split(b" ", 2)[1])
+            if status >= 500:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(host: str, port: int, surfaces: list, concurrency: int, duration: float) -> dict:
+    """負荷をかけて結果を集計"""
+    paths = [f"/word?surface={quote(surface)}" for surface in surfaces]
+    latencies: list = []
+    errors: list = []
+
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        client(host, port, paths, deadline, latencies, errors) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "qps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def spawn_and_load(args) -> dict:
+    """合成データの辞書でサーバーを起動して負荷をかける"""
+    import sqlite3
+    from core import NeoDict
+    from server import LookupServer
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "bench.db")
+        NeoDict(db_path=db_path)
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO words (surface, pos, frequency, source) VALUES (?, '名詞', ?, 'news')",
+            ((f"新語{i}", i % 1000) for i in range(args.words))
+        )
+        conn.commit()
+        conn.close()
+
+        server = LookupServer(NeoDict(db_path=db_path, read_only=True), port=0, workers=args.workers)
+        host, port = await server.start()
+        try:
+            # 存在する語と存在しない語を混ぜる
+            surfaces = [f"新語{i}" for i in range(0, args.words * 2, max(args.words // 5000, 1))]
+            return await load(host, port, surfaces, args.concurrency, args.duration)
+        finally:
+            await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="サーバーのアドレス")
+    parser.add_argument("--port", type=int, default=8765, help="サーバーのポート")
+    parser.add_argument("--surfaces", nargs="*", default=["生成AI", "推し活", "未登録語"], help="要求する語")
+    parser.add_argument("--concurrency", type=int, default=32, help="同時接続数")
+    parser.add_argument("--duration", type=float, default=5.0, help="計測秒数")
+    parser.add_argument("--spawn", action="store_true", help="合成データの辞書でサーバーを起動する")
+    parser.add_argument("--words", type=int, default=100000, help="--spawn 時の単語数")
+    parser.add_argument("--workers", type=int, default=4, help="--spawn 時のサーバーのスレッド数")
+    args = parser.parse_args()
+
+    if args.spawn:
+        result = asyncio.run(spawn_and_load(args))
+    else:
+        result = asyncio.run(load(args.host, args.port, args.surfaces, args.concurrency, args.duration))
+
+    print(f"concurrency={args.concurrency} duration={args.duration}s")
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
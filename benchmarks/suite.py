@@ -0,0 +1,344 @@
+"""
+保存・抽出・クロール・エクスポート・起動の性能ベンチマーク
+
+合成した日本語の辞書(規模ごと)とコーパスに対して各処理を計測し、結果をJSONで出力する。
+--compare で基準の結果と比べ、しきい値を超えて遅くなった項目があれば終了コード1で終わる。
+
+使い方:
+    python benchmarks/suite.py --sizes 10k,100k,1m --output results.json
+    python benchmarks/suite.py --sizes 10k --only storage,export --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import (
+    FixtureServer, build_dictionary, fixture_pages, format_size, parse_size,
+    synthetic_corpus, synthetic_vocabulary,
+)
+
+GROUPS = ["storage", "extractor", "export", "crawler", "startup"]
+
+# 規模によらず同じ回数だけ行う操作の数
+ADD_WORDS = 1000
+SEARCH_QUERIES = 200
+CRAWL_ROUNDS = 20
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+
+def measure(func: Callable[[], int], repeat: int) -> Dict:
+    """
+    func を repeat 回実行し、最も速かった回の時間を返す
+
+    func は処理した件数を返す。
+    """
+    best = None
+    ops = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        "seconds": round(best, 6),
+        "ops": ops,
+        "ops_per_s": round(ops / best, 1) if best else None,
+    }
+
+
+def bench_storage(db_path: str, vocabulary: list, repeat: int) -> Dict[str, Dict]:
+    """DictStorage の追加・検索・全件取得"""
+    from core import DictStorage, Word, WordEntry, PartOfSpeech, WordSource
+
+    storage = DictStorage(db_path)
+    rounds = iter(range(repeat))
+
+    def add_words() -> int:
+        # 回ごとに別の語を追加する(同じ語だと2回目以降は重複で失敗するため)
+        prefix = f"追加語{next(rounds)}_"
+        for i in range(ADD_WORDS):
+            storage.add_word(WordEntry(
+                word=Word(surface=f"{prefix}{i}", reading="ツイカゴ"),
+                pos=PartOfSpeech.NOUN,
+                source=WordSource.MANUAL,
+            ))
+        return ADD_WORDS
+
+    step = max(len(vocabulary) // SEARCH_QUERIES, 1)
+    queries = [surface for surface, _ in vocabulary[::step][:SEARCH_QUERIES]]
+
+    def search_words() -> int:
+        for query in queries:
+            storage.search_words(query, limit=100)
+        return len(queries)
+
+    def get_all_words() -> int:
+        return len(storage.get_all_words())
+
+    # 追加で語数が変わるため、読み込みの計測を先に行う
+    results = {
+        "storage.search_words": measure(search_words, repeat),
+        "storage.get_all_words": measure(get_all_words, repeat),
+        "storage.add_word": measure(add_words, repeat),
+    }
+    storage.close()
+    return results
+
+
+def bench_extractor(corpus: List[str], repeat: int) -> Dict[str, Dict]:
+    """WordExtractor の新語抽出と頻度計数"""
+    from crawler.extractor import WordExtractor
+
+    extractor = WordExtractor()
+    extracted = [extractor.extract_all(text) for text in corpus]
+    candidates = [set().union(*categories.values()) for categories in extracted]
+
+    def extract_all() -> int:
+        for text in corpus:
+            extractor.extract_all(text)
+        return len(corpus)
+
+    def count_frequency() -> int:
+        for text, words in zip(corpus, candidates):
+            extractor.count_frequency(text, words)
+        return len(corpus)
+
+    return {
+        "extractor.extract_all": measure(extract_all, repeat),
+        "extractor.count_frequency": measure(count_frequency, repeat),
+    }
+
+
+def bench_export(db_path: str, word_count: int, repeat: int) -> Dict[str, Dict]:
+    """全ての形式のエクスポート"""
+    from core import NeoDict
+
+    neodict = NeoDict(db_path)
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name, suffix in [("mecab", "csv"), ("json", "json"), ("sudachi", "csv"), ("janome", "csv")]:
+            export = getattr(neodict, f"export_{name}")
+            output_path = os.path.join(out_dir, f"dict.{suffix}")
+
+            def run() -> int:
+                # エクスポートは進捗を表示するため、計測中は出力を捨てる
+                with contextlib.redirect_stdout(io.StringIO()):
+                    export(output_path)
+                return word_count
+
+            results[f"export.{name}"] = measure(run, repeat)
+    neodict.close()
+    return results
+
+
+def bench_crawler(vocabulary: list, repeat: int) -> Dict[str, Dict]:
+    """ローカルのHTTPサーバーに対するニュース・Wikipediaのクロール(待ち時間なし)"""
+    import logging
+
+    from crawler import NewsCrawler, WikipediaCrawler
+
+    # 取得のたびに出るINFOログが計測に入らないようにする
+    logging.getLogger("crawler").setLevel(logging.WARNING)
+
+    with FixtureServer(fixture_pages(vocabulary)) as server:
+        news = NewsCrawler(delay=0)
+        news.SOURCES = {"nhk": f"{server.url}/news/", "yahoo": f"{server.url}/yahoo/"}
+        wikipedia = WikipediaCrawler(delay=0)
+        wikipedia.BASE_URL = server.url
+        # ローカルへの接続がプロキシ設定の影響を受けないようにする
+        news.session.trust_env = False
+        wikipedia.session.trust_env = False
+
+        def crawl_news() -> int:
+            words = 0
+            for _ in range(CRAWL_ROUNDS):
+                words += len(news.crawl())
+            return words
+
+        def crawl_wikipedia() -> int:
+            words = 0
+            for _ in range(CRAWL_ROUNDS):
+                words += len(wikipedia.crawl(categories=["新語"]))
+            return words
+
+        results = {
+            "crawler.news": measure(crawl_news, repeat),
+            "crawler.wikipedia": measure(crawl_wikipedia, repeat),
+        }
+        news.session.close()
+        wikipedia.session.close()
+
+    if not all(result["ops"] for result in results.values()):
+        raise RuntimeError("クロールで単語を1件も収集できませんでした(フィクスチャを確認してください)")
+    return results
+
+
+def bench_startup(repeat: int) -> Dict[str, Dict]:
+    """パッケージのimportとCLIの search/stats の実行時間(インタプリタの起動を含む)"""
+    statements = {f"startup.import_{package}": f"import {package}" for package in ("core", "crawler", "updater")}
+    for args in (["stats"], ["search", "生成AI"]):
+        statements[f"startup.cli_{args[0]}"] = (
+            f"from cli.commands import main; main({args!r}, standalone_mode=False)"
+        )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as home:
+        env = {**os.environ, "HOME": home}
+
+        def run(statement: str) -> int:
+            subprocess.run(
+                [sys.executable, "-c", statement], cwd=SRC_DIR, env=env,
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            return 1
+
+        for name, statement in statements.items():
+            # 1回目でDBを作成し、スキーマ作成済みの状態を計測する
+            run(statement)
+            results[name] = measure(lambda: run(statement), repeat)
+    return results
+
+
+def run_suite(sizes: List[int], groups: List[str], repeat: int) -> Dict:
+    """指定された規模・項目のベンチマークを実行"""
+    results: Dict[str, Dict] = {}
+
+    for size in sizes:
+        label = format_size(size)
+        vocabulary = synthetic_vocabulary(size)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "bench.db")
+            if "storage" in groups or "export" in groups:
+                build_dictionary(db_path, vocabulary)
+
+            sections = []
+            if "export" in groups:
+                # 追加の計測で語数が変わる前にエクスポートする
+                sections.append(lambda: bench_export(db_path, size, repeat))
+            if "storage" in groups:
+                sections.append(lambda: bench_storage(db_path, vocabulary, repeat))
+            if "extractor" in groups:
+                corpus = synthetic_corpus(vocabulary, max(size // 10, 100))
+                sections.append(lambda: bench_extractor(corpus, repeat))
+
+            for section in sections:
+                for name, result in section().items():
+                    results[f"{name}[{label}]"] = result
+                    print(f"{name}[{label}]".ljust(36), result, file=sys.stderr)
+
+    if "crawler" in groups:
+        for name, result in bench_crawler(synthetic_vocabulary(10000), repeat).items():
+            results[name] = result
+            print(name.ljust(36), result, file=sys.stderr)
+
+    if "startup" in groups:
+        for name, result in bench_startup(repeat).items():
+            results[name] = result
+            print(name.ljust(36), result, file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": [format_size(size) for size in sizes],
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """
+    基準の結果と比較
+
+    Args:
+        current: 今回の結果
+        baseline: 基準の結果
+        threshold: 遅くなったとみなす時間の増加率(0.1 なら10%)
+
+    Returns:
+        両方にある項目ごとの比較結果(regression が True なら遅くなった)
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base or not base.get("seconds"):
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        rows.append({
+            "name": name,
+            "baseline": base["seconds"],
+            "current": result["seconds"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k,1m", help="辞書の語数(カンマ区切り、例: 10k,100k,1m)")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"実行する項目({','.join(GROUPS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="各計測の繰り返し回数(最速の回を採る)")
+    parser.add_argument("--output", help="結果を書き出すJSONファイル(省略時は標準出力)")
+    parser.add_argument("--compare", metavar="BASELINE", help="比較する基準の結果JSON")
+    parser.add_argument("--threshold", type=float, default=0.1, help="遅くなったとみなす時間の増加率")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    groups = [group.strip() for group in args.only.split(",") if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"不明な項目です: {', '.join(sorted(unknown))}")
+
+    current = run_suite(sizes, groups, args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(current, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    rows = compare(current, baseline, args.threshold)
+    for row in rows:
+        mark = "REGRESSION" if row["regression"] else "ok"
+        print(
+            f"{row['name']:<36} {row['baseline']:>10.4f}s -> {row['current']:>10.4f}s "
+            f"x{row['ratio']:<6} {mark}",
+            file=sys.stderr,
+        )
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} 件の項目が {args.threshold:.0%} を超えて遅くなりました", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,48 +1,110 @@
 """
 CLIコマンド定義
+
+シェルスクリプトから頻繁に呼ばれるため、各サブコマンドの依存
+(辞書・クローラー・NumPy・rich等)はそのコマンドの実行時に読み込む。
 """
 
 import click
 import sys
 from pathlib import Path
-from rich.console import Console
-from rich.table import Table
-from rich import print as rprint
 
 # パスを追加してインポート
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from core import NeoDict
-from updater import DictUpdater, UpdateScheduler
 
-console = Console()
+class _LazyConsole:
+    """最初の出力時に rich.console.Console を生成するプロキシ"""
+
+    def __init__(self):
+        self._console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return getattr(self._console, name)
+
+
+console = _LazyConsole()
+
+
+def _start_profiling(ctx: click.Context, output: str = None):
+    """
+    コマンドの実行中の計測を開始し、終了時に集計結果を標準エラー出力に表示する
+
+    Args:
+        ctx: 実行中のコマンドのコンテキスト
+        output: cProfile の結果(pstats形式)の保存先(省略時は cProfile を使わない)
+    """
+    from metrics import profiling
+
+    profiling.enable()
+
+    cprofile = None
+    if output:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    def finish():
+        if cprofile is not None:
+            import pstats
+
+            cprofile.disable()
+            cprofile.dump_stats(output)
+            pstats.Stats(cprofile, stream=sys.stderr).sort_stats("cumulative").print_stats(20)
+
+        profiler = profiling.disable()
+        click.echo(profiling.format_report(profiler.snapshot()), err=True)
+
+    ctx.call_on_close(finish)
 
 
 @click.group()
 @click.version_option(version="0.1.0")
-def main():
+@click.option("--profile", is_flag=True, help="各処理の所要時間を計測して終了時に表示")
+@click.option("--profile-output", type=click.Path(dir_okay=False),
+              help="cProfile の結果(pstats形式)の保存先(--profile を含む)")
+@click.pass_context
+def main(ctx, profile, profile_output):
     """NeoDict - 自動更新型日本語新語辞書"""
-    pass
+    if profile or profile_output:
+        _start_profiling(ctx, profile_output)
 
 
 @main.command()
 @click.option("--sources", "-s", multiple=True, help="更新元(wikipedia, news)")
 @click.option("--full", is_flag=True, help="全更新を実行")
-def update(sources, full):
+@click.option("--discover", is_flag=True,
+              help="n-gram統計で新語を発見(統計は辞書ファイルの隣の .ngram に積み上げる)")
+def update(sources, full, discover):
     """辞書を最新の情報で更新"""
+    from updater import DictUpdater
+
     console.print("[bold blue]辞書を更新しています...[/bold blue]")
 
     source_list = list(sources) if sources else ["wikipedia", "news"]
     updater = DictUpdater(sources=source_list)
+    if discover:
+        updater.discovery_path = str(Path(updater.dict.storage.db_path).with_suffix(".ngram"))
 
     try:
         stats = updater.update(full_update=full)
+        if stats.get("skipped"):
+            console.print("[yellow]同じソースを更新中の処理があるため、更新しませんでした[/yellow]")
+            return
 
         console.print("[bold green]✓ 更新が完了しました[/bold green]")
         console.print(f"収集した単語: {stats['collected_words']}")
         console.print(f"ユニーク単語: {stats['unique_words']}")
         console.print(f"追加: {stats['added']}")
         console.print(f"更新: {stats['updated']}")
+        console.print(f"候補に積み上げ: {stats['staged']}")
+        if discover:
+            console.print(f"発見した候補: {stats['discovery_candidates']}")
         console.print(f"所要時間: {stats['duration_seconds']:.2f}秒")
 
     except Exception as e:
@@ -50,20 +112,73 @@ def update(sources, full):
         sys.exit(1)
 
 
+@main.command()
+@click.option("--min-frequency", default=1, help="この頻度未満の語を削除")
+@click.option("--max-age-days", default=365, help="この日数より古い語を削除")
+@click.option("--archive", is_flag=True, help="削除した語をアーカイブに退避")
+@click.option("--no-vacuum", is_flag=True, help="空き領域の返却を行わない")
+def cleanup(min_frequency, max_age_days, archive, no_vacuum):
+    """低頻度語・古い語を削除"""
+    from updater import DictUpdater
+
+    updater = DictUpdater()
+
+    stats = updater.cleanup(
+        min_frequency=min_frequency,
+        max_age_days=max_age_days,
+        archive=archive,
+        vacuum=not no_vacuum
+    )
+
+    console.print("[bold green]✓ クリーンアップが完了しました[/bold green]")
+    console.print(f"削除: {stats['deleted']:,}")
+    console.print(f"アーカイブ: {stats['archived']:,}")
+    console.print(f"回収したサイズ: {stats['bytes_reclaimed']:,} bytes")
+
+
+@main.command()
+def costs():
+    """全単語のMeCabコストを頻度から再計算"""
+    from core import NeoDict
+    from core.cost import assign_costs
+
+    neodict = NeoDict()
+
+    updated = assign_costs(neodict.storage)
+
+    console.print(f"[bold green]✓ {updated:,}語のコストを更新しました[/bold green]")
+
+
 @main.command()
 @click.argument("query")
 @click.option("--fuzzy", "-f", is_flag=True, help="あいまい検索")
 @click.option("--limit", "-l", default=10, help="最大表示数")
 def search(query, fuzzy, limit):
-    """単語を検索"""
+    """単語を検索(QUERY に - を指定すると標準入力の各行をまとめて引く)"""
+    from core import NeoDict
+    from rich.table import Table
+
     neodict = NeoDict()
-    results = neodict.search(query, fuzzy=fuzzy, limit=limit)
+
+    if query == "-":
+        surfaces = [line.strip() for line in sys.stdin if line.strip()]
+        found = neodict.get_words(surfaces)
+        results = [found[surface] for surface in dict.fromkeys(surfaces) if surface in found]
+        title = f"検索結果: {len(results)}/{len(set(surfaces))}語"
+
+        missing = [surface for surface in dict.fromkeys(surfaces) if surface not in found]
+        if missing:
+            console.print(f"[yellow]見つからなかった語: {', '.join(missing)}[/yellow]")
+    else:
+        results = neodict.search(query, fuzzy=fuzzy, limit=limit)
+        title = f"検索結果: {query}"
 
     if not results:
-        console.print(f"[yellow]'{query}' は見つかりませんでした[/yellow]")
+        if query != "-":
+            console.print(f"[yellow]'{query}' は見つかりませんでした[/yellow]")
         return
 
-    table = Table(title=f"検索結果: {query}")
+    table = Table(title=title)
     table.add_column("表層形", style="cyan")
     table.add_column("読み", style="magenta")
     table.add_column("品詞", style="green")
@@ -83,23 +198,35 @@ def search(query, fuzzy, limit):
 
 
 @main.command()
-@click.argument("word")
+@click.argument("words", nargs=-1, required=True)
 @click.option("--pos", "-p", default="名詞", help="品詞")
 @click.option("--reading", "-r", help="読み")
 @click.option("--category", "-c", help="カテゴリ")
-def add(word, pos, reading, category):
-    """単語を手動で追加"""
+def add(words, pos, reading, category):
+    """単語を手動で追加(複数指定可、- を指定すると標準入力の各行を追加)"""
+    from core import NeoDict
+
+    if words == ("-",):
+        words = tuple(line.strip() for line in sys.stdin if line.strip())
+
     neodict = NeoDict()
 
     try:
-        neodict.add_word(
-            surface=word,
-            pos=pos,
-            reading=reading,
-            source="manual",
-            category=category
-        )
-        console.print(f"[bold green]✓ '{word}' を追加しました[/bold green]")
+        # 複数語は1トランザクションで書き込む
+        with neodict.batch():
+            for word in words:
+                neodict.add_word(
+                    surface=word,
+                    pos=pos,
+                    reading=reading,
+                    source="manual",
+                    category=category
+                )
+
+        if len(words) == 1:
+            console.print(f"[bold green]✓ '{words[0]}' を追加しました[/bold green]")
+        else:
+            console.print(f"[bold green]✓ {len(words):,}語を追加しました[/bold green]")
 
     except Exception as e:
         console.print(f"[bold red]✗ エラー: {e}[/bold red]")
@@ -110,6 +237,8 @@ def add(word, pos, reading, category):
 @click.argument("word")
 def remove(word):
     """単語を削除"""
+    from core import NeoDict
+
     neodict = NeoDict()
 
     count = neodict.remove_word(word)
@@ -123,6 +252,8 @@ def remove(word):
 @main.command()
 def stats():
     """辞書の統計情報を表示"""
+    from core import NeoDict
+
     neodict = NeoDict()
     stats = neodict.get_stats()
 
@@ -144,13 +275,16 @@ def stats():
 @main.command()
 @click.option("--format", "-f", type=click.Choice(["mecab", "json"]), default="mecab", help="出力形式")
 @click.option("--output", "-o", required=True, help="出力先パス")
-def export(format, output):
+@click.option("--at-version", type=int, help="指定した版の時点の内容を出力(mecab形式のみ)")
+def export(format, output, at_version):
     """辞書をエクスポート"""
+    from core import NeoDict
+
     neodict = NeoDict()
 
     try:
         if format == "mecab":
-            neodict.export_mecab(output)
+            neodict.export_mecab(output, version=at_version)
         elif format == "json":
             neodict.export_json(output)
 
@@ -161,14 +295,103 @@ def export(format, output):
         sys.exit(1)
 
 
+@main.command()
+@click.option("--limit", "-n", default=10, help="表示件数")
+def history(limit):
+    """更新履歴(版)を表示"""
+    from core import NeoDict
+    from rich.table import Table
+
+    neodict = NeoDict()
+
+    table = Table(title="更新履歴")
+    table.add_column("版", style="cyan")
+    table.add_column("日時", style="magenta")
+    table.add_column("説明")
+    table.add_column("語数", style="yellow")
+    table.add_column("追加/削除/変更", style="green")
+
+    for version in neodict.get_versions(limit):
+        changes = version["changes"]
+        table.add_row(
+            str(version["version"]),
+            str(version["created_date"]),
+            version["description"] or "-",
+            f"{version['word_count']:,}",
+            f"{changes['add']}/{changes['remove']}/{changes['change']}"
+        )
+
+    console.print(table)
+
+
+@main.command()
+@click.argument("version", type=int)
+def rollback(version):
+    """辞書を指定した版の状態に戻す"""
+    from core import NeoDict
+
+    neodict = NeoDict()
+
+    try:
+        changes = neodict.rollback(version)
+        console.print(f"[bold green]✓ 版 {version} の状態に戻しました[/bold green]")
+        console.print(f"追加: {changes['add']} 削除: {changes['remove']} 変更: {changes['change']}")
+
+    except ValueError as e:
+        console.print(f"[bold red]✗ エラー: {e}[/bold red]")
+        sys.exit(1)
+
+
+@main.command()
+@click.option("--host", default="127.0.0.1", help="待ち受けるアドレス")
+@click.option("--port", "-p", default=8765, help="待ち受けるポート")
+@click.option("--workers", "-w", default=4, help="問い合わせを行うスレッド数")
+def serve(host, port, workers):
+    """辞書検索HTTPサーバーを起動"""
+    import asyncio
+    from server import LookupServer
+
+    server = LookupServer(host=host, port=port, workers=workers)
+
+    async def run():
+        await server.start()
+        console.print(f"[bold green]✓ http://{server.host}:{server.port} で待ち受けています[/bold green]")
+        console.print("エンドポイント: /word /search /prefix /lookup(POST) /health")
+        console.print("Ctrl+C で停止")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        console.print("\n[bold yellow]サーバーを停止しました[/bold yellow]")
+
+
 @main.command()
 @click.option("--daily", is_flag=True, help="毎日更新")
 @click.option("--hourly", is_flag=True, help="毎時更新")
 @click.option("--hour", default=3, help="実行時(0-23)")
 @click.option("--minute", default=0, help="実行分(0-59)")
-def schedule(daily, hourly, hour, minute):
+@click.option("--every", "every", multiple=True, metavar="SOURCE=MINUTES",
+              help="ソースごとの更新間隔(例: --every news=10 --every wikipedia=60)")
+@click.option("--workers", default=4, help="同時に実行する更新の最大数")
+@click.option("--metrics-port", type=int, help="指標(Prometheus形式)を配信するポート")
+@click.option("--metrics-textfile", type=click.Path(dir_okay=False),
+              help="更新のたびに指標を書き出すファイル(node_exporter の textfile collector 用)")
+def schedule(daily, hourly, hour, minute, every, workers, metrics_port, metrics_textfile):
     """自動更新をスケジュール"""
-    scheduler = UpdateScheduler()
+    from updater import UpdateScheduler
+
+    intervals = {}
+    for spec in every:
+        source, _, minutes = spec.partition("=")
+        try:
+            intervals[source.strip()] = float(minutes)
+        except ValueError:
+            raise click.BadParameter(f"SOURCE=MINUTES の形式で指定してください: {spec}", param_hint="--every")
+
+    scheduler = UpdateScheduler(
+        metrics_port=metrics_port, metrics_textfile=metrics_textfile, workers=workers
+    )
 
     if daily:
         scheduler.schedule_daily(hour=hour, minute=minute)
@@ -176,8 +399,13 @@ def schedule(daily, hourly, hour, minute):
     elif hourly:
         scheduler.schedule_hourly(minute=minute)
         console.print(f"[bold green]✓ 毎時 {minute:02d}分 に更新するようスケジュールしました[/bold green]")
-    else:
-        console.print("[yellow]オプションを指定してください: --daily または --hourly[/yellow]")
+
+    for source, minutes in intervals.items():
+        scheduler.schedule_source(source, minutes)
+        console.print(f"[bold green]✓ {source} を {minutes:g}分ごとに更新するようスケジュールしました[/bold green]")
+
+    if not (daily or hourly or intervals):
+        console.print("[yellow]オプションを指定してください: --daily, --hourly または --every[/yellow]")
         return
 
     console.print("[bold blue]スケジューラーを起動しています...[/bold blue]")
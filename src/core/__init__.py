@@ -4,7 +4,9 @@ NeoDict Core Module
 """
 
 from .dictionary import NeoDict
-from .word import Word, WordEntry, PartOfSpeech, WordSource
+from .word import Word, WordEntry, WordRecord, PartOfSpeech, WordSource
 from .storage import DictStorage
+from .sharding import ShardedDictStorage
+from .matcher import DictMatcher
 
-__all__ = ["NeoDict", "Word", "WordEntry", "DictStorage", "PartOfSpeech", "WordSource"]
+__all__ = ["NeoDict", "Word", "WordEntry", "WordRecord", "DictStorage", "ShardedDictStorage", "DictMatcher", "PartOfSpeech", "WordSource"]
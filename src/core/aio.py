@@ -0,0 +1,219 @@
+"""
+asyncio から NeoDict を使うためのラッパー
+
+SQLiteの操作は専用のスレッドプールで行い、イベントループを止めない。
+同時に呼ばれた get_word / add_word はまとめて1回の問い合わせ・1トランザクションにする。
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .dictionary import NeoDict
+from .word import WordRecord
+
+# 1回にまとめる最大件数と、まとめるために待つ最大秒数
+LOOKUP_BATCH_SIZE = 256
+LOOKUP_BATCH_DELAY = 0.001
+WRITE_BATCH_SIZE = 500
+WRITE_BATCH_DELAY = 0.005
+
+
+class _Coalescer:
+    """
+    短時間に届いた要求をまとめて1回の関数呼び出しにする
+
+    flush_func は要求のリストを受け取り、同じ順の結果のリストを返す。
+    """
+
+    def __init__(self, run: Callable, flush_func: Callable[[List], List], max_items: int, delay: float):
+        self.run = run
+        self.flush_func = flush_func
+        self.max_items = max_items
+        self.delay = delay
+        self.pending: List = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.tasks: set = set()
+
+    async def submit(self, item) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((item, future))
+
+        if len(self.pending) >= self.max_items:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.delay, self.flush)
+
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        pending, self.pending = self.pending, []
+        if pending:
+            task = asyncio.ensure_future(self._resolve(pending))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def drain(self):
+        """保留中の要求を全て処理し終えるまで待つ"""
+        self.flush()
+        while self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def _resolve(self, pending: List):
+        try:
+            results = await self.run(self.flush_func, [item for item, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class AsyncNeoDict:
+    """
+    NeoDict の非同期版
+
+    読み込みは max_workers 本のスレッド(スレッドごとに接続を持つ)で行い、
+    書き込みは1本のスレッドで順に行う。同時に呼ばれた add_word は
+    最大 WRITE_BATCH_SIZE 件ずつ1トランザクションで書き込む。
+
+    使い方:
+        async with AsyncNeoDict() as neodict:
+            word = await neodict.get_word("生成AI")
+    """
+
+    def __init__(self, dict_instance: Optional[NeoDict] = None, max_workers: int = 4):
+        """
+        初期化
+
+        Args:
+            dict_instance: 対象の辞書(省略時は既定の辞書)
+            max_workers: 読み込みに使うスレッド数
+        """
+        self.dict = dict_instance or NeoDict()
+        self._readers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="neodict-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="neodict-write")
+
+        self._lookups = _Coalescer(
+            self._read, self._lookup_batch, LOOKUP_BATCH_SIZE, LOOKUP_BATCH_DELAY
+        )
+        self._writes = _Coalescer(
+            self._write, self.dict.add_entries, WRITE_BATCH_SIZE, WRITE_BATCH_DELAY
+        )
+
+    async def __aenter__(self) -> "AsyncNeoDict":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _read(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, func, *args)
+
+    async def _write(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, func, *args)
+
+    def _lookup_batch(self, surfaces: List[str]) -> List[Optional[Dict]]:
+        words = self.dict.get_words(surfaces)
+        return [words.get(surface) for surface in surfaces]
+
+    async def get_word(self, surface: str) -> Optional[Dict]:
+        """単語を取得(同時の呼び出しは1回の get_words にまとめる)"""
+        return await self._lookups.submit(surface)
+
+    async def get_words(self, surfaces: List[str]) -> Dict[str, Dict]:
+        """複数の単語をまとめて取得"""
+        return await self._read(self.dict.get_words, list(surfaces))
+
+    async def search(self, query: str, fuzzy: bool = False, limit: int = 100) -> List[Dict]:
+        """単語を検索"""
+        return await self._read(self.dict.search, query, fuzzy, limit)
+
+    async def search_prefix(self, prefix: str, limit: int = 100) -> List[Dict]:
+        """前方一致で単語を検索"""
+        return await self._read(self.dict.search_prefix, prefix, limit)
+
+    async def get_trending(self, days: int = 7, limit: int = 50) -> List[Dict]:
+        """直近で出現回数の多い単語を取得"""
+        return await self._read(self.dict.get_trending, days, limit)
+
+    async def get_stats(self) -> Dict:
+        """辞書の統計情報を取得"""
+        return await self._read(self.dict.get_stats)
+
+    async def segment(self, text: str, with_entries: bool = True) -> List[Dict]:
+        """テキストを辞書の語で分割"""
+        return await self._read(self.dict.segment, text, with_entries)
+
+    async def add_word(self, surface: str, **kwargs) -> int:
+        """
+        単語を追加(引数は NeoDict.add_word と同じ)
+
+        同時に呼ばれた追加は1トランザクションにまとめて書き込む。
+
+        Returns:
+            追加された単語のID
+
+        Raises:
+            ValueError: 品詞・収集元が不正な場合
+        """
+        entry = self.dict.make_entry(surface, **kwargs)
+        return await self._writes.submit(entry)
+
+    async def remove_word(self, surface: str) -> int:
+        """単語を削除"""
+        await self._writes.drain()
+        return await self._write(self.dict.remove_word, surface)
+
+    async def flush(self):
+        """保留中の追加を書き込み終えるまで待つ"""
+        await self._writes.drain()
+
+    async def iter_words(self, batch_size: int = 1000) -> AsyncIterator[WordRecord]:
+        """
+        全単語を頻度の高い順に非同期に順次取得
+
+        1本のスレッドが batch_size 件ずつ読み進める(カーソルはそのスレッドでのみ使う)。
+
+        Yields:
+            WordRecord
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="neodict-iter")
+        loop = asyncio.get_running_loop()
+        records = iter(self.dict.storage.iter_records(batch_size))
+
+        def next_batch() -> List[WordRecord]:
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    break
+            return batch
+
+        try:
+            while True:
+                batch = await loop.run_in_executor(executor, next_batch)
+                if not batch:
+                    break
+                for record in batch:
+                    yield record
+        finally:
+            # 読み途中のカーソルは開いたスレッドで閉じる
+            await loop.run_in_executor(executor, records.close)
+            executor.shutdown(wait=False)
+
+    async def close(self):
+        """保留中の書き込みを済ませてスレッドプールを止める"""
+        await self._lookups.drain()
+        await self._writes.drain()
+        self._readers.shutdown(wait=False)
+        self._writer.shutdown(wait=False)
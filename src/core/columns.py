@@ -0,0 +1,156 @@
+"""
+列指向の一括読み込み
+
+SQLiteの行を単語オブジェクトにせず、列ごとの型付き配列に詰める。
+数値列はNumPy配列、文字列列はオフセット配列+UTF-8バイト列で保持する。
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+# 数値列: 列名 -> (SQL式, dtype)。NULL は 0 として読む
+NUMERIC_COLUMNS = {
+    "id": ("id", np.int64),
+    "frequency": ("IFNULL(frequency, 0)", np.int64),
+    "score": ("IFNULL(score, 0)", np.float64),
+    "score_day": ("IFNULL(score_day, 0)", np.int64),
+    "cost": ("IFNULL(cost, 0)", np.int32),
+    "left_context_id": ("IFNULL(left_context_id, 0)", np.int32),
+    "right_context_id": ("IFNULL(right_context_id, 0)", np.int32),
+    "surface_length": ("length(surface)", np.int32),
+}
+
+# 文字列列
+STRING_COLUMNS = (
+    "surface", "reading", "pronunciation", "pos",
+    "pos_detail1", "pos_detail2", "pos_detail3",
+    "conjugation_type", "conjugation_form", "base_form",
+    "source", "category", "added_date", "last_updated",
+)
+
+
+class StringColumn:
+    """
+    オフセット配列とUTF-8バイト列による文字列列
+
+    i番目の値は data[offsets[i]:offsets[i + 1]]。NULL は valid[i] が False。
+    """
+
+    __slots__ = ("offsets", "data", "valid")
+
+    def __init__(self, offsets: np.ndarray, data: bytes, valid: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+        self.valid = valid
+
+    @classmethod
+    def from_values(cls, values: Sequence[Optional[str]]) -> "StringColumn":
+        """文字列のシーケンスから生成"""
+        encoded = [value.encode("utf-8") if value is not None else b"" for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        valid = np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+        return cls(offsets, b"".join(encoded), valid)
+
+    @classmethod
+    def concat(cls, columns: List["StringColumn"]) -> "StringColumn":
+        """複数の列を連結"""
+        if not columns:
+            return cls(np.zeros(1, dtype=np.int64), b"", np.zeros(0, dtype=bool))
+
+        offsets = [columns[0].offsets]
+        base = columns[0].offsets[-1]
+        for column in columns[1:]:
+            offsets.append(column.offsets[1:] + base)
+            base += column.offsets[-1]
+
+        return cls(
+            np.concatenate(offsets),
+            b"".join(column.data for column in columns),
+            np.concatenate([column.valid for column in columns])
+        )
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if not self.valid[index]:
+            return None
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def byte_lengths(self) -> np.ndarray:
+        """各値のUTF-8バイト長"""
+        return np.diff(self.offsets)
+
+    def to_list(self) -> List[Optional[str]]:
+        """Pythonの文字列リストに変換"""
+        return list(self)
+
+
+Column = Union[np.ndarray, StringColumn]
+
+
+def column_expressions(columns: Iterable[str]) -> List[str]:
+    """
+    列名をSELECT句の式に変換
+
+    Args:
+        columns: 列名
+
+    Returns:
+        SQL式のリスト
+
+    Raises:
+        ValueError: 未知の列名の場合
+    """
+    expressions = []
+    for name in columns:
+        if name in NUMERIC_COLUMNS:
+            expressions.append(NUMERIC_COLUMNS[name][0])
+        elif name in STRING_COLUMNS:
+            expressions.append(name)
+        else:
+            raise ValueError(f"Unknown column: {name}")
+    return expressions
+
+
+def collect_columns(cursor, columns: Sequence[str], batch_size: int = 65536) -> Dict[str, Column]:
+    """
+    実行済みカーソルの行を batch_size 件ずつ列配列に詰める
+
+    Args:
+        cursor: 列順が columns と一致するSELECTを実行したカーソル
+        columns: 列名
+        batch_size: 1回に読み出す行数
+
+    Returns:
+        列名と配列(数値はnp.ndarray、文字列はStringColumn)の辞書
+    """
+    chunks: Dict[str, list] = {name: [] for name in columns}
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+
+        for index, name in enumerate(columns):
+            values = [row[index] for row in rows]
+            if name in NUMERIC_COLUMNS:
+                chunks[name].append(
+                    np.fromiter(values, dtype=NUMERIC_COLUMNS[name][1], count=len(values))
+                )
+            else:
+                chunks[name].append(StringColumn.from_values(values))
+
+    result = {}
+    for name in columns:
+        if name in NUMERIC_COLUMNS:
+            dtype = NUMERIC_COLUMNS[name][1]
+            result[name] = np.concatenate(chunks[name]) if chunks[name] else np.zeros(0, dtype=dtype)
+        else:
+            result[name] = StringColumn.concat(chunks[name])
+    return result
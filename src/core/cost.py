@@ -0,0 +1,134 @@
+"""
+MeCab用コストの計算
+
+頻度・減衰スコア・表層形の長さから、辞書全体のコストをNumPyで一括計算する。
+コストは低いほど形態素解析で優先される。
+"""
+
+from datetime import date
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .decay import SCORE_HALF_LIFE_DAYS
+from .storage import IN_CHUNK_SIZE, DictStorage
+
+# 基準コスト(頻度0、3文字の語がおおよそ従来の既定値6000になる)
+BASE_COST = 6400
+
+# 累積頻度 log(1+frequency) あたりの減点
+FREQUENCY_WEIGHT = 200.0
+
+# 減衰スコア log(1+score) あたりの減点
+SCORE_WEIGHT = 300.0
+
+# 1文字あたりの減点(長い語を分割されにくくする)
+LENGTH_WEIGHT = 200.0
+MAX_LENGTH_BONUS = 10
+
+MIN_COST = 1000
+MAX_COST = 9000
+
+# コスト計算に読み込む列
+COST_INPUT_COLUMNS = ["id", "frequency", "score", "score_day", "surface_length", "cost"]
+
+
+def compute_costs(
+    frequency: np.ndarray,
+    score: np.ndarray,
+    score_day: np.ndarray,
+    length: np.ndarray,
+    today: int
+) -> np.ndarray:
+    """
+    コストを一括計算
+
+    Args:
+        frequency: 累積頻度
+        score: 減衰スコア(score_day 時点の値)
+        score_day: スコアを最後に更新した日(date.toordinal()、未更新は0)
+        length: 表層形の文字数
+        today: 評価日(date.toordinal())
+
+    Returns:
+        int32のコスト配列
+    """
+    elapsed = np.maximum(today - score_day, 0)
+    decayed = score * np.power(0.5, elapsed / SCORE_HALF_LIFE_DAYS)
+
+    cost = (
+        BASE_COST
+        - FREQUENCY_WEIGHT * np.log1p(np.maximum(frequency, 0))
+        - SCORE_WEIGHT * np.log1p(np.maximum(decayed, 0))
+        - LENGTH_WEIGHT * (np.clip(length, 1, MAX_LENGTH_BONUS) - 1)
+    )
+
+    return np.clip(np.rint(cost), MIN_COST, MAX_COST).astype(np.int32)
+
+
+def assign_costs(
+    storage: DictStorage,
+    surfaces: Optional[Iterable[str]] = None,
+    exclude_sources: Iterable[str] = ("manual",)
+) -> int:
+    """
+    単語のMeCabコストを再計算して書き戻す
+
+    列は DictStorage.read_columns で型付き配列として読み込み、
+    値が変わった行だけを1トランザクションで更新する。
+
+    Args:
+        storage: 対象のストレージ(ShardedDictStorage も可)
+        surfaces: 対象の表層形(Noneなら辞書全体)
+        exclude_sources: 対象から除外するソース(手動登録語のコストは変更しない)
+
+    Returns:
+        コストを更新した単語数
+    """
+    shards = getattr(storage, "shards", None)
+    if shards is not None:
+        # シャード分割ストレージでは、単語IDがシャードごとに振られるためシャード単位で計算する
+        if surfaces is None:
+            parts = {index: None for index in range(len(shards))}
+        else:
+            parts = storage.partition(surfaces)
+        return sum(
+            assign_costs(storage.shard(index), part, exclude_sources=exclude_sources)
+            for index, part in parts.items()
+        )
+
+    excluded = list(exclude_sources)
+    conditions = []
+    if excluded:
+        conditions.append(f"source NOT IN ({','.join('?' * len(excluded))})")
+
+    if surfaces is None:
+        batches = [(" AND ".join(conditions) or None, excluded)]
+    else:
+        surfaces = list(surfaces)
+        batches = []
+        for i in range(0, len(surfaces), IN_CHUNK_SIZE):
+            chunk = surfaces[i:i + IN_CHUNK_SIZE]
+            where = " AND ".join(conditions + [f"surface IN ({','.join('?' * len(chunk))})"])
+            batches.append((where, excluded + chunk))
+
+    today = date.today().toordinal()
+    updated = 0
+    for where, params in batches:
+        columns = storage.read_columns(COST_INPUT_COLUMNS, where=where, params=params)
+        if not len(columns["id"]):
+            continue
+
+        costs = compute_costs(
+            frequency=columns["frequency"],
+            score=columns["score"],
+            score_day=columns["score_day"],
+            length=columns["surface_length"],
+            today=today
+        )
+
+        changed = costs != columns["cost"]
+        storage.set_costs(zip(costs[changed].tolist(), columns["id"][changed].tolist()))
+        updated += int(changed.sum())
+
+    return updated
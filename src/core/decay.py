@@ -0,0 +1,48 @@
+"""
+時間減衰付き出現スコア
+"""
+
+from typing import Optional, Tuple
+
+# 減衰スコアの半減期(日)
+SCORE_HALF_LIFE_DAYS = 7.0
+
+
+def decay_score(score: float, score_day: Optional[int], day: int) -> float:
+    """
+    score_day 時点のスコアを day 時点まで指数減衰させる
+
+    Args:
+        score: 減衰スコア
+        score_day: スコアを最後に更新した日(date.toordinal())
+        day: 評価する日(date.toordinal())
+
+    Returns:
+        day 時点の減衰スコア
+    """
+    if not score or score_day is None or day <= score_day:
+        return score or 0.0
+    return score * 0.5 ** ((day - score_day) / SCORE_HALF_LIFE_DAYS)
+
+
+def merge_score(
+    score: float, score_day: Optional[int], count: int, day: int
+) -> Tuple[float, int]:
+    """
+    減衰スコアに day 時点の出現回数を加算
+
+    day が score_day より前(過去日の記録)の場合は、基準日を動かさずに
+    出現回数の方を score_day まで減衰させて加算する。
+
+    Args:
+        score: 減衰スコア
+        score_day: スコアを最後に更新した日(date.toordinal())
+        count: 出現回数
+        day: 出現した日(date.toordinal())
+
+    Returns:
+        (新しいスコア, 新しい基準日)
+    """
+    if score_day is None or day >= score_day:
+        return decay_score(score, score_day, day) + count, day
+    return (score or 0.0) + count * 0.5 ** ((score_day - day) / SCORE_HALF_LIFE_DAYS), score_day
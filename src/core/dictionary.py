@@ -2,28 +2,162 @@
 メイン辞書クラス
 """
 
+import atexit
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
+import weakref
 from pathlib import Path
-from typing import List, Optional, Dict
-from .word import WordEntry, Word, PartOfSpeech, WordSource
+from typing import List, Optional, Dict, Iterable, TYPE_CHECKING
+import math
+from .word import WordEntry, Word, PartOfSpeech, WordSource, WordRecord
 from .storage import DictStorage
-import fugashi
+from .sharding import ShardedDictStorage
+from .matcher import DictMatcher
+
+if TYPE_CHECKING:
+    import fugashi
+
+# 読み推定結果をメモリに保持する最大件数
+READING_CACHE_SIZE = 100_000
+
+# 単語の検索結果をメモリに保持する最大件数
+LOOKUP_CACHE_SIZE = 100_000
+
+# 書き込みバッファがこの件数に達したら書き込む
+WRITE_BUFFER_SIZE = 10_000
+
+# 1回のタガー呼び出しで解析する表層形の最小件数
+READING_BATCH_SIZE = 200
+
+# ワーカープロセスごとのタガー
+_worker_tagger = None
+
+# タガーが未初期化であることを表す値
+_UNLOADED = object()
+
+
+def _tagger_readings(tagger, surfaces: List[str]) -> Dict[str, str]:
+    """
+    複数の表層形の読みを推定
+
+    空白を含まない表層形は空白区切りで連結して1回で解析し、
+    形態素の文字数を数えて表層形ごとに読みを組み立てる。
+
+    Args:
+        tagger: fugashi.Tagger
+        surfaces: 表層形のリスト
+
+    Returns:
+        表層形と読み(カタカナ)の辞書
+    """
+    def reading_of(word) -> str:
+        # 読みがない場合は表層形をそのまま利用(英数字等)
+        return word.feature.kana or word.surface
+
+    batch = [surface for surface in surfaces if surface and not any(c.isspace() for c in surface)]
+    singles = [surface for surface in surfaces if not surface or any(c.isspace() for c in surface)]
+
+    readings = {}
+    if batch:
+        try:
+            tokens = iter(tagger(" ".join(batch)))
+            for surface in batch:
+                parts = []
+                consumed = 0
+                while consumed < len(surface):
+                    word = next(tokens)
+                    parts.append(reading_of(word))
+                    consumed += len(word.surface)
+                if consumed != len(surface):
+                    raise ValueError(surface)
+                readings[surface] = "".join(parts)
+        except (StopIteration, ValueError):
+            # 形態素境界が表層形の境界と一致しない場合は1語ずつ解析する
+            readings = {}
+            singles = surfaces
+
+    for surface in singles:
+        readings[surface] = "".join(reading_of(word) for word in tagger(surface))
+
+    return readings
+
+
+def _init_reading_worker():
+    """ワーカープロセスでタガーを1回だけ初期化"""
+    import fugashi
+
+    global _worker_tagger
+    _worker_tagger = fugashi.Tagger()
+
+
+def _read_batch(surfaces: List[str]) -> Dict[str, str]:
+    """ワーカープロセスで読みを推定"""
+    return _tagger_readings(_worker_tagger, surfaces)
+
+
+def _flush_at_exit(ref: "weakref.ref"):
+    """プロセス終了時に書き込みバッファの残りを書き込む"""
+    neodict = ref()
+    if neodict is not None:
+        neodict.flush()
 
 
 class NeoDict:
     """NeoDict メイン辞書クラス"""
 
-    def __init__(self, db_path: str = "~/.neodict/dict.db"):
+    def __init__(self, db_path: str = "~/.neodict/dict.db", shards: int = 1, read_only: bool = False):
         """
         辞書を初期化
 
         Args:
             db_path: データベースファイルのパス
+            shards: 2以上なら表層形のハッシュでこの数のファイルに分割する
+            read_only: ストレージの接続を読み込み専用にするか
         """
-        self.storage = DictStorage(db_path)
-        try:
-            self.tagger = fugashi.Tagger()
-        except Exception:
-            self.tagger = None
+        if shards > 1:
+            self.storage = ShardedDictStorage(db_path, num_shards=shards, read_only=read_only)
+        else:
+            self.storage = DictStorage(db_path, read_only=read_only)
+
+        # UniDicの読み込みは重いため、最初に読みを推定するときまで遅らせる
+        self._tagger = _UNLOADED
+
+        self._reading_cache: "OrderedDict[str, str]" = OrderedDict()
+
+        # 表層形ごとの単語情報(存在しない語はNone)。辞書の世代が変わったら捨てる
+        self._lookup_cache: "OrderedDict[str, Optional[Dict]]" = OrderedDict()
+        self._lookup_generation: Optional[int] = None
+        self._lookup_lock = threading.Lock()
+
+        # 生テキスト照合用のオートマトン(初回の照合時に構築、辞書が変わったら作り直す)
+        self._matcher: Optional[DictMatcher] = None
+        self._matcher_generation: Optional[int] = None
+
+        # add_word の書き込みバッファ(batch() / enable_write_buffer() の間だけ使う)
+        self._write_buffer: Optional["OrderedDict[str, WordEntry]"] = None
+        self._buffer_lock = threading.RLock()
+        self._buffer_max_items = WRITE_BUFFER_SIZE
+        self._buffer_max_delay: Optional[float] = None
+        self._flush_timer: Optional[threading.Timer] = None
+        self._atexit_registered = False
+
+    @property
+    def tagger(self) -> Optional["fugashi.Tagger"]:
+        """形態素解析器(初回アクセス時に初期化、利用できない場合はNone)"""
+        if self._tagger is _UNLOADED:
+            try:
+                # MeCab辞書の読み込みは重いため、読みを推定するときまで遅らせる
+                import fugashi
+
+                self._tagger = fugashi.Tagger()
+            except Exception:
+                self._tagger = None
+        return self._tagger
+
+    @tagger.setter
+    def tagger(self, tagger: Optional["fugashi.Tagger"]):
+        self._tagger = tagger
 
     def add_word(
         self,
@@ -33,10 +167,12 @@ class NeoDict:
         source: str = "manual",
         category: Optional[str] = None,
         **kwargs
-    ) -> int:
+    ) -> Optional[int]:
         """
         単語を追加
 
+        書き込みバッファが有効な間はバッファに入れるだけで、flush() まで書き込まない。
+
         Args:
             surface: 表層形(単語そのもの)
             pos: 品詞
@@ -46,20 +182,134 @@ class NeoDict:
             **kwargs: その他のオプション
 
         Returns:
-            追加された単語のID
+            追加された単語のID(バッファに入れた場合はNone)
+        """
+        entry = self.make_entry(surface, pos=pos, reading=reading, source=source, category=category, **kwargs)
+
+        if self._write_buffer is not None:
+            self._buffer_entry(entry)
+            return None
+
+        self._lookup_cache.pop(surface, None)
+        self._matcher = None
+        return self.storage.add_word(entry)
+
+    @contextmanager
+    def batch(self, max_items: int = WRITE_BUFFER_SIZE, max_delay: Optional[float] = None):
+        """
+        ブロック内の add_word をバッファにためて、まとめて書き込む
+
+        同じ表層形は頻度を合算して1件にし、ブロックを抜けるとき(例外でも)に
+        1トランザクションで書き込む。入れ子にした場合は外側のブロックでまとめる。
+        バッファ中の語は書き込むまで get_word / search に現れない。
+
+        Args:
+            max_items: この件数たまったら途中でも書き込む
+            max_delay: 最初にためてからこの秒数で書き込む(Noneなら時間では書き込まない)
         """
-        word = Word(surface=surface, reading=reading)
+        if self._write_buffer is not None:
+            yield self
+            return
+
+        self.enable_write_buffer(max_items=max_items, max_delay=max_delay)
+        try:
+            yield self
+        finally:
+            self.disable_write_buffer()
+
+    def enable_write_buffer(self, max_items: int = WRITE_BUFFER_SIZE, max_delay: Optional[float] = None):
+        """
+        add_word の書き込みバッファを有効にする
+
+        無効にするか close() するまで有効。書き込まれていない語はプロセス終了時にも書き込む。
 
-        entry = WordEntry(
-            word=word,
+        Args:
+            max_items: この件数たまったら書き込む
+            max_delay: 最初にためてからこの秒数で書き込む(Noneなら時間では書き込まない)
+        """
+        with self._buffer_lock:
+            if self._write_buffer is None:
+                self._write_buffer = OrderedDict()
+            self._buffer_max_items = max_items
+            self._buffer_max_delay = max_delay
+
+        if not self._atexit_registered:
+            atexit.register(_flush_at_exit, weakref.ref(self))
+            self._atexit_registered = True
+
+    def disable_write_buffer(self):
+        """バッファの内容を書き込み、書き込みバッファを無効にする"""
+        with self._buffer_lock:
+            self.flush()
+            self._write_buffer = None
+
+    def _buffer_entry(self, entry: WordEntry):
+        with self._buffer_lock:
+            buffer = self._write_buffer
+            surface = entry.word.surface
+
+            previous = buffer.pop(surface, None)
+            if previous is not None:
+                entry.frequency += previous.frequency
+                if entry.word.reading is None:
+                    entry.word = previous.word
+            buffer[surface] = entry
+
+            if len(buffer) >= self._buffer_max_items:
+                self.flush()
+            elif self._flush_timer is None and self._buffer_max_delay is not None:
+                self._flush_timer = threading.Timer(self._buffer_max_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> int:
+        """
+        書き込みバッファの内容を1トランザクションで書き込む
+
+        Returns:
+            書き込んだ語数
+        """
+        with self._buffer_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            if not self._write_buffer:
+                return 0
+
+            entries = list(self._write_buffer.values())
+            self._write_buffer.clear()
+            self.add_entries(entries)
+            return len(entries)
+
+    def close(self):
+        """書き込みバッファを書き込み、このスレッドの接続を閉じる"""
+        self.disable_write_buffer()
+        self.storage.close()
+
+    @staticmethod
+    def make_entry(
+        surface: str,
+        pos: str = "名詞",
+        reading: Optional[str] = None,
+        source: str = "manual",
+        category: Optional[str] = None,
+        **kwargs
+    ) -> WordEntry:
+        """
+        add_word と同じ引数から WordEntry を作成
+
+        Raises:
+            ValueError: 品詞・収集元が不正な場合
+        """
+        return WordEntry(
+            word=Word(surface=surface, reading=reading),
             pos=PartOfSpeech(pos),
             source=WordSource(source),
             category=category,
             frequency=kwargs.get("frequency", 0)
         )
 
-        return self.storage.add_word(entry)
-
     def suggest_reading(self, surface: str) -> Optional[str]:
         """
         単語の読みを推定
@@ -70,20 +320,76 @@ class NeoDict:
         Returns:
             推定された読み(カタカナ)
         """
-        if not self.tagger:
-            return None
+        return self.suggest_readings([surface]).get(surface)
+
+    def suggest_readings(self, surfaces: Iterable[str], workers: int = 1) -> Dict[str, Optional[str]]:
+        """
+        複数の単語の読みを一括推定
 
-        words = []
-        for word in self.tagger(surface):
-            # UniDic形式を想定 (2番目のフィールドが読み)
-            # 生データにアクセスするには word.feature
-            if word.feature.kana:
-                words.append(word.feature.kana)
+        メモリキャッシュ、SQLiteの読みキャッシュの順に参照し、
+        残りをまとめてタガーで解析する。workers が2以上の場合は
+        ワーカープロセスごとに数回のタガー呼び出しで処理する。
+
+        Args:
+            surfaces: 表層形
+            workers: 解析に使うプロセス数
+
+        Returns:
+            表層形と推定された読み(カタカナ)の辞書
+        """
+        results = {}
+        pending = []
+
+        for surface in dict.fromkeys(surfaces):
+            if surface in self._reading_cache:
+                self._reading_cache.move_to_end(surface)
+                results[surface] = self._reading_cache[surface]
             else:
-                # 読みがない場合は表層形をそのまま利用(英数字等)
-                words.append(word.surface)
+                pending.append(surface)
+
+        if not pending:
+            return results
+
+        found = self.storage.get_cached_readings(pending)
+        pending = [surface for surface in pending if surface not in found]
+
+        if pending and self.tagger:
+            computed = self._tag_readings(pending, workers)
+            self.storage.set_cached_readings(computed)
+            found.update(computed)
+        else:
+            results.update((surface, None) for surface in pending)
+
+        results.update(found)
+        self._remember_readings(found)
+        return results
 
-        return "".join(words)
+    def _tag_readings(self, surfaces: List[str], workers: int) -> Dict[str, str]:
+        """タガーで読みを推定(必要に応じてプロセスを分ける)"""
+        chunk_size = max(READING_BATCH_SIZE, math.ceil(len(surfaces) / (max(workers, 1) * 4)))
+        chunks = [surfaces[i:i + chunk_size] for i in range(0, len(surfaces), chunk_size)]
+
+        readings = {}
+        if workers > 1 and len(chunks) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_reading_worker) as pool:
+                for result in pool.map(_read_batch, chunks):
+                    readings.update(result)
+        else:
+            for chunk in chunks:
+                readings.update(_tagger_readings(self.tagger, chunk))
+
+        return readings
+
+    def _remember_readings(self, readings: Dict[str, str]):
+        """読みをメモリキャッシュに保持(古いものから追い出す)"""
+        for surface, reading in readings.items():
+            self._reading_cache[surface] = reading
+            self._reading_cache.move_to_end(surface)
+
+        while len(self._reading_cache) > READING_CACHE_SIZE:
+            self._reading_cache.popitem(last=False)
 
     def search(self, query: str, fuzzy: bool = False, limit: int = 100) -> List[Dict]:
         """
@@ -110,8 +416,145 @@ class NeoDict:
         Returns:
             単語情報(存在しない場合はNone)
         """
-        entry = self.storage.get_word(surface)
-        return entry.to_dict() if entry else None
+        return self.get_words([surface]).get(surface)
+
+    def get_words(self, surfaces: Iterable[str]) -> Dict[str, Dict]:
+        """
+        複数の単語をまとめて取得
+
+        メモリ上のキャッシュにない語だけを1回の問い合わせで読む。
+        キャッシュは辞書の世代(更新の公開)が変わると捨てる。
+
+        Args:
+            surfaces: 表層形
+
+        Returns:
+            表層形と単語情報の辞書(存在しない語は含まない)
+        """
+        generation = self.storage.get_generation()
+        cache = self._lookup_cache
+        results = {}
+        misses = []
+
+        with self._lookup_lock:
+            if generation != self._lookup_generation:
+                cache.clear()
+                self._lookup_generation = generation
+
+            for surface in surfaces:
+                if surface in cache:
+                    cache.move_to_end(surface)
+                    if cache[surface] is not None:
+                        results[surface] = dict(cache[surface])
+                else:
+                    misses.append(surface)
+
+        if misses:
+            entries = self.storage.get_words(misses)
+            found = {surface: entry.to_dict() for surface, entry in entries.items()}
+
+            with self._lookup_lock:
+                if generation == self._lookup_generation:
+                    for surface in misses:
+                        cache[surface] = found.get(surface)
+                    while len(cache) > LOOKUP_CACHE_SIZE:
+                        cache.popitem(last=False)
+
+            for surface, data in found.items():
+                results[surface] = dict(data)
+
+        return results
+
+    def search_prefix(self, prefix: str, limit: int = 100) -> List[Dict]:
+        """
+        前方一致で単語を検索
+
+        Args:
+            prefix: 表層形の先頭
+            limit: 最大結果数
+
+        Returns:
+            表層形の順の単語情報のリスト
+        """
+        return [entry.to_dict() for entry in self.storage.search_prefix(prefix, limit=limit)]
+
+    @property
+    def matcher(self) -> DictMatcher:
+        """
+        辞書の全表層形から作った照合器
+
+        辞書の世代が変わったか、このインスタンスで語を追加・削除した後は作り直す。
+        プロセスプールで使う場合は DictMatcher.segment_many に任せる。
+        """
+        generation = self.storage.get_generation()
+        if self._matcher is None or generation != self._matcher_generation:
+            self._matcher = DictMatcher(self.storage.iter_surfaces())
+            self._matcher_generation = generation
+        return self._matcher
+
+    def find_all(self, text: str, with_entries: bool = True) -> List[Dict]:
+        """
+        テキスト中に現れる辞書の語を全て取得(重なりを含む)
+
+        Args:
+            text: 対象テキスト
+            with_entries: 各出現に単語情報を付けるか
+
+        Returns:
+            start/end/surface(と entry)を持つ辞書のリスト(開始位置順)
+        """
+        spans = [
+            {"start": start, "end": end, "surface": surface}
+            for start, end, surface in self.matcher.find_all(text)
+        ]
+        if with_entries:
+            self._attach_entries(spans)
+        return spans
+
+    def segment(self, text: str, with_entries: bool = True) -> List[Dict]:
+        """
+        テキストを辞書の語で左から最長一致に分割
+
+        Args:
+            text: 対象テキスト
+            with_entries: 辞書の語に単語情報を付けるか
+
+        Returns:
+            start/end/surface/known(と entry)を持つ辞書のリスト。
+            辞書にない部分は known=False の1区間にまとめる
+        """
+        spans = [
+            {"start": start, "end": end, "surface": text[start:end], "known": known}
+            for start, end, known in self.matcher.segment(text)
+        ]
+        if with_entries:
+            self._attach_entries([span for span in spans if span["known"]])
+            for span in spans:
+                span.setdefault("entry", None)
+        return spans
+
+    def _attach_entries(self, spans: List[Dict]):
+        entries = self.get_words(span["surface"] for span in spans)
+        for span in spans:
+            span["entry"] = entries.get(span["surface"])
+
+    def get_trending(self, days: int = 7, limit: int = 50) -> List[Dict]:
+        """
+        直近で出現回数の多い単語を取得
+
+        Args:
+            days: 集計する日数
+            limit: 最大結果数
+
+        Returns:
+            単語情報のリスト(recent_frequency に期間内の出現回数を含む)
+        """
+        results = []
+        for entry, recent_count in self.storage.get_trending(days=days, limit=limit):
+            data = entry.to_dict()
+            data["recent_frequency"] = recent_count
+            results.append(data)
+        return results
 
     def remove_word(self, surface: str) -> int:
         """
@@ -123,8 +566,24 @@ class NeoDict:
         Returns:
             削除された行数
         """
+        with self._buffer_lock:
+            if self._write_buffer:
+                self._write_buffer.pop(surface, None)
+
+        self._lookup_cache.pop(surface, None)
+        self._matcher = None
         return self.storage.delete_word(surface)
 
+    @property
+    def generation(self) -> int:
+        """
+        辞書の世代
+
+        更新が公開されるたびに増える。長時間動くプロセスは値の変化で
+        他プロセスによる更新を検出できる(接続は操作ごとに開くため開き直しは不要)。
+        """
+        return self.storage.get_generation()
+
     def get_stats(self) -> Dict:
         """
         辞書の統計情報を取得
@@ -134,26 +593,69 @@ class NeoDict:
         """
         return self.storage.get_stats()
 
-    def export_mecab(self, output_path: str):
+    def get_versions(self, limit: int = 10) -> List[Dict]:
+        """
+        確定済みの版を新しい順に取得
+
+        Args:
+            limit: 最大取得数
+
+        Returns:
+            版情報の辞書のリスト
+        """
+        return self.storage.get_versions(limit)
+
+    def diff_versions(self, from_version: int, to_version: Optional[int] = None) -> Dict[str, List[str]]:
+        """
+        2つの版の差分を取得
+
+        Args:
+            from_version: 比較元の版ID
+            to_version: 比較先の版ID(Noneなら現在)
+
+        Returns:
+            added/removed/changed の表層形のリスト
+        """
+        return self.storage.diff_versions(from_version, to_version)
+
+    def rollback(self, version: int) -> Dict[str, int]:
+        """
+        辞書を指定した版の状態に戻す
+
+        Args:
+            version: 戻す先の版ID
+
+        Returns:
+            追加・削除・変更した語数
+        """
+        return self.storage.rollback_to(version)
+
+    def _iter_export_records(self, version: Optional[int]) -> Iterable[WordRecord]:
+        if version is None:
+            return self.storage.iter_records()
+        return self.storage.iter_records_at(version)
+
+    def export_mecab(self, output_path: str, version: Optional[int] = None):
         """
         MeCab形式で辞書をエクスポート
 
         Args:
             output_path: 出力先ディレクトリ
+            version: 出力する版ID(Noneなら現在の内容)
         """
         output_dir = Path(output_path)
         output_dir.mkdir(parents=True, exist_ok=True)
 
         csv_path = output_dir / "neodict.csv"
 
-        entries = self.storage.get_all_words()
-
+        count = 0
         with open(csv_path, "w", encoding="utf-8") as f:
-            for entry in entries:
-                f.write(entry.to_mecab_csv() + "\n")
+            for record in self._iter_export_records(version):
+                f.write(record.to_mecab_csv() + "\n")
+                count += 1
 
         print(f"MeCab辞書を出力しました: {csv_path}")
-        print(f"総単語数: {len(entries)}")
+        print(f"総単語数: {count}")
 
     def export_json(self, output_path: str):
         """
@@ -164,58 +666,60 @@ class NeoDict:
         """
         import json
 
-        entries = self.storage.get_all_words()
+        records = self.storage.get_all_records()
         data = {
             "version": "0.1.0",
-            "word_count": len(entries),
-            "words": [entry.to_dict() for entry in entries]
+            "word_count": len(records),
+            "words": [record.to_dict() for record in records]
         }
 
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
         print(f"JSON辞書を出力しました: {output_path}")
-        print(f"総単語数: {len(entries)}")
+        print(f"総単語数: {len(records)}")
 
-    def export_sudachi(self, output_path: str):
+    def export_sudachi(self, output_path: str, version: Optional[int] = None):
         """
         Sudachi形式で辞書をエクスポート
 
         Args:
             output_path: 出力先ディレクトリ
+            version: 出力する版ID(Noneなら現在の内容)
         """
         output_dir = Path(output_path)
         output_dir.mkdir(parents=True, exist_ok=True)
 
         csv_path = output_dir / "neodict_sudachi.csv"
-        entries = self.storage.get_all_words()
-
+        count = 0
         with open(csv_path, "w", encoding="utf-8") as f:
-            for entry in entries:
-                f.write(entry.to_sudachi_csv() + "\n")
+            for record in self._iter_export_records(version):
+                f.write(record.to_sudachi_csv() + "\n")
+                count += 1
 
         print(f"Sudachi辞書を出力しました: {csv_path}")
-        print(f"総単語数: {len(entries)}")
+        print(f"総単語数: {count}")
 
-    def export_janome(self, output_path: str):
+    def export_janome(self, output_path: str, version: Optional[int] = None):
         """
         Janome形式で辞書をエクスポート
 
         Args:
             output_path: 出力先ディレクトリ
+            version: 出力する版ID(Noneなら現在の内容)
         """
         output_dir = Path(output_path)
         output_dir.mkdir(parents=True, exist_ok=True)
 
         csv_path = output_dir / "neodict_janome.csv"
-        entries = self.storage.get_all_words()
-
+        count = 0
         with open(csv_path, "w", encoding="utf-8") as f:
-            for entry in entries:
-                f.write(entry.to_janome_csv() + "\n")
+            for record in self._iter_export_records(version):
+                f.write(record.to_janome_csv() + "\n")
+                count += 1
 
         print(f"Janome辞書を出力しました: {csv_path}")
-        print(f"総単語数: {len(entries)}")
+        print(f"総単語数: {count}")
 
     def import_words(self, entries: List[WordEntry]) -> int:
         """
@@ -227,9 +731,23 @@ class NeoDict:
         Returns:
             インポートした単語数
         """
-        count = 0
-        for entry in entries:
-            self.storage.add_word(entry)
-            count += 1
+        return len(self.add_entries(entries))
+
+    def add_entries(self, entries: List[WordEntry]) -> List[int]:
+        """
+        複数の WordEntry を1トランザクションで追加(既存の語は上書き)
+
+        Args:
+            entries: WordEntryのリスト
 
-        return count
+        Returns:
+            単語IDのリスト(entries と同じ順)
+        """
+        with self.storage.transaction():
+            ids = [self.storage.add_word(entry) for entry in entries]
+
+        with self._lookup_lock:
+            for entry in entries:
+                self._lookup_cache.pop(entry.word.surface, None)
+        self._matcher = None
+        return ids
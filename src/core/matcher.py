@@ -0,0 +1,212 @@
+"""
+辞書の表層形による生テキストの照合
+
+Aho-Corasick オートマトンで、テキストを1回走査するだけで辞書中の全ての
+表層形の出現位置を求める。MeCab辞書をコンパイルせずに新語を実テキストへ適用できる。
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 遷移表のキー(状態番号 << CHAR_BITS | 文字コード)
+CHAR_BITS = 21
+
+# ワーカープロセスごとの照合器
+_worker_matcher = None
+
+
+class DictMatcher:
+    """
+    表層形の集合に対する Aho-Corasick オートマトン
+
+    遷移表は (状態, 文字) を1つの整数キーにした辞書で持ち、状態ごとの辞書を作らない。
+    プロセスプールに渡せるよう、属性は全て組み込み型にしている。
+    """
+
+    def __init__(self, surfaces: Iterable[str] = ()):
+        """
+        初期化
+
+        Args:
+            surfaces: 照合する表層形
+        """
+        self._goto: Dict[int, int] = {}
+        self._depth: List[int] = [0]
+        self._terminal: List[bool] = [False]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [0]
+        self.size = 0
+
+        children: List[List[int]] = [[]]
+        for surface in surfaces:
+            if surface:
+                self._insert(surface, children)
+        self._build_links(children)
+
+    def _insert(self, surface: str, children: List[List[int]]):
+        goto = self._goto
+        state = 0
+        for char in surface:
+            key = (state << CHAR_BITS) | ord(char)
+            next_state = goto.get(key)
+            if next_state is None:
+                next_state = len(self._depth)
+                goto[key] = next_state
+                self._depth.append(self._depth[state] + 1)
+                self._terminal.append(False)
+                children.append([])
+                children[state].append(key)
+            state = next_state
+
+        if not self._terminal[state]:
+            self._terminal[state] = True
+            self.size += 1
+
+    def _build_links(self, children: List[List[int]]):
+        """失敗遷移と、失敗遷移をたどった先で最初に見つかる語の状態(出力リンク)を幅優先で求める"""
+        goto = self._goto
+        count = len(self._depth)
+        fail = [0] * count
+        output = [0] * count
+        mask = (1 << CHAR_BITS) - 1
+
+        queue = [goto[key] for key in children[0]]
+        for state in queue:
+            for key in children[state]:
+                char = key & mask
+                child = goto[key]
+
+                link = fail[state]
+                while True:
+                    target = goto.get((link << CHAR_BITS) | char)
+                    if target is not None:
+                        fail[child] = target
+                        break
+                    if link == 0:
+                        break
+                    link = fail[link]
+
+                target = fail[child]
+                output[child] = target if self._terminal[target] else output[target]
+                queue.append(child)
+
+        self._fail = fail
+        self._output = output
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        テキスト中の全ての出現を (開始位置, 終了位置) で返す
+
+        終了位置の昇順、同じ終了位置では長い語から返す。
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        terminal = self._terminal
+        depth = self._depth
+
+        state = 0
+        for end, char in enumerate(text, 1):
+            code = ord(char)
+            while True:
+                next_state = goto.get((state << CHAR_BITS) | code)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+
+            found = state if terminal[state] else output[state]
+            while found:
+                yield end - depth[found], end
+                found = output[found]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        テキスト中の全ての出現を取得(重なりを含む)
+
+        Args:
+            text: 対象テキスト
+
+        Returns:
+            (開始位置, 終了位置, 表層形) のリスト(開始位置順)
+        """
+        matches = [(start, end, text[start:end]) for start, end in self.iter_matches(text)]
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        return matches
+
+    def segment(self, text: str) -> List[Tuple[int, int, bool]]:
+        """
+        テキストを左から最長一致で分割
+
+        辞書にない文字が続く部分は1つの区間にまとめる。
+
+        Args:
+            text: 対象テキスト
+
+        Returns:
+            (開始位置, 終了位置, 辞書の語か) のリスト
+        """
+        longest: Dict[int, int] = {}
+        for start, end in self.iter_matches(text):
+            if end > longest.get(start, 0):
+                longest[start] = end
+
+        spans = []
+        position = 0
+        unknown_start: Optional[int] = None
+        while position < len(text):
+            end = longest.get(position)
+            if end is None:
+                if unknown_start is None:
+                    unknown_start = position
+                position += 1
+                continue
+
+            if unknown_start is not None:
+                spans.append((unknown_start, position, False))
+                unknown_start = None
+            spans.append((position, end, True))
+            position = end
+
+        if unknown_start is not None:
+            spans.append((unknown_start, len(text), False))
+        return spans
+
+    def segment_many(self, texts: Iterable[str], workers: int = 1, chunksize: int = 64) -> Iterator:
+        """
+        複数のテキストを分割
+
+        Args:
+            texts: 対象テキスト
+            workers: 2以上ならこの数のプロセスで並列に分割する
+            chunksize: 1回にワーカーへ渡すテキスト数
+
+        Yields:
+            テキストごとの segment() の結果(入力順)
+        """
+        if workers <= 1:
+            for text in texts:
+                yield self.segment(text)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_matcher_worker, initargs=(self,)
+        ) as pool:
+            yield from pool.map(_segment_in_worker, texts, chunksize=chunksize)
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def _init_matcher_worker(matcher: DictMatcher):
+    """ワーカープロセスに照合器を1回だけ渡す"""
+    global _worker_matcher
+    _worker_matcher = matcher
+
+
+def _segment_in_worker(text: str) -> List[Tuple[int, int, bool]]:
+    """ワーカープロセスでテキストを分割"""
+    return _worker_matcher.segment(text)
@@ -0,0 +1,463 @@
+"""
+表層形のハッシュで複数のSQLiteファイルに分割するストレージ
+
+書き込みは表層形のシャードにだけ振り分けるため、複数の更新プロセスが
+別々のシャードを同時に書き込める。検索・全件取得は全シャードに問い合わせて
+頻度順にマージする。
+"""
+
+import heapq
+import queue
+import threading
+import zlib
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import date
+
+from .word import WordEntry, WordRecord
+from .storage import DictStorage
+
+# エクスポート時に各シャードの読み込みスレッドが先読みするバッチ数
+PREFETCH_BATCHES = 4
+
+_DONE = object()
+
+
+def _prefetched(produce: Callable[[], Iterable], batch_size: int) -> Iterator:
+    """
+    別スレッドで produce() を読み進め、batch_size 件ずつ受け渡すイテレーター
+
+    途中で読むのをやめた場合も、読み込みスレッドは次のバッチで停止する。
+    """
+    batches: "queue.Queue" = queue.Queue(maxsize=PREFETCH_BATCHES)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            batch = []
+            for item in produce():
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = batches.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+    finally:
+        stop.set()
+
+
+class ShardedDictStorage:
+    """
+    表層形のCRC32で num_shards 個の DictStorage に分割したストレージ
+
+    DictStorage と同じ名前の操作を提供する。版(begin_version/commit_version)は
+    シャードごとに記録され、版の時点のエクスポート・差分・巻き戻しは提供しない。
+    ウォーターマークはシャードとは別のDB(dict.meta.db など)に保存する。
+    シャード数は作成後に変えられない。
+    """
+
+    def __init__(self, db_path: str = "~/.neodict/dict.db", num_shards: int = 4, read_only: bool = False):
+        """
+        初期化
+
+        Args:
+            db_path: 基準のパス(dict.db なら dict.shard00of04.db などを作る)
+            num_shards: シャード数
+            read_only: 各シャードの接続を読み込み専用にするか
+        """
+        if num_shards < 1:
+            raise ValueError("num_shards must be positive")
+
+        self.db_path = Path(db_path).expanduser()
+        self.num_shards = num_shards
+        self.shards = [
+            DictStorage(self.shard_path(self.db_path, index, num_shards), read_only=read_only)
+            for index in range(num_shards)
+        ]
+        # ウォーターマークはシャードの書き込みロックと分けて別のDBに保存する
+        self.meta = DictStorage(self.meta_path(self.db_path), read_only=read_only)
+        self._local = threading.local()
+
+        if not read_only:
+            self._migrate_watermarks()
+
+    @staticmethod
+    def shard_path(db_path: Path, index: int, num_shards: int) -> Path:
+        """シャードのファイルパス"""
+        return db_path.with_name(f"{db_path.stem}.shard{index:02d}of{num_shards:02d}{db_path.suffix}")
+
+    @staticmethod
+    def meta_path(db_path: Path) -> Path:
+        """シャードに属さないデータ(ウォーターマーク)を保存するファイルのパス"""
+        return db_path.with_name(f"{db_path.stem}.meta{db_path.suffix}")
+
+    def _migrate_watermarks(self):
+        """先頭のシャードに保存していたウォーターマークをメタデータのDBに移す"""
+        legacy = self.shards[0].get_watermarks()
+        if legacy:
+            if not self.meta.get_watermarks():
+                self.meta.set_watermarks(legacy)
+            self.shards[0].clear_watermarks()
+
+    def shard_index(self, surface: str) -> int:
+        """表層形が属するシャードの番号"""
+        return zlib.crc32(surface.encode("utf-8")) % self.num_shards
+
+    def shard(self, index: int) -> DictStorage:
+        """
+        シャードを取得
+
+        transaction() の中では、初めて触れたシャードの書き込みトランザクションを
+        開始し(開始中の版があればそのシャードでも版を開く)、ブロックの終わりにコミットする。
+        """
+        shard = self.shards[index]
+
+        stack = getattr(self._local, "stack", None)
+        if stack is not None and index not in self._local.entered:
+            self._local.entered.add(index)
+            stack.enter_context(shard.transaction())
+
+            pending = self._local.pending_version
+            if pending is not None:
+                description, version = pending
+                version[index] = shard.begin_version(description)
+
+        return shard
+
+    def _route(self, surface: str) -> DictStorage:
+        return self.shard(self.shard_index(surface))
+
+    def partition(self, surfaces: Iterable[str]) -> Dict[int, List[str]]:
+        """表層形をシャード番号ごとに分ける"""
+        parts: Dict[int, List[str]] = {}
+        for surface in surfaces:
+            parts.setdefault(self.shard_index(surface), []).append(surface)
+        return parts
+
+    def _partition_dict(self, mapping: Dict) -> Dict[int, Dict]:
+        parts: Dict[int, Dict] = {}
+        for surface, value in mapping.items():
+            parts.setdefault(self.shard_index(surface), {})[surface] = value
+        return parts
+
+    @contextmanager
+    def transaction(self):
+        """
+        ブロック内の書き込みを、触れたシャードごとのトランザクションにまとめる
+
+        書き込みロックは実際に書き込んだシャードにだけ取るため、別のシャードを
+        書き込む他のプロセスを待たせない。コミットはシャードごとに行う
+        (シャードをまたいだ原子性はない)。ブロック内で保存したウォーターマークは
+        全シャードのコミット後にメタデータのDBへ書く。
+        """
+        if getattr(self._local, "stack", None) is not None:
+            yield self
+            return
+
+        with ExitStack() as stack:
+            self._local.stack = stack
+            self._local.entered = set()
+            self._local.pending_version = None
+            self._local.pending_watermarks = {}
+            try:
+                yield self
+            finally:
+                self._local.stack = None
+                self._local.pending_version = None
+                watermarks, self._local.pending_watermarks = self._local.pending_watermarks, None
+
+        if watermarks:
+            self.meta.set_watermarks(watermarks)
+
+    # --- 振り分ける操作 ---
+
+    def add_word(self, entry: WordEntry) -> int:
+        """単語を追加"""
+        return self._route(entry.word.surface).add_word(entry)
+
+    def update_word(self, entry: WordEntry) -> int:
+        """単語を更新"""
+        return self._route(entry.word.surface).update_word(entry)
+
+    def get_word(self, surface: str) -> Optional[WordEntry]:
+        """単語を取得"""
+        return self.shards[self.shard_index(surface)].get_word(surface)
+
+    def get_words(self, surfaces: Iterable[str]) -> Dict[str, WordEntry]:
+        """複数の単語をまとめて取得(シャードごとに1回問い合わせる)"""
+        entries = {}
+        for index, part in self.partition(surfaces).items():
+            entries.update(self.shards[index].get_words(part))
+        return entries
+
+    def delete_word(self, surface: str) -> int:
+        """単語を削除"""
+        return self._route(surface).delete_word(surface)
+
+    def record_frequency(self, counts: Dict[str, int], day: Optional[date] = None) -> int:
+        """出現回数を既存の単語に加算"""
+        return sum(
+            self.shard(index).record_frequency(part, day=day)
+            for index, part in self._partition_dict(counts).items()
+        )
+
+    def get_surfaces_without_reading(self, surfaces: Iterable[str]) -> List[str]:
+        """読みが未設定の表層形を取得"""
+        missing = []
+        for index, part in self.partition(surfaces).items():
+            missing.extend(self.shards[index].get_surfaces_without_reading(part))
+        return missing
+
+    def set_readings(self, readings: Dict[str, str]) -> int:
+        """読みが未設定の単語に読みを一括設定"""
+        return sum(
+            self.shard(index).set_readings(part)
+            for index, part in self._partition_dict(readings).items()
+        )
+
+    def get_cached_readings(self, surfaces: Iterable[str]) -> Dict[str, Optional[str]]:
+        """読み推定キャッシュを取得"""
+        cached = {}
+        for index, part in self.partition(surfaces).items():
+            cached.update(self.shards[index].get_cached_readings(part))
+        return cached
+
+    def set_cached_readings(self, readings: Dict[str, Optional[str]]):
+        """読み推定キャッシュを保存"""
+        for index, part in self._partition_dict(readings).items():
+            self.shards[index].set_cached_readings(part)
+
+    def close(self):
+        """このスレッドで開いたままの接続を閉じる"""
+        for shard in self.shards:
+            shard.close()
+        self.meta.close()
+
+    # --- 全シャードに問い合わせる操作 ---
+
+    def search_words(self, query: str, fuzzy: bool = False, limit: int = 100) -> List[WordEntry]:
+        """単語を検索(頻度の高い順)"""
+        results = []
+        for shard in self.shards:
+            results.extend(shard.search_words(query, fuzzy=fuzzy, limit=limit))
+        return heapq.nlargest(limit, results, key=lambda entry: entry.frequency)
+
+    def search_prefix(self, prefix: str, limit: int = 100) -> List[WordEntry]:
+        """前方一致で単語を検索(表層形の順)"""
+        merged = heapq.merge(
+            *(shard.search_prefix(prefix, limit) for shard in self.shards),
+            key=lambda entry: entry.word.surface
+        )
+        return list(islice(merged, limit))
+
+    def get_all_words(self, limit: Optional[int] = None) -> List[WordEntry]:
+        """全単語を頻度の高い順に取得"""
+        merged = heapq.merge(
+            *(shard.get_all_words(limit) for shard in self.shards),
+            key=lambda entry: entry.frequency, reverse=True
+        )
+        return list(islice(merged, limit))
+
+    def iter_records(self, batch_size: int = 10000) -> Iterable[WordRecord]:
+        """
+        全単語を頻度の高い順に WordRecord で順次取得
+
+        シャードごとのスレッドが並行して読み進め、頻度順にマージする。
+        """
+        streams = [
+            _prefetched(lambda shard=shard: shard.iter_records(batch_size), batch_size)
+            for shard in self.shards
+        ]
+        return heapq.merge(*streams, key=lambda record: record.frequency, reverse=True)
+
+    def iter_surfaces(self, batch_size: int = 10000) -> Iterable[str]:
+        """全単語の表層形を順次取得(シャード順)"""
+        for shard in self.shards:
+            yield from shard.iter_surfaces(batch_size)
+
+    def get_all_records(self, limit: Optional[int] = None) -> List[WordRecord]:
+        """全単語を WordRecord で頻度の高い順に取得"""
+        return list(islice(self.iter_records(), limit))
+
+    def get_trending(self, days: int = 7, limit: int = 50) -> List[Tuple[WordEntry, int]]:
+        """直近の出現回数が多い単語を取得"""
+        results = []
+        for shard in self.shards:
+            results.extend(shard.get_trending(days=days, limit=limit))
+        return heapq.nlargest(limit, results, key=lambda item: item[1])
+
+    def get_stats(self) -> Dict:
+        """統計情報を取得(シャードの集計表を合算)"""
+        total_words = 0
+        sources: Counter = Counter()
+        pos_distribution: Counter = Counter()
+        for shard in self.shards:
+            stats = shard.get_stats()
+            total_words += stats["total_words"]
+            sources.update(stats["sources"])
+            pos_distribution.update(stats["pos_distribution"])
+
+        return {
+            "total_words": total_words,
+            "unique_pos": len(pos_distribution),
+            "sources": dict(sources),
+            "pos_distribution": dict(pos_distribution.most_common())
+        }
+
+    def recompute_stats(self):
+        """全シャードの集計表を作り直す"""
+        for shard in self.shards:
+            shard.recompute_stats()
+
+    def purge_words(self, **kwargs) -> Dict:
+        """低頻度語・古い語を全シャードから削除(引数は DictStorage.purge_words と同じ)"""
+        totals: Counter = Counter()
+        for shard in self.shards:
+            totals.update(shard.purge_words(**kwargs))
+        return dict(totals)
+
+    def prune_word_counts(self, max_age_days: int) -> int:
+        """古い日単位バケットを全シャードから削除"""
+        return sum(shard.prune_word_counts(max_age_days) for shard in self.shards)
+
+    # --- 候補 ---
+
+    def upsert_candidates(self, candidates: Dict[str, Dict], day: Optional[date] = None) -> int:
+        """辞書にない語を候補として積み上げる"""
+        return sum(
+            self.shard(index).upsert_candidates(part, day=day)
+            for index, part in self._partition_dict(candidates).items()
+        )
+
+    def get_candidates(self, surfaces: Iterable[str]) -> Dict[str, Dict]:
+        """候補の積み上げた値を取得"""
+        found = {}
+        for index, part in self.partition(surfaces).items():
+            found.update(self.shards[index].get_candidates(part))
+        return found
+
+    def promote_candidates(
+        self,
+        min_count: int,
+        min_sources: int = 1,
+        limit: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """
+        しきい値を超えた候補を全シャードから取り出す(limit はシャードごと)
+
+        まだ書き込んでいないシャードは読み込みで候補の有無を確かめ、
+        取り出す候補があるシャードにだけ書き込みトランザクションを開く。
+        """
+        entered = getattr(self._local, "entered", None) or set()
+        promoted = {}
+        for index, shard in enumerate(self.shards):
+            if index in entered or shard.has_candidates(min_count, min_sources):
+                promoted.update(self.shard(index).promote_candidates(min_count, min_sources, limit))
+        return promoted
+
+    def evict_candidates(
+        self,
+        max_idle_days: Optional[int] = None,
+        max_candidates: Optional[int] = None,
+        batch_size: int = 1000,
+        day: Optional[date] = None
+    ) -> int:
+        """古い候補・上限を超えた分の候補を全シャードから削除(上限はシャード数で等分)"""
+        per_shard = None if max_candidates is None else -(-max_candidates // self.num_shards)
+        return sum(
+            shard.evict_candidates(max_idle_days, per_shard, batch_size, day)
+            for shard in self.shards
+        )
+
+    # --- 版 ---
+
+    def begin_version(self, description: Optional[str] = None) -> Dict[int, int]:
+        """
+        新しい版を開始
+
+        書き込んだシャードにだけ版を開く。
+
+        Returns:
+            シャード番号と版IDの辞書(commit_version に渡す)
+
+        Raises:
+            RuntimeError: transaction() の外で呼んだ場合
+        """
+        if getattr(self._local, "stack", None) is None:
+            raise RuntimeError("begin_version() must be called inside transaction()")
+
+        version: Dict[int, int] = {}
+        self._local.pending_version = (description, version)
+        for index in self._local.entered:
+            version[index] = self.shards[index].begin_version(description)
+        return version
+
+    def commit_version(self, version: Dict[int, int]) -> Dict[str, int]:
+        """版を確定し、全シャードの追加・削除・変更の語数を合算して返す"""
+        if getattr(self._local, "pending_version", None) is not None \
+                and self._local.pending_version[1] is version:
+            self._local.pending_version = None
+
+        totals: Counter = Counter({"add": 0, "remove": 0, "change": 0})
+        for index, version_id in version.items():
+            totals.update(self.shards[index].commit_version(version_id))
+        return dict(totals)
+
+    def get_versions(self, limit: int = 10) -> List[Dict]:
+        """確定済みの版を新しい順に取得(各要素に shard を含む)"""
+        versions = []
+        for index, shard in enumerate(self.shards):
+            for version in shard.get_versions(limit):
+                version["shard"] = index
+                versions.append(version)
+        versions.sort(key=lambda version: str(version["created_date"]), reverse=True)
+        return versions[:limit]
+
+    def get_generation(self) -> int:
+        """辞書の世代(シャードの世代の合計)"""
+        return sum(shard.get_generation() for shard in self.shards)
+
+    # --- ウォーターマーク(メタデータのDBに保存) ---
+
+    def get_watermarks(self) -> Dict[str, str]:
+        """差分更新用のウォーターマークを全て取得"""
+        return self.meta.get_watermarks()
+
+    def set_watermarks(self, watermarks: Dict[str, str]):
+        """ウォーターマークを保存(transaction() の中では全シャードのコミット後に保存する)"""
+        pending = getattr(self._local, "pending_watermarks", None)
+        if pending is not None:
+            pending.update(watermarks)
+        elif watermarks:
+            self.meta.set_watermarks(watermarks)
+
+    def clear_watermarks(self) -> int:
+        """ウォーターマークを全て削除"""
+        return self.meta.clear_watermarks()
@@ -4,25 +4,164 @@
 
 import sqlite3
 import json
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Dict
-from datetime import datetime
-from .word import WordEntry, Word, PartOfSpeech, WordSource
+from typing import List, Optional, Dict, Iterable, Tuple
+from datetime import datetime, timedelta, date
+import logging
+from .word import WordEntry, Word, PartOfSpeech, WordSource, WordRecord, POS_BY_VALUE, SOURCE_BY_VALUE
+from .decay import merge_score
+from metrics.profiling import instrument
 
+logger = logging.getLogger(__name__)
 
+# スキーマのバージョン(PRAGMA user_version に保存、テーブル構成を変えたら上げる)
+SCHEMA_VERSION = 6
+
+# IN句1回あたりのプレースホルダ数(SQLITE_MAX_VARIABLE_NUMBER の既定値以下)
+IN_CHUNK_SIZE = 500
+
+# アーカイブに退避する列
+ARCHIVE_COLUMNS = (
+    "id, surface, reading, pronunciation, pos, pos_detail1, pos_detail2, pos_detail3, "
+    "conjugation_type, conjugation_form, base_form, frequency, source, category, "
+    "cost, left_context_id, right_context_id, added_date, last_updated"
+)
+
+# 変更履歴に前の状態として保存する列
+HISTORY_COLUMNS = ("id",) + WordRecord.COLUMNS + ("score_day",)
+
+# 変更として記録する列(cost・score は頻度から再計算される派生値のため含めない)
+VERSIONED_COLUMNS = (
+    "surface", "reading", "pronunciation", "pos",
+    "pos_detail1", "pos_detail2", "pos_detail3",
+    "conjugation_type", "conjugation_form", "base_form",
+    "frequency", "source", "category", "left_context_id", "right_context_id",
+)
+
+# 他の接続が書き込み中のときにロック解除を待つ秒数
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# 未確定の版(word_count が NULL)のID
+OPEN_VERSION = "(SELECT MAX(version_id) FROM versions WHERE word_count IS NULL)"
+
+# 版を開かずに書き込んだときに自動で開く版の説明
+AUTO_VERSION = "auto"
+
+
+@instrument("storage", exclude=("transaction",))
 class DictStorage:
     """SQLiteベースの辞書ストレージ"""
 
-    def __init__(self, db_path: str = "~/.neodict/dict.db"):
-        self.db_path = Path(db_path).expanduser()
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+    def __init__(self, db_path: str = "~/.neodict/dict.db", read_only: bool = False):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            read_only: スキーマの準備後に開く接続を読み込み専用(query_only)にするか
+        """
+        self._local = threading.local()
+        self._memory_conn: Optional[sqlite3.Connection] = None
+        self.read_only = False
+
+        if str(db_path) == ":memory:":
+            # インメモリDBは接続ごとに別物になるため、1本の接続を使い続ける
+            self.db_path = db_path
+            self._memory_conn = sqlite3.connect(":memory:", check_same_thread=False)
+        else:
+            self.db_path = Path(db_path).expanduser()
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
         self._init_database()
 
+        if read_only:
+            self.close()
+            self.read_only = True
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """新しい接続を開く(ロック中は BUSY_TIMEOUT_SECONDS まで待つ)"""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS)
+        # WALではコミット時のfsyncを省いても破損しない(電源断で直近のコミットが失われうるのみ)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if self.read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def _connect(self, immediate: bool = False):
+        """
+        接続を取得
+
+        最も外側の呼び出しで接続を取り出し、正常終了ならコミット、例外ならロールバックする。
+        コミットの前にトランザクション内で開いた版を確定するため、未確定の版が
+        他の接続から見えることはない。
+        同じスレッドからの入れ子の呼び出しは同じ接続・トランザクションを使う。
+        接続はスレッドごとに開いたまま再利用する(close() で閉じる)。
+
+        Args:
+            immediate: 最も外側の場合、開始時に書き込みロックを取る(BEGIN IMMEDIATE)
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._memory_conn or getattr(self._local, "idle", None) or self._open_connection()
+        self._local.idle = None
+        self._local.conn = conn
+        try:
+            if immediate and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            total_changes = conn.total_changes
+            yield conn
+            changed = conn.total_changes != total_changes
+            if changed:
+                self._close_open_versions(conn)
+            conn.commit()
+            if changed:
+                self._local.commits = getattr(self._local, "commits", 0) + 1
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            if conn is not self._memory_conn:
+                self._local.idle = conn
+
+    def _close_open_versions(self, conn: sqlite3.Connection):
+        """トランザクション内で開いた版を確定する(変更のない自動の版は捨てる)"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT version_id, description FROM versions WHERE word_count IS NULL")
+        for version_id, description in cursor.fetchall():
+            changes = self.commit_version(version_id)
+            if description == AUTO_VERSION and not any(changes.values()):
+                cursor.execute("DELETE FROM versions WHERE version_id = ?", (version_id,))
+
+    def close(self):
+        """このスレッドで開いたままの接続を閉じる"""
+        conn = getattr(self._local, "idle", None)
+        if conn is not None:
+            self._local.idle = None
+            conn.close()
+
     def _init_database(self):
-        """データベースの初期化"""
-        with sqlite3.connect(self.db_path) as conn:
+        """データベースの初期化(保存済みのスキーマバージョンが一致すれば何もしない)"""
+        with self._connect() as conn:
             cursor = conn.cursor()
 
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] == SCHEMA_VERSION:
+                return
+
+            # 削除後の空きページを少しずつ返却できるようにする(新規DBのみ有効)
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+            # 読み込みが書き込み中のトランザクションに待たされず、
+            # コミット済みの状態だけを見るようにWALにする(設定はファイルに残る)
+            cursor.execute("PRAGMA journal_mode = WAL")
+
             # 単語テーブル
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS words (
@@ -44,16 +183,74 @@ class DictStorage:
                     left_context_id INTEGER DEFAULT 1285,
                     right_context_id INTEGER DEFAULT 1285,
                     added_date TIMESTAMP,
-                    last_updated TIMESTAMP
+                    last_updated TIMESTAMP,
+                    score REAL DEFAULT 0,
+                    score_day INTEGER
                 )
             """)
 
+            # 既存DBへの列追加
+            cursor.execute("PRAGMA table_info(words)")
+            columns = {row[1] for row in cursor.fetchall()}
+            if "score" not in columns:
+                cursor.execute("ALTER TABLE words ADD COLUMN score REAL DEFAULT 0")
+            if "score_day" not in columns:
+                cursor.execute("ALTER TABLE words ADD COLUMN score_day INTEGER")
+
             # インデックス作成
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_surface ON words(surface)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_reading ON words(reading)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_pos ON words(pos)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_frequency ON words(frequency DESC)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_source ON words(source)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_last_updated ON words(last_updated)")
+
+            # 削除した単語のアーカイブ
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS words_archive (
+                    id INTEGER,
+                    surface TEXT NOT NULL,
+                    reading TEXT,
+                    pronunciation TEXT,
+                    pos TEXT NOT NULL,
+                    pos_detail1 TEXT,
+                    pos_detail2 TEXT,
+                    pos_detail3 TEXT,
+                    conjugation_type TEXT,
+                    conjugation_form TEXT,
+                    base_form TEXT,
+                    frequency INTEGER,
+                    source TEXT,
+                    category TEXT,
+                    cost INTEGER,
+                    left_context_id INTEGER,
+                    right_context_id INTEGER,
+                    added_date TIMESTAMP,
+                    last_updated TIMESTAMP,
+                    archived_date TIMESTAMP
+                )
+            """)
+
+            # 日単位の出現回数(日付, 単語ID)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS word_counts (
+                    word_id INTEGER NOT NULL,
+                    day INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (word_id, day)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_word_counts_day ON word_counts(day, word_id, count)"
+            )
+
+            # 読み推定結果のキャッシュ
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS reading_cache (
+                    surface TEXT PRIMARY KEY,
+                    reading TEXT
+                ) WITHOUT ROWID
+            """)
 
             # バージョン管理テーブル
             cursor.execute("""
@@ -65,11 +262,202 @@ class DictStorage:
                 )
             """)
 
-            conn.commit()
+            # 差分更新用のウォーターマーク(ソースごとの最終取得位置)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    source TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    updated_date TIMESTAMP
+                )
+            """)
+
+            # 件数の集計表(kind: total / source / pos、NULLのキーは空文字)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS word_stats (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (kind, key)
+                ) WITHOUT ROWID
+            """)
+            self._create_stats_triggers(cursor)
+            self.recompute_stats()
+
+            # 版ごとの変更履歴(表層形ごとに、その版で最初に変更される前の行を保存)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS changelog (
+                    version_id INTEGER NOT NULL,
+                    surface TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    before TEXT,
+                    PRIMARY KEY (version_id, surface)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_versions_open ON versions(version_id) "
+                "WHERE word_count IS NULL"
+            )
+            self._create_history_triggers(cursor)
+
+            # 辞書に追加する前の候補(更新のたびに出現回数・出現元を積み上げ、しきい値を超えたら昇格)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS candidates (
+                    surface TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    sources TEXT NOT NULL,
+                    source_count INTEGER NOT NULL,
+                    first_seen INTEGER NOT NULL,
+                    last_seen INTEGER NOT NULL,
+                    reading TEXT,
+                    source TEXT,
+                    category TEXT
+                ) WITHOUT ROWID
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_candidates_count ON candidates(count, source_count)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_candidates_last_seen ON candidates(last_seen)"
+            )
+
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _create_stats_triggers(cursor):
+        """words の変更に合わせて word_stats を増減するトリガーを作成"""
+        def adjust(row: str, delta: str) -> str:
+            return "".join(
+                f"""
+                    INSERT INTO word_stats (kind, key, count) VALUES ('{kind}', {key}, {delta})
+                    ON CONFLICT(kind, key) DO UPDATE SET count = count + excluded.count;"""
+                for kind, key in (
+                    ("total", "''"),
+                    ("source", f"IFNULL({row}.source, '')"),
+                    ("pos", f"{row}.pos"),
+                )
+            )
+
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_word_stats_insert AFTER INSERT ON words
+            BEGIN{adjust("new", "1")}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_word_stats_delete AFTER DELETE ON words
+            BEGIN{adjust("old", "-1")}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_word_stats_update AFTER UPDATE OF pos, source ON words
+            WHEN old.pos IS NOT new.pos OR old.source IS NOT new.source
+            BEGIN{adjust("old", "-1")}{adjust("new", "1")}
+            END
+        """)
+
+    @staticmethod
+    def _create_history_triggers(cursor):
+        """
+        words の変更前の行を changelog に記録するトリガーを作成
+
+        版が開いていなければ説明 AUTO_VERSION の版を開いて記録する
+        (開いた版は _connect がトランザクションのコミット前に確定する)。
+        """
+        before = _history_json("old.")
+        changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in VERSIONED_COLUMNS)
+        open_auto = f"""
+                INSERT INTO versions (created_date, word_count, description)
+                SELECT strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'), NULL, '{AUTO_VERSION}'
+                WHERE NOT EXISTS (SELECT 1 FROM versions WHERE word_count IS NULL);"""
+
+        for name in ("insert", "delete", "update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_changelog_{name}")
+
+        cursor.execute(f"""
+            CREATE TRIGGER trg_changelog_insert AFTER INSERT ON words
+            BEGIN{open_auto}
+                INSERT OR IGNORE INTO changelog (version_id, surface, op, before)
+                VALUES ({OPEN_VERSION}, new.surface, 'add', NULL);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER trg_changelog_delete AFTER DELETE ON words
+            BEGIN{open_auto}
+                INSERT OR IGNORE INTO changelog (version_id, surface, op, before)
+                VALUES ({OPEN_VERSION}, old.surface, 'remove', {before});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER trg_changelog_update AFTER UPDATE ON words
+            WHEN {changed}
+            BEGIN{open_auto}
+                INSERT OR IGNORE INTO changelog (version_id, surface, op, before)
+                VALUES ({OPEN_VERSION}, old.surface, 'change', {before});
+                INSERT OR IGNORE INTO changelog (version_id, surface, op, before)
+                SELECT {OPEN_VERSION}, new.surface, 'add', NULL WHERE new.surface IS NOT old.surface;
+            END
+        """)
+
+    def recompute_stats(self):
+        """word_stats を words から作り直す(集計表の修復用)"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM word_stats")
+            cursor.execute(
+                "INSERT INTO word_stats (kind, key, count) SELECT 'total', '', COUNT(*) FROM words"
+            )
+            cursor.execute("""
+                INSERT INTO word_stats (kind, key, count)
+                SELECT 'source', IFNULL(source, ''), COUNT(*) FROM words GROUP BY IFNULL(source, '')
+            """)
+            cursor.execute("""
+                INSERT INTO word_stats (kind, key, count)
+                SELECT 'pos', pos, COUNT(*) FROM words GROUP BY pos
+            """)
+
+    @contextmanager
+    def transaction(self):
+        """
+        ブロック内の書き込みを1つのトランザクションにまとめる
+
+        開始時に書き込みロックを取り、ブロックを抜けるときにまとめてコミットする
+        (例外ならロールバック)。WALのため、他の接続の読み込みは待たされず、
+        コミットされるまでブロック内の変更を見ない。
+
+        Yields:
+            sqlite3.Connection
+        """
+        with self._connect(immediate=True) as conn:
+            yield conn
+
+    def get_generation(self) -> int:
+        """
+        辞書の世代(最後に確定した版ID、版がなければ0)
+
+        words への書き込みはトランザクションごとに版として確定するため、
+        追加・削除・更新・巻き戻しのたびに増え、キャッシュの無効化判定に使える。
+        他の接続のコミットは PRAGMA data_version、この接続のコミットはスレッドごとの
+        コミット回数で検出し、どちらも変わっていなければ前回の値を返す。
+        """
+        outermost = getattr(self._local, "conn", None) is None
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA data_version")
+            key = (conn, cursor.fetchone()[0], getattr(self._local, "commits", 0))
+
+            cached = getattr(self._local, "generation", None)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+            cursor.execute("SELECT IFNULL(MAX(version_id), 0) FROM versions WHERE word_count IS NOT NULL")
+            generation = cursor.fetchone()[0]
+            # 書き込み中のトランザクションや共有するインメモリ接続の値は覚えない
+            if outermost and conn is not self._memory_conn:
+                self._local.generation = (key, generation)
+            return generation
 
     def add_word(self, entry: WordEntry) -> int:
         """単語を追加"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
 
             try:
@@ -102,7 +490,6 @@ class DictStorage:
                     entry.added_date,
                     entry.last_updated
                 ))
-                conn.commit()
                 return cursor.lastrowid
             except sqlite3.IntegrityError:
                 # 重複の場合は更新
@@ -110,7 +497,7 @@ class DictStorage:
 
     def update_word(self, entry: WordEntry) -> int:
         """単語を更新"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -151,14 +538,13 @@ class DictStorage:
                 datetime.now(),
                 entry.word.surface
             ))
-            conn.commit()
             return cursor.rowcount
 
     def get_word(self, surface: str) -> Optional[WordEntry]:
         """単語を取得"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
 
             cursor.execute("SELECT * FROM words WHERE surface = ?", (surface,))
             row = cursor.fetchone()
@@ -167,11 +553,60 @@ class DictStorage:
                 return self._row_to_entry(row)
             return None
 
+    def get_words(self, surfaces: Iterable[str]) -> Dict[str, WordEntry]:
+        """
+        複数の単語をまとめて取得
+
+        Args:
+            surfaces: 表層形
+
+        Returns:
+            表層形と WordEntry の辞書(存在しない語は含まない)
+        """
+        surfaces = list(dict.fromkeys(surfaces))
+        entries = {}
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            for i in range(0, len(surfaces), IN_CHUNK_SIZE):
+                chunk = surfaces[i:i + IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT * FROM words WHERE surface IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    entries[row["surface"]] = self._row_to_entry(row)
+
+        return entries
+
+    def search_prefix(self, prefix: str, limit: int = 100) -> List[WordEntry]:
+        """
+        前方一致で単語を検索(表層形の順)
+
+        表層形のインデックスを範囲走査する。
+
+        Args:
+            prefix: 表層形の先頭
+            limit: 最大取得数
+
+        Returns:
+            WordEntry のリスト
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(
+                "SELECT * FROM words WHERE surface >= ? AND surface < ? ORDER BY surface LIMIT ?",
+                (prefix, prefix + "\U0010ffff", limit)
+            )
+            return [self._row_to_entry(row) for row in cursor.fetchall()]
+
     def search_words(self, query: str, fuzzy: bool = False, limit: int = 100) -> List[WordEntry]:
         """単語を検索"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
 
             if fuzzy:
                 cursor.execute(
@@ -188,9 +623,9 @@ class DictStorage:
 
     def get_all_words(self, limit: Optional[int] = None) -> List[WordEntry]:
         """全単語を取得"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
 
             if limit:
                 cursor.execute("SELECT * FROM words ORDER BY frequency DESC LIMIT ?", (limit,))
@@ -199,38 +634,938 @@ class DictStorage:
 
             return [self._row_to_entry(row) for row in cursor.fetchall()]
 
+    def iter_records(self, batch_size: int = 10000) -> Iterable[WordRecord]:
+        """
+        全単語を頻度の高い順に WordRecord で順次取得
+
+        タプルの行を batch_size 件ずつ読み出すため、全件をメモリに載せない。
+
+        Args:
+            batch_size: 1回に読み出す行数
+
+        Yields:
+            WordRecord
+        """
+        from_row = WordRecord.from_row
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(WordRecord.COLUMNS)} FROM words ORDER BY frequency DESC"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield from_row(row)
+
+    def iter_surfaces(self, batch_size: int = 10000) -> Iterable[str]:
+        """
+        全単語の表層形を順次取得
+
+        Args:
+            batch_size: 1回に読み出す行数
+
+        Yields:
+            表層形
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT surface FROM words")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (surface,) in rows:
+                    yield surface
+
+    def get_all_records(self, limit: Optional[int] = None) -> List[WordRecord]:
+        """
+        全単語を WordRecord で取得(get_all_words の軽量版)
+
+        Args:
+            limit: 最大取得数
+
+        Returns:
+            頻度の高い順の WordRecord のリスト
+        """
+        query = f"SELECT {', '.join(WordRecord.COLUMNS)} FROM words ORDER BY frequency DESC"
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            if limit:
+                cursor.execute(query + " LIMIT ?", (limit,))
+            else:
+                cursor.execute(query)
+
+            return list(map(WordRecord.from_row, cursor))
+
     def delete_word(self, surface: str) -> int:
         """単語を削除"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM word_counts WHERE word_id IN (SELECT id FROM words WHERE surface = ?)",
+                (surface,)
+            )
             cursor.execute("DELETE FROM words WHERE surface = ?", (surface,))
-            conn.commit()
             return cursor.rowcount
 
-    def get_stats(self) -> Dict:
-        """統計情報を取得"""
-        with sqlite3.connect(self.db_path) as conn:
+    def purge_words(
+        self,
+        min_frequency: Optional[int] = None,
+        max_age_days: Optional[int] = None,
+        exclude_sources: Iterable[str] = ("manual",),
+        archive: bool = False,
+        batch_size: int = 1000,
+        vacuum: bool = True,
+        description: Optional[str] = None
+    ) -> Dict:
+        """
+        低頻度語・古い語を一括削除
+
+        frequency と last_updated のインデックスで対象を絞り、batch_size 件ずつ
+        別トランザクションで削除するため、長時間DBをロックしない。
+        削除はバッチごとに1つの版として記録する。
+
+        Args:
+            min_frequency: この頻度未満の語を削除(Noneなら条件にしない)
+            max_age_days: 最終更新がこの日数より古い語を削除(Noneなら条件にしない)
+            exclude_sources: 削除対象から除外するソース
+            archive: 削除前に words_archive へ退避するか
+            batch_size: 1トランザクションで削除する最大件数
+            vacuum: 削除後に incremental_vacuum で空き領域を返却するか
+            description: バッチごとの版の説明(Noneなら AUTO_VERSION)
+
+        Returns:
+            削除件数と回収したバイト数
+        """
+        conditions = []
+        if min_frequency is not None:
+            conditions.append(("frequency < ?", min_frequency))
+        if max_age_days is not None:
+            conditions.append(("last_updated < ?", datetime.now() - timedelta(days=max_age_days)))
+
+        excluded = list(exclude_sources)
+        exclude_clause = ""
+        if excluded:
+            exclude_clause = f" AND (source IS NULL OR source NOT IN ({','.join('?' * len(excluded))}))"
+
+        size_before = self._database_size()
+        deleted = 0
+
+        for condition, value in conditions:
+            query = f"SELECT id FROM words WHERE {condition}{exclude_clause} LIMIT ?"
+
+            while True:
+                with self._connect(immediate=True) as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(query, (value, *excluded, batch_size))
+                    ids = [row[0] for row in cursor.fetchall()]
+
+                    if not ids:
+                        break
+
+                    if description is not None:
+                        self.begin_version(description)
+                    placeholders = ",".join("?" * len(ids))
+                    if archive:
+                        cursor.execute(
+                            f"INSERT INTO words_archive ({ARCHIVE_COLUMNS}, archived_date) "
+                            f"SELECT {ARCHIVE_COLUMNS}, ? FROM words WHERE id IN ({placeholders})",
+                            (datetime.now(), *ids)
+                        )
+                    cursor.execute(f"DELETE FROM words WHERE id IN ({placeholders})", ids)
+                    deleted += cursor.rowcount
+                    cursor.execute(f"DELETE FROM word_counts WHERE word_id IN ({placeholders})", ids)
+
+                if len(ids) < batch_size:
+                    break
+
+        if vacuum and deleted:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute("PRAGMA auto_vacuum")
+                if cursor.fetchone()[0] == 2:
+                    cursor.execute("PRAGMA incremental_vacuum")
+                    cursor.fetchall()
+                else:
+                    logger.info("auto_vacuum is not INCREMENTAL; run VACUUM to shrink the file")
+
+        return {
+            "deleted": deleted,
+            "archived": deleted if archive else 0,
+            "bytes_reclaimed": max(size_before - self._database_size(), 0)
+        }
+
+    def record_frequency(self, counts: Dict[str, int], day: Optional[date] = None) -> int:
+        """
+        出現回数を既存の単語に加算
+
+        frequency への累積加算、日単位バケットへの加算、減衰スコアの更新を
+        1トランザクションで行う。減衰スコアは前回値を経過日数分だけ減衰させてから
+        加算するため、履歴を走査し直す必要はない。
+
+        Args:
+            counts: 表層形と出現回数の辞書
+            day: 集計日(省略時は今日)
+
+        Returns:
+            更新した単語数
+        """
+        day_number = (day or date.today()).toordinal()
+        now = datetime.now()
+        surfaces = [surface for surface, count in counts.items() if count > 0]
+        updated = 0
+
+        with self._connect() as conn:
             cursor = conn.cursor()
 
-            cursor.execute("SELECT COUNT(*) FROM words")
-            total_words = cursor.fetchone()[0]
+            for i in range(0, len(surfaces), IN_CHUNK_SIZE):
+                chunk = surfaces[i:i + IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT id, surface, score, score_day FROM words "
+                    f"WHERE surface IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                rows = cursor.fetchall()
+
+                cursor.executemany(
+                    "UPDATE words SET frequency = frequency + ?, score = ?, score_day = ?, "
+                    "last_updated = ? WHERE id = ?",
+                    [
+                        (
+                            counts[surface],
+                            *merge_score(score, score_day, counts[surface], day_number),
+                            now,
+                            word_id
+                        )
+                        for word_id, surface, score, score_day in rows
+                    ]
+                )
+                cursor.executemany(
+                    "INSERT INTO word_counts (word_id, day, count) VALUES (?, ?, ?) "
+                    "ON CONFLICT(word_id, day) DO UPDATE SET count = count + excluded.count",
+                    [(word_id, day_number, counts[surface]) for word_id, surface, _, _ in rows]
+                )
+                updated += len(rows)
+
+        return updated
+
+    def get_trending(self, days: int = 7, limit: int = 50) -> List[Tuple[WordEntry, int]]:
+        """
+        直近の出現回数が多い単語を取得
+
+        日単位バケットのインデックス(day, word_id, count)を範囲走査するため、
+        対象期間のバケットだけを読む。
+
+        Args:
+            days: 集計する日数(今日を含む)
+            limit: 最大取得数
+
+        Returns:
+            (WordEntry, 期間内の出現回数) のリスト
+        """
+        since_day = date.today().toordinal() - days + 1
 
-            cursor.execute("SELECT COUNT(DISTINCT pos) FROM words")
-            unique_pos = cursor.fetchone()[0]
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+
+            cursor.execute("""
+                SELECT w.*, t.recent_count FROM (
+                    SELECT word_id, SUM(count) AS recent_count FROM word_counts
+                    WHERE day >= ? GROUP BY word_id
+                    ORDER BY recent_count DESC LIMIT ?
+                ) t JOIN words w ON w.id = t.word_id
+                ORDER BY t.recent_count DESC
+            """, (since_day, limit))
+
+            return [(self._row_to_entry(row), row["recent_count"]) for row in cursor.fetchall()]
+
+    def prune_word_counts(self, max_age_days: int) -> int:
+        """
+        古い日単位バケットを削除(減衰スコアには影響しない)
+
+        Args:
+            max_age_days: この日数より古いバケットを削除
+
+        Returns:
+            削除したバケット数
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM word_counts WHERE day < ?",
+                (date.today().toordinal() - max_age_days,)
+            )
+            return cursor.rowcount
 
-            cursor.execute("SELECT source, COUNT(*) FROM words GROUP BY source")
-            sources = dict(cursor.fetchall())
+    def upsert_candidates(self, candidates: Dict[str, Dict], day: Optional[date] = None) -> int:
+        """
+        辞書にない語を候補として積み上げる
 
-            cursor.execute("SELECT pos, COUNT(*) FROM words GROUP BY pos ORDER BY COUNT(*) DESC")
-            pos_distribution = dict(cursor.fetchall())
+        出現回数は加算し、出現元は和集合にする。初出日は最初の値を残し、
+        最終出現日・読み(未設定の場合)は今回の値にする。
+
+        Args:
+            candidates: 表層形と {"count", "sources", "reading", "source", "category"} の辞書
+            day: 集計日(省略時は今日)
+
+        Returns:
+            書き込んだ候補数
+        """
+        day_number = (day or date.today()).toordinal()
+        surfaces = list(candidates)
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+
+            for i in range(0, len(surfaces), IN_CHUNK_SIZE):
+                chunk = surfaces[i:i + IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT surface, sources FROM candidates "
+                    f"WHERE surface IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                known = {surface: json.loads(sources) for surface, sources in cursor.fetchall()}
+
+                rows = []
+                for surface in chunk:
+                    info = candidates[surface]
+                    sources = sorted(set(known.get(surface, ())).union(info.get("sources", ())))
+                    rows.append((
+                        surface, info.get("count", 1), json.dumps(sources, ensure_ascii=False),
+                        len(sources), day_number, day_number,
+                        info.get("reading"), info.get("source"), info.get("category")
+                    ))
+
+                cursor.executemany("""
+                    INSERT INTO candidates (
+                        surface, count, sources, source_count, first_seen, last_seen,
+                        reading, source, category
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(surface) DO UPDATE SET
+                        count = count + excluded.count,
+                        sources = excluded.sources,
+                        source_count = excluded.source_count,
+                        last_seen = excluded.last_seen,
+                        reading = COALESCE(reading, excluded.reading)
+                """, rows)
+
+        return len(surfaces)
+
+    def get_candidates(self, surfaces: Iterable[str]) -> Dict[str, Dict]:
+        """
+        候補の積み上げた値を取得
+
+        Args:
+            surfaces: 表層形
+
+        Returns:
+            表層形と候補の辞書(候補にない語は含まない)
+        """
+        surfaces = list(surfaces)
+        found = {}
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+
+            for i in range(0, len(surfaces), IN_CHUNK_SIZE):
+                chunk = surfaces[i:i + IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT * FROM candidates WHERE surface IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                found.update((row["surface"], self._row_to_candidate(row)) for row in cursor.fetchall())
+
+        return found
+
+    def has_candidates(self, min_count: int, min_sources: int = 1) -> bool:
+        """
+        しきい値を超えた候補があるか(取り出さずに確かめる)
+
+        Args:
+            min_count: 最小の累積出現回数
+            min_sources: 最小の出現元の数
+
+        Returns:
+            該当する候補がある場合True
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM candidates WHERE count >= ? AND source_count >= ?)",
+                (min_count, min_sources)
+            )
+            return bool(cursor.fetchone()[0])
+
+    def promote_candidates(
+        self,
+        min_count: int,
+        min_sources: int = 1,
+        limit: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """
+        しきい値を超えた候補を取り出す(候補の表からは削除する)
+
+        (count, source_count) のインデックスで範囲を絞る。取り出した語を
+        辞書に追加する処理と同じ transaction() の中で呼ぶこと。
+
+        Args:
+            min_count: 最小の累積出現回数
+            min_sources: 最小の出現元の数
+            limit: 最大取得数(出現回数の多い順)
+
+        Returns:
+            表層形と候補の辞書
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+
+            cursor.execute(
+                "SELECT * FROM candidates WHERE count >= ? AND source_count >= ? "
+                "ORDER BY count DESC LIMIT ?",
+                (min_count, min_sources, -1 if limit is None else limit)
+            )
+            promoted = {row["surface"]: self._row_to_candidate(row) for row in cursor.fetchall()}
+
+            surfaces = list(promoted)
+            for i in range(0, len(surfaces), IN_CHUNK_SIZE):
+                chunk = surfaces[i:i + IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"DELETE FROM candidates WHERE surface IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+
+        return promoted
+
+    def evict_candidates(
+        self,
+        max_idle_days: Optional[int] = None,
+        max_candidates: Optional[int] = None,
+        batch_size: int = 1000,
+        day: Optional[date] = None
+    ) -> int:
+        """
+        しばらく現れていない候補・上限を超えた分の候補を削除
+
+        last_seen・count のインデックスで対象を絞り、batch_size 件ずつ
+        別トランザクションで削除するため、長時間DBをロックしない。
+
+        Args:
+            max_idle_days: 最終出現がこの日数より前の候補を削除(Noneなら条件にしない)
+            max_candidates: 候補数の上限(超えた分を出現回数の少ない順に削除、Noneなら上限なし)
+            batch_size: 1トランザクションで削除する最大件数
+            day: 基準日(省略時は今日)
+
+        Returns:
+            削除した候補数
+        """
+        queries = []
+        if max_idle_days is not None:
+            cutoff = (day or date.today()).toordinal() - max_idle_days
+            queries.append(("SELECT surface FROM candidates WHERE last_seen < ? LIMIT ?", (cutoff,)))
+        if max_candidates is not None:
+            queries.append(("SELECT surface FROM candidates ORDER BY count LIMIT ?", ()))
+
+        deleted = 0
+        for query, params in queries:
+            while True:
+                with self._connect() as conn:
+                    cursor = conn.cursor()
+
+                    size = batch_size
+                    if not params:
+                        cursor.execute("SELECT COUNT(*) FROM candidates")
+                        size = min(batch_size, cursor.fetchone()[0] - max_candidates)
+                        if size <= 0:
+                            break
+
+                    cursor.execute(query, (*params, size))
+                    surfaces = [row[0] for row in cursor.fetchall()]
+                    if not surfaces:
+                        break
+
+                    cursor.execute(
+                        f"DELETE FROM candidates WHERE surface IN ({','.join('?' * len(surfaces))})",
+                        surfaces
+                    )
+                    deleted += cursor.rowcount
+
+                if len(surfaces) < size:
+                    break
+
+        return deleted
+
+    @staticmethod
+    def _row_to_candidate(row: sqlite3.Row) -> Dict:
+        """候補の表の行を辞書に変換"""
+        return {
+            "surface": row["surface"],
+            "count": row["count"],
+            "sources": json.loads(row["sources"]),
+            "first_seen": date.fromordinal(row["first_seen"]),
+            "last_seen": date.fromordinal(row["last_seen"]),
+            "reading": row["reading"],
+            "source": row["source"],
+            "category": row["category"]
+        }
+
+    def read_columns(
+        self,
+        columns: List[str],
+        where: Optional[str] = None,
+        params: Iterable = (),
+        batch_size: int = 65536
+    ) -> Dict:
+        """
+        列を型付き配列で一括取得
+
+        WordEntry を作らずタプルの行を batch_size 件ずつ列配列へ詰める。
+        数値列(id, frequency, score, score_day, cost, left_context_id,
+        right_context_id, surface_length)はNumPy配列、文字列列は
+        core.columns.StringColumn(オフセット+UTF-8バイト列)で返す。
+
+        Args:
+            columns: 列名のリスト
+            where: WHERE句(プレースホルダは ? を使う)
+            params: WHERE句のパラメータ
+            batch_size: 1回に読み出す行数
+
+        Returns:
+            列名と配列の辞書(行の順序は id 順)
+        """
+        # NumPyの読み込みは重いため、列読み込みを使うときまで遅らせる
+        from .columns import collect_columns, column_expressions
+
+        query = f"SELECT {', '.join(column_expressions(columns))} FROM words"
+        if where:
+            query += f" WHERE {where}"
+        query += " ORDER BY id"
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(params))
+            return collect_columns(cursor, columns, batch_size=batch_size)
+
+    def set_costs(self, costs: Iterable[Tuple[int, int]]) -> int:
+        """
+        コストを1トランザクションで一括更新
+
+        Args:
+            costs: (cost, id) の組
+
+        Returns:
+            更新した単語数
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("UPDATE words SET cost = ? WHERE id = ?", costs)
+            return cursor.rowcount
+
+    def _database_size(self) -> int:
+        """データベースの使用バイト数(ページ数×ページサイズ)"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA page_count")
+            page_count = cursor.fetchone()[0]
+            cursor.execute("PRAGMA page_size")
+            return page_count * cursor.fetchone()[0]
+
+    def get_stats(self) -> Dict:
+        """統計情報を取得(トリガーで維持している word_stats を読むだけ)"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT kind, key, count FROM word_stats WHERE count > 0 "
+                "ORDER BY kind, count DESC, key"
+            )
+
+            total_words = 0
+            sources = {}
+            pos_distribution = {}
+            for kind, key, count in cursor.fetchall():
+                if kind == "total":
+                    total_words = count
+                elif kind == "source":
+                    sources[key or None] = count
+                elif kind == "pos":
+                    pos_distribution[key] = count
 
             return {
                 "total_words": total_words,
-                "unique_pos": unique_pos,
+                "unique_pos": len(pos_distribution),
                 "sources": sources,
                 "pos_distribution": pos_distribution
             }
 
+    def get_surfaces_without_reading(self, surfaces: Iterable[str]) -> List[str]:
+        """
+        読みが未設定の表層形を取得
+
+        Args:
+            surfaces: 対象の表層形
+
+        Returns:
+            読みが未設定の表層形のリスト
+        """
+        surfaces = list(surfaces)
+        missing = []
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(surfaces), IN_CHUNK_SIZE):
+                chunk = surfaces[i:i + IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT surface FROM words WHERE reading IS NULL "
+                    f"AND surface IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                missing.extend(row[0] for row in cursor.fetchall())
+
+        return missing
+
+    def set_readings(self, readings: Dict[str, str]) -> int:
+        """
+        読みが未設定の単語に読みを一括設定
+
+        Args:
+            readings: 表層形と読みの辞書
+
+        Returns:
+            更新した単語数
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE words SET reading = ?, pronunciation = IFNULL(pronunciation, ?) "
+                "WHERE surface = ? AND reading IS NULL",
+                [
+                    (reading, reading, surface)
+                    for surface, reading in readings.items() if reading
+                ]
+            )
+            return cursor.rowcount
+
+    def get_cached_readings(self, surfaces: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        読み推定キャッシュを取得
+
+        Args:
+            surfaces: 対象の表層形
+
+        Returns:
+            キャッシュ済みの表層形と読みの辞書
+        """
+        surfaces = list(surfaces)
+        cached = {}
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(surfaces), IN_CHUNK_SIZE):
+                chunk = surfaces[i:i + IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT surface, reading FROM reading_cache "
+                    f"WHERE surface IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                cached.update(cursor.fetchall())
+
+        return cached
+
+    def set_cached_readings(self, readings: Dict[str, Optional[str]]):
+        """読み推定キャッシュを保存"""
+        if not readings:
+            return
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR REPLACE INTO reading_cache (surface, reading) VALUES (?, ?)",
+                readings.items()
+            )
+
+    def begin_version(self, description: Optional[str] = None) -> int:
+        """
+        新しい版を開始(以降の words の変更が changelog に記録される)
+
+        版は開始したトランザクションの中で確定する(確定しなければコミット時に確定される)。
+        同じトランザクションで先に開いた版があれば、その版を確定してから開始する。
+
+        Args:
+            description: 版の説明
+
+        Returns:
+            版ID
+
+        Raises:
+            RuntimeError: トランザクションの外で呼んだ場合
+        """
+        if getattr(self._local, "conn", None) is None:
+            raise RuntimeError("begin_version() must be called inside transaction()")
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            self._close_open_versions(conn)
+
+            cursor.execute(
+                "INSERT INTO versions (created_date, word_count, description) VALUES (?, NULL, ?)",
+                (datetime.now(), description)
+            )
+            return cursor.lastrowid
+
+    def commit_version(self, version_id: int) -> Dict[str, int]:
+        """
+        版を確定
+
+        表層形ごとに版の前後を比べて op を add/remove/change に揃え、
+        版の中で追加して削除した語など正味の変更がない記録は捨てる。
+
+        Args:
+            version_id: begin_version が返した版ID
+
+        Returns:
+            追加・削除・変更した語数
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM changelog WHERE version_id = ? AND before IS NULL
+                AND surface NOT IN (SELECT surface FROM words)
+            """, (version_id,))
+            cursor.execute("""
+                UPDATE changelog SET op = CASE
+                    WHEN before IS NULL THEN 'add'
+                    WHEN surface IN (SELECT surface FROM words) THEN 'change'
+                    ELSE 'remove'
+                END
+                WHERE version_id = ?
+            """, (version_id,))
+            cursor.execute(
+                "UPDATE versions SET word_count = "
+                "IFNULL((SELECT count FROM word_stats WHERE kind = 'total'), 0) "
+                "WHERE version_id = ?",
+                (version_id,)
+            )
+            return self._count_changes(cursor, version_id)
+
+    @staticmethod
+    def _count_changes(cursor, version_id: int) -> Dict[str, int]:
+        cursor.execute(
+            "SELECT op, COUNT(*) FROM changelog WHERE version_id = ? GROUP BY op",
+            (version_id,)
+        )
+        counts = dict(cursor.fetchall())
+        return {op: counts.get(op, 0) for op in ("add", "remove", "change")}
+
+    def get_versions(self, limit: int = 10) -> List[Dict]:
+        """
+        確定済みの版を新しい順に取得
+
+        Args:
+            limit: 最大取得数
+
+        Returns:
+            版ID・作成日時・語数・説明・変更件数の辞書のリスト
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT version_id, created_date, word_count, description FROM versions
+                WHERE word_count IS NOT NULL ORDER BY version_id DESC LIMIT ?
+            """, (limit,))
+
+            versions = []
+            for version_id, created_date, word_count, description in cursor.fetchall():
+                versions.append({
+                    "version": version_id,
+                    "created_date": created_date,
+                    "word_count": word_count,
+                    "description": description,
+                    "changes": self._count_changes(cursor, version_id),
+                })
+            return versions
+
+    def _check_version(self, cursor, version_id: int):
+        cursor.execute(
+            "SELECT 1 FROM versions WHERE version_id = ? AND word_count IS NOT NULL",
+            (version_id,)
+        )
+        if cursor.fetchone() is None:
+            raise ValueError(f"Unknown version: {version_id}")
+
+    @staticmethod
+    def _first_before_images(cursor, after: int, until: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """
+        版 after より後に最初に変更された時点の行(= 版 after 時点の行)を表層形ごとに取得
+        """
+        query = "SELECT surface, before, MIN(version_id) FROM changelog WHERE version_id > ?"
+        params = [after]
+        if until is not None:
+            query += " AND version_id <= ?"
+            params.append(until)
+        cursor.execute(query + " GROUP BY surface", params)
+        return {surface: before for surface, before, _ in cursor.fetchall()}
+
+    def iter_records_at(self, version_id: int, batch_size: int = 10000) -> Iterable[WordRecord]:
+        """
+        指定した版の時点の全単語を頻度の高い順に WordRecord で順次取得
+
+        現在の行のうち以後の版で変更されていないものと、
+        変更された語の変更前の行を合わせて返す(全体の複製は持たない)。
+
+        Args:
+            version_id: 版ID
+            batch_size: 1回に読み出す行数
+
+        Yields:
+            WordRecord
+
+        Raises:
+            ValueError: 確定済みの版でない場合
+        """
+        from_row = WordRecord.from_row
+        restored = ", ".join(f"json_extract(before, '$.{column}')" for column in WordRecord.COLUMNS)
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            self._check_version(cursor, version_id)
+            cursor.execute(f"""
+                SELECT {', '.join(WordRecord.COLUMNS)} FROM words
+                WHERE surface NOT IN (SELECT surface FROM changelog WHERE version_id > ?)
+                UNION ALL
+                SELECT {restored} FROM (
+                    SELECT before, MIN(version_id) FROM changelog
+                    WHERE version_id > ? GROUP BY surface
+                ) WHERE before IS NOT NULL
+                ORDER BY frequency DESC
+            """, (version_id, version_id))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield from_row(row)
+
+    def diff_versions(self, from_version: int, to_version: Optional[int] = None) -> Dict[str, List[str]]:
+        """
+        2つの版の差分を取得
+
+        Args:
+            from_version: 比較元の版ID
+            to_version: 比較先の版ID(Noneなら現在)
+
+        Returns:
+            added/removed/changed の表層形のリスト
+
+        Raises:
+            ValueError: 確定済みの版でない場合
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            self._check_version(cursor, from_version)
+            if to_version is not None:
+                self._check_version(cursor, to_version)
+
+            old_rows = self._first_before_images(cursor, from_version, until=to_version)
+            new_rows = {}
+            if to_version is not None:
+                later = self._first_before_images(cursor, to_version)
+                new_rows = {surface: later[surface] for surface in old_rows if surface in later}
+
+            current = [surface for surface in old_rows if surface not in new_rows]
+            for i in range(0, len(current), IN_CHUNK_SIZE):
+                chunk = current[i:i + IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT surface, {_history_json()} FROM words "
+                    f"WHERE surface IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                new_rows.update(cursor.fetchall())
+
+        diff = {"added": [], "removed": [], "changed": []}
+        for surface, before in old_rows.items():
+            after = new_rows.get(surface)
+            if before is None and after is not None:
+                diff["added"].append(surface)
+            elif before is not None and after is None:
+                diff["removed"].append(surface)
+            elif before is not None and _versioned_values(before) != _versioned_values(after):
+                diff["changed"].append(surface)
+
+        for surfaces in diff.values():
+            surfaces.sort()
+        return diff
+
+    def rollback_to(self, version_id: int) -> Dict[str, int]:
+        """
+        指定した版の状態に戻す
+
+        以後の版で変更された語だけを変更前の行で置き換え、その操作を新しい版として記録する
+        (戻した後でも元に戻せる)。
+
+        Args:
+            version_id: 戻す先の版ID
+
+        Returns:
+            追加・削除・変更した語数
+
+        Raises:
+            ValueError: 確定済みの版でない場合
+        """
+        insert = (
+            f"INSERT INTO words ({', '.join(HISTORY_COLUMNS)}) SELECT "
+            + ", ".join(f"json_extract(?1, '$.{column}')" for column in HISTORY_COLUMNS)
+        )
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            self._check_version(cursor, version_id)
+            images = self._first_before_images(cursor, version_id)
+
+            rollback_version = self.begin_version(f"rollback to {version_id}")
+            for surface, before in images.items():
+                cursor.execute(
+                    "DELETE FROM word_counts WHERE word_id IN (SELECT id FROM words WHERE surface = ?)",
+                    (surface,)
+                )
+                cursor.execute("DELETE FROM words WHERE surface = ?", (surface,))
+                if before is not None:
+                    cursor.execute(insert, (before,))
+
+            return self.commit_version(rollback_version)
+
+    def get_watermarks(self) -> Dict[str, str]:
+        """差分更新用のウォーターマークを全て取得"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT source, value FROM watermarks")
+            return dict(cursor.fetchall())
+
+    def set_watermarks(self, watermarks: Dict[str, str]):
+        """ウォーターマークを保存(既存の値は上書き)"""
+        if not watermarks:
+            return
+
+        now = datetime.now()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR REPLACE INTO watermarks (source, value, updated_date) VALUES (?, ?, ?)",
+                [(source, value, now) for source, value in watermarks.items()]
+            )
+
+    def clear_watermarks(self) -> int:
+        """ウォーターマークを全て削除(次回は全件取得になる)"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM watermarks")
+            return cursor.rowcount
+
     def _row_to_entry(self, row: sqlite3.Row) -> WordEntry:
         """SQLite行をWordEntryに変換"""
         word = Word(
@@ -241,7 +1576,7 @@ class DictStorage:
 
         return WordEntry(
             word=word,
-            pos=PartOfSpeech(row["pos"]),
+            pos=POS_BY_VALUE[row["pos"]],
             pos_detail1=row["pos_detail1"] or "*",
             pos_detail2=row["pos_detail2"] or "*",
             pos_detail3=row["pos_detail3"] or "*",
@@ -249,7 +1584,8 @@ class DictStorage:
             conjugation_form=row["conjugation_form"] or "*",
             base_form=row["base_form"],
             frequency=row["frequency"],
-            source=WordSource(row["source"]),
+            score=row["score"] or 0.0,
+            source=SOURCE_BY_VALUE[row["source"]],
             category=row["category"],
             cost=row["cost"],
             left_context_id=row["left_context_id"],
@@ -257,3 +1593,16 @@ class DictStorage:
             added_date=datetime.fromisoformat(row["added_date"]) if row["added_date"] else datetime.now(),
             last_updated=datetime.fromisoformat(row["last_updated"]) if row["last_updated"] else datetime.now()
         )
+
+
+def _history_json(prefix: str = "") -> str:
+    """HISTORY_COLUMNS を JSON にまとめるSQL式(prefix は old. など)"""
+    return "json_object({})".format(
+        ", ".join(f"'{column}', {prefix}{column}" for column in HISTORY_COLUMNS)
+    )
+
+
+def _versioned_values(row_json: str) -> Tuple:
+    """changelog の行(JSON)から変更として扱う列の値を取り出す"""
+    row = json.loads(row_json)
+    return tuple(row.get(column) for column in VERSIONED_COLUMNS)
@@ -58,6 +58,7 @@ class WordEntry:
 
     # メタ情報
     frequency: int = 0  # 出現頻度
+    score: float = 0.0  # 時間減衰付きの出現スコア
     source: WordSource = WordSource.OTHER
     category: Optional[str] = None  # カテゴリ(IT、芸能、スポーツなど)
     added_date: datetime = field(default_factory=datetime.now)
@@ -151,6 +152,7 @@ class WordEntry:
             },
             "base_form": self.base_form,
             "frequency": self.frequency,
+            "score": self.score,
             "source": self.source.value,
             "category": self.category,
             "added_date": self.added_date.isoformat(),
@@ -176,8 +178,119 @@ class WordEntry:
             conjugation_form=data.get("conjugation", {}).get("form", "*"),
             base_form=data.get("base_form"),
             frequency=data.get("frequency", 0),
+            score=data.get("score", 0.0),
             source=WordSource(data.get("source", "other")),
             category=data.get("category"),
             added_date=datetime.fromisoformat(data.get("added_date", datetime.now().isoformat())),
             last_updated=datetime.fromisoformat(data.get("last_updated", datetime.now().isoformat()))
         )
+
+
+# 値からEnumへの変換表(行ごとの Enum() 呼び出しを避け、同じメンバーを共有する)
+POS_BY_VALUE = {member.value: member for member in PartOfSpeech}
+SOURCE_BY_VALUE = {member.value: member for member in WordSource}
+
+
+class WordRecord:
+    """
+    一括読み込み用の軽量な辞書エントリー
+
+    __slots__ でインスタンスごとの __dict__ を持たず、Word を別に作らない。
+    品詞・ソースは共有のEnumメンバーを参照し、日時は参照されたときに解析する。
+    WordEntry と同じ属性名で読め、to_entry() で WordEntry に変換できる。
+    """
+
+    # DictStorage が SELECT する列の順序
+    COLUMNS = (
+        "surface", "reading", "pronunciation", "pos",
+        "pos_detail1", "pos_detail2", "pos_detail3",
+        "conjugation_type", "conjugation_form", "base_form",
+        "frequency", "score", "source", "category",
+        "cost", "left_context_id", "right_context_id",
+        "added_date", "last_updated",
+    )
+
+    __slots__ = (
+        "surface", "reading", "pronunciation", "pos",
+        "pos_detail1", "pos_detail2", "pos_detail3",
+        "conjugation_type", "conjugation_form", "_base_form",
+        "frequency", "score", "source", "category",
+        "cost", "left_context_id", "right_context_id",
+        "_added_date", "_last_updated",
+    )
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "WordRecord":
+        """COLUMNS 順のタプルから生成"""
+        record = cls.__new__(cls)
+        (
+            record.surface, record.reading, record.pronunciation, pos,
+            pos_detail1, pos_detail2, pos_detail3,
+            conjugation_type, conjugation_form, record._base_form,
+            record.frequency, score, source, record.category,
+            record.cost, record.left_context_id, record.right_context_id,
+            record._added_date, record._last_updated,
+        ) = row
+        record.pos = POS_BY_VALUE[pos]
+        record.source = SOURCE_BY_VALUE[source]
+        record.pos_detail1 = pos_detail1 or "*"
+        record.pos_detail2 = pos_detail2 or "*"
+        record.pos_detail3 = pos_detail3 or "*"
+        record.conjugation_type = conjugation_type or "*"
+        record.conjugation_form = conjugation_form or "*"
+        record.score = score or 0.0
+        return record
+
+    @property
+    def word(self) -> "WordRecord":
+        """WordEntry.word と同じく surface/reading/pronunciation を持つ"""
+        return self
+
+    @property
+    def base_form(self) -> str:
+        return self._base_form or self.surface
+
+    @property
+    def added_date(self) -> datetime:
+        return _parse_timestamp(self._added_date)
+
+    @property
+    def last_updated(self) -> datetime:
+        return _parse_timestamp(self._last_updated)
+
+    # 出力形式は WordEntry と共通
+    to_mecab_csv = WordEntry.to_mecab_csv
+    to_sudachi_csv = WordEntry.to_sudachi_csv
+    to_janome_csv = WordEntry.to_janome_csv
+    to_dict = WordEntry.to_dict
+
+    def to_entry(self) -> WordEntry:
+        """WordEntry に変換"""
+        return WordEntry(
+            word=Word(
+                surface=self.surface,
+                reading=self.reading,
+                pronunciation=self.pronunciation
+            ),
+            pos=self.pos,
+            pos_detail1=self.pos_detail1,
+            pos_detail2=self.pos_detail2,
+            pos_detail3=self.pos_detail3,
+            conjugation_type=self.conjugation_type,
+            conjugation_form=self.conjugation_form,
+            base_form=self._base_form,
+            frequency=self.frequency,
+            score=self.score,
+            source=self.source,
+            category=self.category,
+            cost=self.cost,
+            left_context_id=self.left_context_id,
+            right_context_id=self.right_context_id,
+            added_date=self.added_date,
+            last_updated=self.last_updated
+        )
+
+
+def _parse_timestamp(value: Optional[str]) -> datetime:
+    """SQLiteに保存された日時文字列を解析(未設定なら現在時刻)"""
+    return datetime.fromisoformat(value) if value else datetime.now()
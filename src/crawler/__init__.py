@@ -7,5 +7,6 @@ from .base import BaseCrawler
 from .wikipedia import WikipediaCrawler
 from .news import NewsCrawler
 from .extractor import WordExtractor
+from .discovery import NgramDiscovery
 
-__all__ = ["BaseCrawler", "WikipediaCrawler", "NewsCrawler", "WordExtractor"]
+__all__ = ["BaseCrawler", "WikipediaCrawler", "NewsCrawler", "WordExtractor", "NgramDiscovery"]
@@ -3,11 +3,15 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
-import requests
-from bs4 import BeautifulSoup
+from typing import List, Dict, Optional, TYPE_CHECKING
 import time
 import logging
+from urllib.parse import urlsplit
+from metrics import profiling, prometheus
+
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +28,9 @@ class BaseCrawler(ABC):
             delay: リクエスト間の遅延(秒)
             timeout: タイムアウト時間(秒)
         """
+        # requests/bs4 の読み込みは重いため、クローラーを使うときまで遅らせる
+        import requests
+
         self.delay = delay
         self.timeout = timeout
         self.session = requests.Session()
@@ -31,7 +38,43 @@ class BaseCrawler(ABC):
             "User-Agent": "NeoDict/0.1.0 (Japanese Dictionary Crawler)"
         })
 
-    def fetch(self, url: str) -> Optional[BeautifulSoup]:
+        # 直近のクロールで確認した最新位置(差分更新用)
+        self.watermarks: Dict[str, str] = {}
+
+    def _get(self, url: str, **kwargs) -> "requests.Response":
+        """
+        GETリクエストを送り、取得件数・バイト数・レイテンシをホストごとに記録
+
+        Args:
+            url: 取得先URL
+            **kwargs: session.get に渡す引数(params等)
+
+        Returns:
+            レスポンス
+
+        Raises:
+            requests.RequestException: 通信に失敗した場合・エラー応答の場合
+        """
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        try:
+            with profiling.timer("crawler.fetch"):
+                response = self.session.get(url, timeout=self.timeout, **kwargs)
+                response.raise_for_status()
+        except Exception:
+            prometheus.FETCH_ERRORS.inc(host=host)
+            profiling.count("crawler.errors")
+            raise
+
+        size = len(response.content)
+        prometheus.FETCH_LATENCY.observe(time.perf_counter() - start, host=host)
+        prometheus.PAGES_FETCHED.inc(host=host)
+        prometheus.FETCH_BYTES.inc(size, host=host)
+        profiling.count("crawler.pages")
+        profiling.count("crawler.bytes", size)
+        return response
+
+    def fetch(self, url: str) -> Optional["BeautifulSoup"]:
         """
         URLからコンテンツを取得
 
@@ -41,12 +84,14 @@ class BaseCrawler(ABC):
         Returns:
             BeautifulSoupオブジェクト(失敗時はNone)
         """
+        from bs4 import BeautifulSoup
+
         try:
             logger.info(f"Fetching: {url}")
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+            response = self._get(url)
             time.sleep(self.delay)
-            return BeautifulSoup(response.content, "lxml")
+            with profiling.timer("crawler.parse"):
+                return BeautifulSoup(response.content, "lxml")
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
@@ -61,7 +106,7 @@ class BaseCrawler(ABC):
         """
         pass
 
-    def extract_text(self, soup: BeautifulSoup, selector: str) -> str:
+    def extract_text(self, soup: "BeautifulSoup", selector: str) -> str:
         """
         HTML要素からテキストを抽出
 
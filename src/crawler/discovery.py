@@ -0,0 +1,390 @@
+"""
+文字n-gramの統計による未知語の発見
+
+正規表現では拾えない語(「推し活」「ぴえん超え」のような文字種の混ざった語)を、
+コーパス全体の統計から見つける。テキストを順に流し込み、
+
+- 全ての文字n-gramの出現回数を Count-Min sketch(固定サイズの表)で近似し、
+- 回数の多いn-gramだけを上限件数つきで個別に追跡して(heavy hitters)、左右の隣接文字を数え、
+- 内部の結び付きの強さ(分割点ごとのPMIの最小値)と、境界らしさ(左右の分岐エントロピー)で評価する。
+
+メモリ使用量は表の大きさと追跡件数の上限で決まり、コーパスの大きさによらない。
+状態は save() / load() でファイルに保存し、クロールのたびに積み上げる。
+"""
+
+import json
+import math
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+# 語の一部になりうる文字の連続(句読点・空白・記号で区切る)
+WORD_RUN_PATTERN = re.compile(r"[ぁ-ゖァ-ヺー一-龯々〆A-Za-z0-9Ａ-Ｚａ-ｚ０-９]+")
+
+# 候補にしない語(ひらがなだけの語は助詞・活用語尾の組み合わせがほとんど)
+EXCLUDE_PATTERN = re.compile(r"^(?:[ぁ-ゖー]+|[0-9０-９]+|ー.*)$")
+
+# 助詞で始まる・終わるn-gramは語に助詞が付いた断片
+PARTICLE_EDGE_PATTERN = re.compile(r"^[のにはをがでともやへ]|[のにはをがでともやへ]$")
+
+# 追跡するn-gramごとに数える隣接文字の種類の上限(超えた分は全て別の文字として扱う)
+MAX_NEIGHBORS = 32
+
+FILE_MAGIC = b"NEODICT-NGRAM\x01"
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch(conservative update)
+
+    depth 本の行それぞれで width 個のカウンターの1つに文字列を割り当て、
+    その最小値を出現回数の推定値とする(推定値は真の値以上になる)。
+    ハッシュは CRC32 と Adler-32 の二重ハッシュで、プロセスをまたいでも同じ値になる。
+    """
+
+    def __init__(self, width: int = 1 << 20, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, key: str) -> List[int]:
+        data = key.encode("utf-8")
+        h1 = zlib.crc32(data)
+        h2 = zlib.adler32(data) | 1
+        width = self.width
+        return [(h1 + i * h2) % width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        出現回数を加える
+
+        Returns:
+            加えた後の推定値
+        """
+        indexes = self._indexes(key)
+        rows = self.rows
+        estimate = min(row[index] for row, index in zip(rows, indexes)) + count
+        # 推定値より小さいカウンターだけを引き上げる(過大評価を抑える)
+        for row, index in zip(rows, indexes):
+            if row[index] < estimate:
+                row[index] = min(estimate, 0xFFFFFFFF)
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """出現回数の推定値"""
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+
+class _Neighbors:
+    """隣接文字ごとの回数(種類数に上限あり)"""
+
+    __slots__ = ("counts", "open")
+
+    def __init__(self, counts: Optional[Dict[str, int]] = None, open_count: int = 0):
+        self.counts: Dict[str, int] = counts or {}
+        # 文の境界と、上限を超えた種類の文字の回数(それぞれ別の文字として扱う)
+        self.open = open_count
+
+    def add(self, char: Optional[str]):
+        if char is not None:
+            counts = self.counts
+            if char in counts:
+                counts[char] += 1
+                return
+            if len(counts) < MAX_NEIGHBORS:
+                counts[char] = 1
+                return
+        self.open += 1
+
+    def entropy(self) -> float:
+        """分岐エントロピー(自然対数)"""
+        total = sum(self.counts.values()) + self.open
+        if total == 0:
+            return 0.0
+        entropy = -sum(c / total * math.log(c / total) for c in self.counts.values())
+        # 境界・上限超えは1回ずつ別の文字とみなす
+        if self.open:
+            entropy += self.open / total * math.log(total)
+        return entropy
+
+
+@dataclass
+class Candidate:
+    """新語の候補"""
+    surface: str
+    count: int
+    pmi: float
+    left_entropy: float
+    right_entropy: float
+
+    @property
+    def score(self) -> float:
+        """結び付きの強さと境界らしさの積(大きいほど語らしい)"""
+        return self.pmi * min(self.left_entropy, self.right_entropy)
+
+
+class NgramDiscovery:
+    """
+    文字n-gramの統計による新語の発見
+
+    使い方:
+        discovery = NgramDiscovery.load("discovery.bin")
+        for text in texts:
+            discovery.feed(text)
+        for candidate in discovery.candidates(limit=100):
+            print(candidate.surface, candidate.score)
+        discovery.save("discovery.bin")
+    """
+
+    def __init__(
+        self,
+        max_n: int = 8,
+        width: int = 1 << 20,
+        depth: int = 4,
+        capacity: int = 50000
+    ):
+        """
+        初期化
+
+        Args:
+            max_n: 数えるn-gramの最大長
+            width: Count-Min sketch の1行のカウンター数
+            depth: Count-Min sketch の行数
+            capacity: 個別に追跡するn-gram(2文字以上)の最大数
+        """
+        self.max_n = max_n
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        # 流し込んだ文字数(1-gramの総数)
+        self.total = 0
+        # 追跡中のn-gramの推定回数と左右の隣接文字
+        self.tracked: Dict[str, int] = {}
+        self.left: Dict[str, _Neighbors] = {}
+        self.right: Dict[str, _Neighbors] = {}
+        # 追跡を始めるのに必要な推定回数(追跡件数が上限に達したら引き上げる)
+        self.threshold = 0
+        # 前回 refresh() した候補の照合器
+        self._matcher = None
+        # 複数のクローラー(スケジューラーのソース別ジョブ)から同時に使えるようにする
+        self._lock = threading.Lock()
+
+    def feed(self, text: str):
+        """
+        テキストを流し込む
+
+        Args:
+            text: 対象テキスト
+        """
+        with self._lock:
+            self._feed(text)
+
+    def _feed(self, text: str):
+        sketch = self.sketch
+        tracked = self.tracked
+        max_n = self.max_n
+
+        for match in WORD_RUN_PATTERN.finditer(text):
+            run = match.group(0)
+            length = len(run)
+            self.total += length
+
+            for start in range(length):
+                left_char = run[start - 1] if start > 0 else None
+                for n in range(1, min(max_n, length - start) + 1):
+                    end = start + n
+                    gram = run[start:end]
+                    estimate = sketch.add(gram)
+                    if n == 1:
+                        continue
+
+                    if gram not in tracked:
+                        if estimate <= self.threshold:
+                            continue
+                        self.left[gram] = _Neighbors()
+                        self.right[gram] = _Neighbors()
+                        if len(tracked) >= self.capacity:
+                            self._evict()
+                    tracked[gram] = estimate
+                    self.left[gram].add(left_char)
+                    self.right[gram].add(run[end] if end < length else None)
+
+    def feed_many(self, texts: Iterable[str]):
+        for text in texts:
+            self.feed(text)
+
+    def _evict(self):
+        """推定回数の少ない1割の追跡をやめ、追跡を始める基準をその最大値に上げる"""
+        drop = sorted(self.tracked.items(), key=lambda item: item[1])[: max(self.capacity // 10, 1)]
+        for gram, _ in drop:
+            del self.tracked[gram]
+            del self.left[gram]
+            del self.right[gram]
+        self.threshold = max(self.threshold, drop[-1][1])
+
+    def pmi(self, gram: str) -> float:
+        """分割点ごとの自己相互情報量の最小値(自然対数)"""
+        sketch = self.sketch
+        count = sketch.estimate(gram)
+        if count == 0 or self.total == 0:
+            return 0.0
+        worst = math.inf
+        for split in range(1, len(gram)):
+            left = sketch.estimate(gram[:split])
+            right = sketch.estimate(gram[split:])
+            worst = min(worst, math.log(self.total * count / (left * right)))
+        return worst
+
+    def candidates(
+        self,
+        limit: int = 100,
+        min_count: int = 5,
+        min_pmi: float = 1.0,
+        min_entropy: float = 1.0
+    ) -> List[Candidate]:
+        """
+        新語の候補をスコアの高い順に取得
+
+        Args:
+            limit: 最大取得数
+            min_count: 最小の出現回数
+            min_pmi: 最小のPMI(内部の結び付き)
+            min_entropy: 左右の分岐エントロピーの最小値の下限(境界らしさ)
+
+        Returns:
+            候補のリスト
+        """
+        found = []
+        with self._lock:
+            for gram, count in self.tracked.items():
+                if count < min_count or EXCLUDE_PATTERN.match(gram) or PARTICLE_EDGE_PATTERN.search(gram):
+                    continue
+                left_entropy = self.left[gram].entropy()
+                right_entropy = self.right[gram].entropy()
+                if min(left_entropy, right_entropy) < min_entropy:
+                    continue
+                pmi = self.pmi(gram)
+                if pmi < min_pmi:
+                    continue
+                found.append(Candidate(gram, count, pmi, left_entropy, right_entropy))
+
+        found.sort(key=lambda candidate: (candidate.score, candidate.count), reverse=True)
+        return found[:limit]
+
+    def refresh(self, limit: int = 1000, **thresholds) -> List[Candidate]:
+        """
+        候補を求め直し、find() で使う照合器を作り直す
+
+        Args:
+            limit: 照合に使う候補の最大数
+            **thresholds: candidates() のしきい値
+
+        Returns:
+            候補のリスト
+        """
+        from core.matcher import DictMatcher
+
+        found = self.candidates(limit=limit, **thresholds)
+        self._matcher = DictMatcher(candidate.surface for candidate in found)
+        return found
+
+    def find(self, text: str) -> set:
+        """
+        前回 refresh() した候補のうち、テキストに現れるもの
+
+        Args:
+            text: 対象テキスト
+
+        Returns:
+            候補の表層形の集合(refresh() 前は空)
+        """
+        if self._matcher is None:
+            return set()
+        return {text[start:end] for start, end in self._matcher.iter_matches(text)}
+
+    def save(self, path: str):
+        """
+        状態をファイルに保存(一時ファイルに書いてから置き換える)
+
+        Args:
+            path: 保存先
+        """
+        with self._lock:
+            header = {
+                "max_n": self.max_n,
+                "capacity": self.capacity,
+                "width": self.sketch.width,
+                "depth": self.sketch.depth,
+                "byteorder": sys.byteorder,
+                "total": self.total,
+                "threshold": self.threshold,
+                "tracked": [
+                    [gram, count,
+                     self.left[gram].counts, self.left[gram].open,
+                     self.right[gram].counts, self.right[gram].open]
+                    for gram, count in self.tracked.items()
+                ],
+            }
+            data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+            rows = [row.tobytes() for row in self.sketch.rows]
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(FILE_MAGIC)
+            f.write(struct.pack("<Q", len(data)))
+            f.write(data)
+            for row in rows:
+                f.write(row)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "NgramDiscovery":
+        """
+        保存した状態を読み込む(ファイルがなければ新しく作る)
+
+        Args:
+            path: 保存先
+            **kwargs: ファイルがない場合に __init__ に渡す引数
+
+        Returns:
+            NgramDiscovery
+
+        Raises:
+            ValueError: ファイルの形式が違う場合
+        """
+        if not os.path.exists(path):
+            return cls(**kwargs)
+
+        with open(path, "rb") as f:
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                raise ValueError(f"n-gram統計のファイルではありません: {path}")
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length).decode("utf-8"))
+
+            discovery = cls(
+                max_n=header["max_n"],
+                width=header["width"],
+                depth=header["depth"],
+                capacity=header["capacity"]
+            )
+            rows = []
+            for _ in range(header["depth"]):
+                row = array("I")
+                row.fromfile(f, header["width"])
+                if header["byteorder"] != sys.byteorder:
+                    row.byteswap()
+                rows.append(row)
+            discovery.sketch.rows = rows
+
+        discovery.total = header["total"]
+        discovery.threshold = header["threshold"]
+        for gram, count, left, left_open, right, right_open in header["tracked"]:
+            discovery.tracked[gram] = count
+            discovery.left[gram] = _Neighbors(left, left_open)
+            discovery.right[gram] = _Neighbors(right, right_open)
+        return discovery
@@ -5,6 +5,8 @@
 import re
 from typing import List, Set, Dict
 import logging
+import time
+from metrics import profiling, prometheus
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +35,9 @@ class WordExtractor:
             re.compile(r'^[0-9]+$'),  # 数字のみ
         ]
 
+        # n-gram統計による新語の発見(crawler.discovery.NgramDiscovery、使う場合のみ設定)
+        self.discovery = None
+
     def extract_katakana_words(self, text: str) -> Set[str]:
         """
         カタカナ語を抽出
@@ -109,6 +114,7 @@ class WordExtractor:
 
         return words
 
+    @profiling.timed("extractor.extract_all")
     def extract_all(self, text: str) -> Dict[str, Set[str]]:
         """
         全ての新語候補を抽出
@@ -118,14 +124,26 @@ class WordExtractor:
 
         Returns:
             カテゴリ別の語の辞書
+
+        discovery が設定されている場合は、テキストをn-gram統計に加え、
+        発見済みの候補のうち他のカテゴリにない語を "discovered" として返す。
         """
-        return {
+        start = time.perf_counter()
+        extracted = {
             "katakana": self.extract_katakana_words(text),
             "alphanum": self.extract_alphanum_words(text),
             "proper_nouns": self.extract_proper_nouns(text),
             "kanji_compounds": self.extract_kanji_compounds(text)
         }
 
+        if self.discovery is not None:
+            self.discovery.feed(text)
+            extracted["discovered"] = self.discovery.find(text).difference(*extracted.values())
+
+        prometheus.EXTRACT_SECONDS.inc(time.perf_counter() - start)
+        prometheus.WORDS_EXTRACTED.inc(sum(len(words) for words in extracted.values()))
+        return extracted
+
     def _should_exclude(self, word: str) -> bool:
         """
         除外すべき語かチェック
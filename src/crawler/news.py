@@ -3,6 +3,7 @@
 """
 
 from typing import List, Dict, Optional
+from urllib.parse import urljoin
 import logging
 from .base import BaseCrawler
 from .extractor import WordExtractor
@@ -25,7 +26,8 @@ class NewsCrawler(BaseCrawler):
     def crawl(
         self,
         sources: Optional[List[str]] = None,
-        limit: int = 50
+        limit: int = 50,
+        since: Optional[Dict[str, str]] = None
     ) -> List[Dict]:
         """
         ニュースサイトから新語を収集
@@ -33,6 +35,7 @@ class NewsCrawler(BaseCrawler):
         Args:
             sources: 収集対象のソース(nhk, yahoo等)
             limit: 最大収集数
+            since: ソースごとの前回のウォーターマーク(最新記事のURL)
 
         Returns:
             収集した単語のリスト
@@ -40,38 +43,72 @@ class NewsCrawler(BaseCrawler):
         if sources is None:
             sources = list(self.SOURCES.keys())
 
+        since = since or {}
+        self.watermarks.clear()
         words = []
 
         for source in sources:
             if source in self.SOURCES:
-                words.extend(self._crawl_source(source, limit=limit))
+                words.extend(self._crawl_source(source, limit=limit, since=since.get(source)))
 
         return words
 
-    def _crawl_source(self, source: str, limit: int = 50) -> List[Dict]:
+    def _crawl_source(self, source: str, limit: int = 50, since: Optional[str] = None) -> List[Dict]:
         """
         特定のニュースソースから収集
 
         Args:
             source: ソース名
             limit: 最大収集数
+            since: 前回のウォーターマーク(最新記事のURL)
 
         Returns:
             収集した単語のリスト
         """
         if source == "nhk":
-            return self._crawl_nhk(limit)
+            return self._crawl_nhk(limit, since=since)
         elif source == "yahoo":
-            return self._crawl_yahoo(limit)
+            return self._crawl_yahoo(limit, since=since)
 
         return []
 
-    def _crawl_nhk(self, limit: int = 50) -> List[Dict]:
+    def _take_new_items(self, source: str, items: List, since: Optional[str]) -> List:
+        """
+        新しい順に並んだ記事から、ウォーターマークより新しいものだけを返す
+
+        先頭記事のURLを self.watermarks[source] に記録する。
+
+        Args:
+            source: ソース名
+            items: 記事要素のリスト(新しい順)
+            since: 前回のウォーターマーク(最新記事のURL)
+
+        Returns:
+            ウォーターマークより新しい記事要素のリスト
+        """
+        new_items = []
+
+        for item in items:
+            link = item if item.name == "a" else (item.select_one("a[href]") or item.find_parent("a"))
+            url = urljoin(self.SOURCES[source], link["href"]) if link and link.get("href") else None
+
+            if url and url == since:
+                break
+
+            if url and source not in self.watermarks:
+                self.watermarks[source] = url
+
+            new_items.append(item)
+
+        return new_items
+
+    def _crawl_nhk(self, limit: int = 50, since: Optional[str] = None) -> List[Dict]:
         """
         NHKニュースから収集
 
         Args:
             limit: 最大収集数
+            since: 前回のウォーターマーク(最新記事のURL)
 
         Returns:
             収集した単語のリスト
@@ -85,7 +122,9 @@ class NewsCrawler(BaseCrawler):
             return []
 
         words = []
-        articles = soup.select('article.content--list-item')[:limit]
+        articles = self._take_new_items(
+            "nhk", soup.select('article.content--list-item')[:limit], since
+        )
 
         for article in articles:
             # 見出しとリード文を取得
@@ -114,12 +153,13 @@ class NewsCrawler(BaseCrawler):
         logger.info(f"Collected {len(words)} words from NHK News")
         return words
 
-    def _crawl_yahoo(self, limit: int = 50) -> List[Dict]:
+    def _crawl_yahoo(self, limit: int = 50, since: Optional[str] = None) -> List[Dict]:
         """
         Yahoo!ニュースから収集
 
         Args:
             limit: 最大収集数
+            since: 前回のウォーターマーク(最新記事のURL)
 
         Returns:
             収集した単語のリスト
@@ -134,7 +174,9 @@ class NewsCrawler(BaseCrawler):
 
         words = []
         # トピックスのヘッドラインを収集
-        headlines = soup.select('.newsFeed_item_title')[:limit]
+        headlines = self._take_new_items(
+            "yahoo", soup.select('.newsFeed_item_title')[:limit], since
+        )
 
         for headline in headlines:
             text = headline.get_text(strip=True)
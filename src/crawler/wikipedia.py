@@ -5,6 +5,7 @@ Wikipedia日本語版からのクローラー
 from typing import List, Dict, Optional
 import logging
 import re
+import time
 from .base import BaseCrawler
 from .extractor import WordExtractor
 
@@ -24,7 +25,8 @@ class WikipediaCrawler(BaseCrawler):
         self,
         categories: Optional[List[str]] = None,
         recent_changes: bool = True,
-        limit: int = 100
+        limit: int = 100,
+        since: Optional[str] = None
     ) -> List[Dict]:
         """
         Wikipediaから新語を収集
@@ -33,14 +35,16 @@ class WikipediaCrawler(BaseCrawler):
             categories: 収集対象のカテゴリ
             recent_changes: 最近の更新から収集するか
             limit: 最大収集数
+            since: 前回の最近の更新のウォーターマーク("timestamp|rcid")
 
         Returns:
             収集した単語のリスト
         """
+        self.watermarks.clear()
         words = []
 
         if recent_changes:
-            words.extend(self._crawl_recent_changes(limit=limit))
+            words.extend(self._crawl_recent_changes(limit=limit, since=since))
 
         if categories:
             for category in categories:
@@ -48,29 +52,66 @@ class WikipediaCrawler(BaseCrawler):
 
         return words
 
-    def _crawl_recent_changes(self, limit: int = 100) -> List[Dict]:
+    def _crawl_recent_changes(self, limit: int = 100, since: Optional[str] = None) -> List[Dict]:
         """
         最近の更新ページから新語を収集
 
+        APIで更新日時とrcidを取得し、ウォーターマークより新しい更新のみを対象とする。
+        ウォーターマークがある場合は continue をたどって前回の位置まで全て取得し、
+        取りこぼしなく最新位置を self.watermarks["recentchanges"] に記録する。
+
         Args:
-            limit: 最大収集数
+            limit: 最大収集数(ウォーターマークがある場合は1リクエストあたりの件数)
+            since: 前回のウォーターマーク("timestamp|rcid")
 
         Returns:
             収集した単語のリスト
         """
         logger.info("Crawling Wikipedia recent changes...")
 
-        url = f"{self.BASE_URL}/wiki/Special:RecentChanges"
-        soup = self.fetch(url)
+        params = {
+            "action": "query",
+            "format": "json",
+            "list": "recentchanges",
+            "rcnamespace": 0,
+            "rctype": "new|edit",
+            "rcprop": "title|timestamp|ids",
+            "rclimit": limit
+        }
 
-        if not soup:
+        since_rcid = 0
+        if since:
+            since_timestamp, _, rcid = since.partition("|")
+            # 新しい順に返るため、rcend で前回の時刻までに絞り込む
+            params["rcend"] = since_timestamp
+            since_rcid = int(rcid) if rcid.isdigit() else 0
+
+        changes = []
+        try:
+            while True:
+                response = self._get(f"{self.BASE_URL}/w/api.php", params=params)
+                data = response.json()
+                changes.extend(data.get("query", {}).get("recentchanges", []))
+
+                # 初回(ウォーターマークなし)は最新の limit 件だけを対象とする
+                if not since or "continue" not in data:
+                    break
+                params.update(data["continue"])
+                time.sleep(self.delay)
+        except Exception as e:
+            # 途中で失敗した場合はウォーターマークを進めず、次回に取り直す
+            logger.error(f"Error fetching recent changes: {e}")
             return []
 
         words = []
-        # 新規ページのタイトルを収集
-        for link in soup.select('.mw-changeslist-line a.mw-changeslist-title')[:limit]:
-            title = link.get_text(strip=True)
-            if title:
+        seen = set()
+        for change in changes:
+            if change.get("rcid", 0) <= since_rcid:
+                continue
+
+            title = change.get("title", "").strip()
+            if title and title not in seen:
+                seen.add(title)
                 words.append({
                     "surface": title,
                     "source": "wikipedia",
@@ -78,6 +119,10 @@ class WikipediaCrawler(BaseCrawler):
                     "frequency": 1
                 })
 
+        if changes and changes[0].get("rcid", 0) > since_rcid:
+            latest = changes[0]
+            self.watermarks["recentchanges"] = f"{latest['timestamp']}|{latest['rcid']}"
+
         logger.info(f"Collected {len(words)} words from recent changes")
         return words
 
@@ -205,7 +250,7 @@ class WikipediaCrawler(BaseCrawler):
         }
 
         try:
-            response = self.session.get(api_url, params=params, timeout=self.timeout)
+            response = self._get(api_url, params=params)
             data = response.json()
 
             if "query" in data and "mostviewed" in data["query"]:
@@ -0,0 +1,8 @@
+"""
+NeoDict Metrics Module
+処理時間の計測と指標(Prometheus形式)の出力
+"""
+
+from . import profiling, prometheus
+
+__all__ = ["profiling", "prometheus"]
@@ -0,0 +1,368 @@
+"""
+処理時間の計測(プロファイリング)
+
+名前付きのタイマーとカウンターで、取得・抽出・集計・SQLiteへの書き込みのどこに
+時間がかかっているかを調べる。enable() するまでは何も記録せず、計測箇所の負担は
+モジュール変数の確認1回だけになる。
+
+使い方:
+    from metrics import profiling
+
+    profiling.enable(sinks=[profiling.LoggingSink()])
+
+    with profiling.timer("update.crawl"):
+        ...
+    profiling.count("crawler.pages")
+
+    profiling.disable()  # 集計結果をシンクに渡して計測を止める
+"""
+
+import functools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# code.co_flags のジェネレーター関数のフラグ(inspect の読み込みを避けるため直接持つ)
+CO_GENERATOR = 0x20
+
+# 有効なプロファイラー(None なら計測しない)
+_profiler: Optional["Profiler"] = None
+
+
+class ProfileStats:
+    """タイマー(回数・合計・最大の秒数)とカウンターの集計"""
+
+    def __init__(self):
+        self.timers: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+
+    def add_time(self, name: str, seconds: float):
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+    def add_count(self, name: str, value: int):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict:
+        """
+        集計結果を辞書で取得
+
+        Returns:
+            {"timers": {名前: {count, total_seconds, mean_seconds, max_seconds}},
+             "counters": {名前: 値}}(タイマーは合計時間の長い順)
+        """
+        timers = {}
+        for name, (calls, total, longest) in sorted(
+            self.timers.items(), key=lambda item: item[1][1], reverse=True
+        ):
+            timers[name] = {
+                "count": calls,
+                "total_seconds": round(total, 6),
+                "mean_seconds": round(total / calls, 6),
+                "max_seconds": round(longest, 6),
+            }
+        return {"timers": timers, "counters": dict(sorted(self.counters.items()))}
+
+
+class ProfileSink(ABC):
+    """
+    集計結果の出力先
+
+    Profiler.flush() のたびに emit() が集計結果(ProfileStats.snapshot() の形式)で呼ばれる。
+    """
+
+    @abstractmethod
+    def emit(self, report: Dict):
+        """集計結果を出力"""
+        pass
+
+
+class LoggingSink(ProfileSink):
+    """集計結果をログに出力"""
+
+    def __init__(self, level: int = logging.INFO, logger_name: str = __name__):
+        self.level = level
+        self.logger = logging.getLogger(logger_name)
+
+    def emit(self, report: Dict):
+        for line in format_report(report).splitlines():
+            self.logger.log(self.level, line)
+
+
+class JSONLinesSink(ProfileSink):
+    """集計結果を1行1件のJSONでファイルに追記"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def emit(self, report: Dict):
+        import json
+
+        record = dict(report, timestamp=time.time())
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class Profiler:
+    """
+    タイマーとカウンターを集計し、シンクに渡す
+
+    複数のスレッドから記録してよい。collect() の間は、そこで記録された分を
+    別に集計する(1回の更新の内訳を取るため)。
+    """
+
+    def __init__(self, sinks: Iterable[ProfileSink] = ()):
+        self.stats = ProfileStats()
+        self.sinks: List[ProfileSink] = list(sinks)
+        self._collectors: List[ProfileStats] = []
+        self._lock = threading.Lock()
+
+    def record_time(self, name: str, seconds: float):
+        with self._lock:
+            self.stats.add_time(name, seconds)
+            for stats in self._collectors:
+                stats.add_time(name, seconds)
+
+    def record_count(self, name: str, value: int = 1):
+        with self._lock:
+            self.stats.add_count(name, value)
+            for stats in self._collectors:
+                stats.add_count(name, value)
+
+    @contextmanager
+    def collect(self) -> Iterator[ProfileStats]:
+        """with の間に記録された分だけを集計する ProfileStats を返す"""
+        stats = ProfileStats()
+        with self._lock:
+            self._collectors.append(stats)
+        try:
+            yield stats
+        finally:
+            with self._lock:
+                self._collectors.remove(stats)
+
+    def add_sink(self, sink: ProfileSink):
+        self.sinks.append(sink)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return self.stats.snapshot()
+
+    def flush(self):
+        """これまでの集計結果を全てのシンクに渡す"""
+        report = self.snapshot()
+        for sink in self.sinks:
+            try:
+                sink.emit(report)
+            except Exception as e:
+                logger.error(f"Error emitting profile report: {e}")
+
+    def reset(self):
+        with self._lock:
+            self.stats = ProfileStats()
+
+
+def enable(sinks: Iterable[ProfileSink] = ()) -> Profiler:
+    """
+    計測を開始
+
+    Args:
+        sinks: 集計結果の出力先
+
+    Returns:
+        有効になったプロファイラー
+    """
+    global _profiler
+    _profiler = Profiler(sinks)
+    return _profiler
+
+
+def disable(flush: bool = True) -> Optional[Profiler]:
+    """
+    計測を止める
+
+    Args:
+        flush: 止める前に集計結果をシンクに渡すか
+
+    Returns:
+        止めたプロファイラー(有効でなかった場合はNone)
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None and flush:
+        profiler.flush()
+    return profiler
+
+
+def get_profiler() -> Optional[Profiler]:
+    """有効なプロファイラー(無効ならNone)"""
+    return _profiler
+
+
+def is_enabled() -> bool:
+    return _profiler is not None
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        profiler = _profiler
+        if profiler is not None:
+            profiler.record_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """
+    with で囲んだ区間の時間を name で記録する(無効なら何もしない)
+
+    Args:
+        name: タイマー名("update.crawl" のように「対象.処理」とする)
+    """
+    if _profiler is None:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def count(name: str, value: int = 1):
+    """カウンター name に value を加える(無効なら何もしない)"""
+    profiler = _profiler
+    if profiler is not None:
+        profiler.record_count(name, value)
+
+
+def _timed_iter(name: str, iterator: Iterator) -> Iterator:
+    """ジェネレーターが値を作るのにかかった時間の合計を1回として記録"""
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        iterator.close()
+        profiler = _profiler
+        if profiler is not None:
+            profiler.record_time(name, elapsed)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    関数の実行時間を name で記録するデコレーター
+
+    ジェネレーター関数の場合は、全ての値を取り出すまでの時間(呼び出し側の処理を除く)を記録する。
+    """
+    def decorator(func: Callable) -> Callable:
+        is_generator = bool(func.__code__.co_flags & CO_GENERATOR)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler is None:
+                return func(*args, **kwargs)
+            if is_generator:
+                return _timed_iter(name, func(*args, **kwargs))
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record_time(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument(prefix: str, exclude: Iterable[str] = ()) -> Callable[[type], type]:
+    """
+    クラスの公開メソッド全てに timed("<prefix>.<メソッド名>") を付けるクラスデコレーター
+
+    Args:
+        prefix: タイマー名の接頭辞
+        exclude: 計測しないメソッド名
+    """
+    excluded = set(exclude)
+
+    def decorator(cls: type) -> type:
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or attr in excluded or not callable(value):
+                continue
+            if not hasattr(value, "__code__"):
+                continue
+            setattr(cls, attr, timed(f"{prefix}.{attr}")(value))
+        return cls
+
+    return decorator
+
+
+@contextmanager
+def collect() -> Iterator[Optional[ProfileStats]]:
+    """
+    with の間に記録された分だけを集計する
+
+    無効なときは None を返す。
+
+    使い方:
+        with profiling.collect() as stats:
+            ...
+        report = stats.snapshot() if stats else None
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield None
+        return
+    with profiler.collect() as stats:
+        yield stats
+
+
+def format_report(report: Dict) -> str:
+    """集計結果を表形式の文字列にする"""
+    lines = [f"{'timer':<40} {'count':>8} {'total(s)':>10} {'mean(ms)':>10} {'max(ms)':>10}"]
+    for name, timer_stats in report.get("timers", {}).items():
+        lines.append(
+            f"{name:<40} {timer_stats['count']:>8} {timer_stats['total_seconds']:>10.3f} "
+            f"{timer_stats['mean_seconds'] * 1000:>10.3f} {timer_stats['max_seconds'] * 1000:>10.3f}"
+        )
+    if report.get("counters"):
+        lines.append(f"{'counter':<40} {'value':>8}")
+        for name, value in report["counters"].items():
+            lines.append(f"{name:<40} {value:>8}")
+    return "\n".join(lines)
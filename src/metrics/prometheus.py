@@ -0,0 +1,356 @@
+"""
+Prometheus形式の指標
+
+カウンター・ゲージ・ヒストグラムを登録簿(Registry)に登録し、Prometheus のテキスト形式で
+ローカルのポートから配信するか、node_exporter の textfile collector 用のファイルに書き出す。
+記録はロック1回と辞書の更新だけなので、常に有効のままクロール・書き込みの経路に置いてよい。
+
+使い方:
+    from metrics import prometheus
+
+    prometheus.PAGES_FETCHED.inc(host="ja.wikipedia.org")
+    prometheus.REGISTRY.serve(port=9464)
+    prometheus.REGISTRY.write_textfile("/var/lib/node_exporter/neodict.prom")
+"""
+
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus のクライアントライブラリと同じ既定のバケット(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# 更新のように分単位でかかる処理のバケット(秒)
+LONG_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(ABC):
+    """指標の基底クラス(ラベルの値の組ごとに値を持つ)"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} のラベルは {self.labelnames} です: {tuple(labels)}")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name} のラベルは {self.labelnames} です: {tuple(labels)}") from e
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(指標名, ラベル文字列, 値) のリスト"""
+        pass
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """単調に増える値(取得ページ数、書き込み件数など)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        """
+        値を加える
+
+        Args:
+            value: 加える値(負の値は不可)
+            **labels: ラベルの値
+        """
+        if value < 0:
+            raise ValueError("カウンターは減らせません")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in values]
+
+
+class Gauge(_Metric):
+    """増減する値(辞書の語数、最終更新時刻など)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in values]
+
+
+class Histogram(_Metric):
+    """値の分布(取得のレイテンシ、更新の所要時間など)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # ラベルの値の組 -> [バケットごとの件数..., +Infの件数, 合計]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """
+        値を1件記録
+
+        Args:
+            value: 記録する値
+            **labels: ラベルの値
+        """
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def get_count(self, **labels) -> int:
+        with self._lock:
+            counts = self._values.get(self._key(labels))
+            return int(sum(counts[:-1])) if counts else 0
+
+    def get_sum(self, **labels) -> float:
+        with self._lock:
+            counts = self._values.get(self._key(labels))
+            return counts[-1] if counts else 0.0
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = sorted((key, list(counts)) for key, counts in self._values.items())
+
+        samples = []
+        bounds = self.buckets + (math.inf,)
+        for key, counts in values:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append((f"{self.name}_sum", labels, counts[-1]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """指標の登録簿"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        指標を登録(同じ名前・同じ種類の指標が登録済みならそれを返す)
+
+        Raises:
+            ValueError: 同じ名前で種類の異なる指標が登録済みの場合
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"指標 {metric.name} は {existing.kind} として登録済みです")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """全ての指標を Prometheus のテキスト形式(0.0.4)で出力"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+    def write_textfile(self, path: str):
+        """
+        textfile collector 用のファイルに書き出す
+
+        収集側が書きかけのファイルを読まないよう、一時ファイルに書いてから置き換える。
+
+        Args:
+            path: 出力先(拡張子は .prom)
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> "MetricsServer":
+        """
+        指標を配信するHTTPサーバーを別スレッドで起動
+
+        Args:
+            port: 待ち受けるポート(0なら空いているポート)
+            host: 待ち受けるアドレス
+
+        Returns:
+            起動したサーバー(stop() で停止)
+        """
+        server = MetricsServer(self, host, port)
+        server.start()
+        return server
+
+
+class MetricsServer:
+    """GET /metrics に登録簿の内容を返すHTTPサーバー"""
+
+    def __init__(self, registry: Registry, host: str = "127.0.0.1", port: int = 9464):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="neodict-metrics", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# 既定の登録簿と NeoDict の指標
+REGISTRY = Registry()
+
+PAGES_FETCHED = REGISTRY.counter(
+    "neodict_pages_fetched_total", "Pages fetched by the crawlers", ["host"]
+)
+FETCH_ERRORS = REGISTRY.counter(
+    "neodict_fetch_errors_total", "Failed page fetches", ["host"]
+)
+FETCH_BYTES = REGISTRY.counter(
+    "neodict_fetch_bytes_total", "Response bytes fetched by the crawlers", ["host"]
+)
+FETCH_LATENCY = REGISTRY.histogram(
+    "neodict_fetch_duration_seconds", "Page fetch latency", ["host"]
+)
+WORDS_EXTRACTED = REGISTRY.counter(
+    "neodict_words_extracted_total", "Candidate words extracted from text (rate() gives words/s)"
+)
+EXTRACT_SECONDS = REGISTRY.counter(
+    "neodict_extract_seconds_total", "Time spent extracting candidate words"
+)
+DB_UPSERTS = REGISTRY.counter(
+    "neodict_db_upserts_total", "Words inserted or updated by dictionary updates", ["op"]
+)
+UPDATES = REGISTRY.counter(
+    "neodict_updates_total", "Dictionary update runs", ["result"]
+)
+UPDATE_DURATION = REGISTRY.histogram(
+    "neodict_update_duration_seconds", "Dictionary update duration", buckets=LONG_BUCKETS
+)
+LAST_UPDATE = REGISTRY.gauge(
+    "neodict_last_update_timestamp_seconds", "Unix time of the last successful update"
+)
+DICTIONARY_WORDS = REGISTRY.gauge(
+    "neodict_dictionary_words", "Number of words in the dictionary"
+)
@@ -0,0 +1,8 @@
+"""
+NeoDict Server Module
+辞書を引くローカルHTTPサービス
+"""
+
+from .app import LookupServer
+
+__all__ = ["LookupServer"]
@@ -0,0 +1,252 @@
+"""
+asyncioによる辞書検索HTTPサーバー
+
+NeoDict を1回だけ構築し、AsyncNeoDict のスレッドプール(スレッドごとに読み込み専用の接続)で
+問い合わせる。同時に届いた /word 要求は1回の get_words にまとめ、HTTP/1.1 の keep-alive で
+接続を使い回す。
+"""
+
+import asyncio
+import json
+import logging
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from core import NeoDict
+from core.aio import AsyncNeoDict
+
+logger = logging.getLogger(__name__)
+
+# ヘッダーの最大サイズ
+MAX_HEADER_BYTES = 64 * 1024
+
+# リクエストボディの最大サイズ
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+# /lookup で1回に引ける最大語数
+MAX_LOOKUP_SURFACES = 10000
+
+# 何も送られてこない keep-alive 接続を閉じるまでの秒数
+KEEP_ALIVE_TIMEOUT = 15.0
+
+
+class HTTPError(Exception):
+    """エラー応答として返す例外"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class LookupServer:
+    """
+    辞書検索HTTPサーバー
+
+    エンドポイント:
+        GET  /word?surface=...              1語を取得
+        GET  /search?q=...&fuzzy=1&limit=N  検索
+        GET  /prefix?q=...&limit=N          前方一致検索
+        POST /lookup {"surfaces": [...]}    複数語をまとめて取得
+        GET  /health                        死活確認
+    """
+
+    def __init__(
+        self,
+        dict_instance: Optional[NeoDict] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        workers: int = 4
+    ):
+        """
+        初期化
+
+        Args:
+            dict_instance: 検索対象の辞書(省略時は既定の辞書を読み込み専用で開く)
+            host: 待ち受けるアドレス
+            port: 待ち受けるポート(0なら空いているポート)
+            workers: 問い合わせを行うスレッド数(スレッドごとに接続を持つ)
+        """
+        self.dict = dict_instance or NeoDict(read_only=True)
+        self.host = host
+        self.port = port
+        self.workers = workers
+
+        self._async_dict: Optional[AsyncNeoDict] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> Tuple[str, int]:
+        """
+        待ち受けを開始
+
+        Returns:
+            実際に待ち受けている (アドレス, ポート)
+        """
+        self._async_dict = AsyncNeoDict(self.dict, max_workers=self.workers)
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        self.host, self.port = self._server.sockets[0].getsockname()[:2]
+        logger.info(f"Serving on http://{self.host}:{self.port}")
+        return self.host, self.port
+
+    async def serve_forever(self):
+        """待ち受けを開始して停止されるまで処理する"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """待ち受けを停止"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._async_dict is not None:
+            await self._async_dict.close()
+            self._async_dict = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), timeout=KEEP_ALIVE_TIMEOUT
+                    )
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                      {"error": "header too large"}, keep_alive=False)
+                    return
+
+                method, target, version, headers = self._parse_head(head)
+                keep_alive = self._keep_alive(version, headers)
+
+                body = b""
+                length = self._content_length(headers)
+                if length is None:
+                    await self._write(writer, HTTPStatus.BAD_REQUEST,
+                                      {"error": "invalid content-length"}, keep_alive=False)
+                    return
+                if length > MAX_BODY_BYTES:
+                    await self._write(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                      {"error": "body too large"}, keep_alive=False)
+                    return
+                if length:
+                    body = await reader.readexactly(length)
+
+                try:
+                    status, payload = HTTPStatus.OK, await self._dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception:
+                    logger.exception(f"Request failed: {method} {target}")
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+
+                await self._write(writer, status, payload, keep_alive=keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            method, target, version = "GET", "/", "HTTP/1.0"
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, version, headers
+
+    @staticmethod
+    def _content_length(headers: Dict[str, str]) -> Optional[int]:
+        """Content-Length の値(不正な値なら None)"""
+        value = headers.get("content-length", "").strip() or "0"
+        if not value.isascii() or not value.isdigit():
+            return None
+        return int(value)
+
+    @staticmethod
+    def _keep_alive(version: str, headers: Dict[str, str]) -> bool:
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, status: HTTPStatus, payload, keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+        writer.write(head + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/health":
+            return {"status": "ok"}
+
+        if url.path == "/lookup":
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST")
+            try:
+                surfaces = json.loads(body.decode("utf-8"))["surfaces"]
+            except (ValueError, KeyError, TypeError):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, 'body must be {"surfaces": [...]}')
+            if not isinstance(surfaces, list) or len(surfaces) > MAX_LOOKUP_SURFACES:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"surfaces must be a list of at most {MAX_LOOKUP_SURFACES}")
+            return {"words": await self._async_dict.get_words([str(s) for s in surfaces])}
+
+        if method != "GET":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+
+        if url.path == "/word":
+            surface = self._required(params, "surface")
+            word = await self._async_dict.get_word(surface)
+            if word is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"not found: {surface}")
+            return word
+
+        if url.path == "/search":
+            query = self._required(params, "q")
+            fuzzy = params.get("fuzzy", "0") in ("1", "true")
+            limit = self._limit(params)
+            return {"results": await self._async_dict.search(query, fuzzy, limit)}
+
+        if url.path == "/prefix":
+            prefix = self._required(params, "q")
+            return {"results": await self._async_dict.search_prefix(prefix, self._limit(params))}
+
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"unknown path: {url.path}")
+
+    @staticmethod
+    def _required(params: Dict[str, str], name: str) -> str:
+        value = params.get(name)
+        if not value:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"missing parameter: {name}")
+        return value
+
+    @staticmethod
+    def _limit(params: Dict[str, str]) -> int:
+        try:
+            return max(1, min(int(params.get("limit", "100")), 1000))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "limit must be an integer")
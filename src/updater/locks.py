@@ -0,0 +1,56 @@
+"""
+プロセス間の排他に使うロックファイル
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class JobLock:
+    """
+    ロックファイル(fcntl.flock)
+
+    別のプロセス・別のスレッドが同じファイルのロックを持っている間は取得できない。
+    スケジューラーのジョブごとのロックと、DictUpdater のソースごとのロックに使う。
+    fcntl のない環境ではプロセス間の排他を行わない。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+
+    def acquire(self) -> bool:
+        """
+        ロックを取得(待たない)
+
+        Returns:
+            取得できた場合True
+        """
+        if fcntl is None:
+            return True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{datetime.now().isoformat()}\n")
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
@@ -1,31 +1,290 @@
 """
 自動更新のスケジューラー
+
+ジョブ(名前・処理・実行時刻の規則)をスケジューラーごとの登録簿に持ち、期限の来た
+ジョブをスレッドプールで実行する。ソースごとに別のジョブにすれば、時間のかかる
+Wikipediaのクロール中もニュースの更新は予定どおり動く。
+
+メインループは次回実行時刻の順に並べたヒープの先頭の時刻まで条件変数で眠り、
+stop()・run_now()・ジョブの追加や時刻の変更があればすぐに起きる。
 """
 
-import schedule
-import time
+import heapq
+import itertools
 import logging
-from datetime import datetime
-from typing import Optional, Callable
-from threading import Thread
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Condition, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import prometheus
+from .locks import JobLock
 from .updater import DictUpdater
 
 logger = logging.getLogger(__name__)
 
+# 実行中のジョブの期限が来たときの扱い
+#   skip: 今回の実行を捨てる
+#   queue: 実行中の回が終わった後に、来た回数だけ順に実行する
+#   coalesce: 実行中の回が終わった後に、まとめて1回だけ実行する
+OVERLAP_POLICIES = ("skip", "queue", "coalesce")
+
+# メインループが1回に眠る最大秒数(システム時刻の変更に追従するため)
+MAX_SLEEP_SECONDS = 300
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class IntervalTrigger:
+    """一定間隔"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("間隔は0より大きくしてください")
+        self.interval = timedelta(seconds=seconds)
+
+    def next_run(self, after: datetime) -> datetime:
+        return after + self.interval
+
+    def __repr__(self) -> str:
+        return f"every {self.interval.total_seconds():g}s"
+
+
+class DailyTrigger:
+    """毎日 hour:minute"""
+
+    def __init__(self, hour: int = 3, minute: int = 0):
+        self.hour = hour
+        self.minute = minute
+
+    def next_run(self, after: datetime) -> datetime:
+        candidate = after.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if candidate <= after:
+            candidate += timedelta(days=1)
+        return candidate
+
+    def __repr__(self) -> str:
+        return f"daily at {self.hour:02d}:{self.minute:02d}"
+
+
+class HourlyTrigger:
+    """毎時 minute 分"""
+
+    def __init__(self, minute: int = 0):
+        self.minute = minute
+
+    def next_run(self, after: datetime) -> datetime:
+        candidate = after.replace(minute=self.minute, second=0, microsecond=0)
+        if candidate <= after:
+            candidate += timedelta(hours=1)
+        return candidate
+
+    def __repr__(self) -> str:
+        return f"hourly at :{self.minute:02d}"
+
+
+class WeeklyTrigger:
+    """毎週 day の hour:minute"""
+
+    def __init__(self, day: str = "monday", hour: int = 3, minute: int = 0):
+        if day not in WEEKDAYS:
+            raise ValueError(f"曜日は {', '.join(WEEKDAYS)} のいずれかです: {day}")
+        self.day = day
+        self.hour = hour
+        self.minute = minute
+
+    def next_run(self, after: datetime) -> datetime:
+        candidate = after.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        candidate += timedelta(days=(WEEKDAYS.index(self.day) - after.weekday()) % 7)
+        if candidate <= after:
+            candidate += timedelta(days=7)
+        return candidate
+
+    def __repr__(self) -> str:
+        return f"weekly on {self.day} at {self.hour:02d}:{self.minute:02d}"
+
+
+class Job:
+    """スケジュールされた1つの処理"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Dict],
+        trigger=None,
+        overlap: str = "skip",
+        lock: Optional[JobLock] = None
+    ):
+        """
+        初期化
+
+        Args:
+            name: ジョブ名
+            func: 実行する処理(結果の辞書を返す)
+            trigger: 実行時刻の規則(None なら run_now() でのみ実行する)
+            overlap: 実行中に期限が来たときの扱い(skip, queue, coalesce)
+            lock: プロセス間で排他するためのロックファイル
+        """
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"overlap は {', '.join(OVERLAP_POLICIES)} のいずれかです: {overlap}")
+
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.overlap = overlap
+        self.lock = lock
+        self.next_run: Optional[datetime] = None
+
+        # ヒープ上の有効な項目の通し番号(時刻を変えたら古い項目は無視する)
+        self.heap_seq: Optional[int] = None
+
+        # 実行中か、実行中の回の後に待っている回の Future
+        self.running = False
+        self.waiting: List[Future] = []
+
+        self.last_run: Optional[datetime] = None
+        self.last_result: Optional[Dict] = None
+
+    def reschedule(self, after: datetime):
+        """after より後の次回実行時刻を設定"""
+        self.next_run = self.trigger.next_run(after) if self.trigger is not None else None
+
+    def __repr__(self) -> str:
+        return f"Job({self.name!r}, {self.trigger!r}, overlap={self.overlap!r}, next_run={self.next_run})"
+
 
 class UpdateScheduler:
     """辞書の自動更新をスケジュール"""
 
-    def __init__(self, updater: Optional[DictUpdater] = None):
+    def __init__(
+        self,
+        updater: Optional[DictUpdater] = None,
+        metrics_port: Optional[int] = None,
+        metrics_textfile: Optional[str] = None,
+        workers: int = 4,
+        lock_dir: Optional[str] = None
+    ):
         """
         初期化
 
+        全ソースを更新するジョブ "update" を実行時刻なしで登録する
+        (schedule_daily などで時刻を設定するか、run_now() で実行する)。
+
         Args:
             updater: 使用するDictUpdaterインスタンス
+            metrics_port: 指標(Prometheus形式)を配信するポート(省略時は配信しない)
+            metrics_textfile: 更新のたびに指標を書き出すファイル(textfile collector 用)
+            workers: 同時に実行するジョブの最大数
+            lock_dir: ジョブのロックファイルを置くディレクトリ(省略時は辞書ファイルと同じ場所、
+                インメモリの辞書ではプロセス間の排他を行わない)。同じジョブを別のプロセスの
+                スケジューラーと同時に実行しないためのもので、ソースごとの排他(cron から
+                起動した neodict update や、同じソースを含む別のジョブとの排他)は
+                DictUpdater.update() が行う
         """
         self.updater = updater or DictUpdater()
         self.running = False
         self.thread: Optional[Thread] = None
+        self.metrics_port = metrics_port
+        self.metrics_textfile = metrics_textfile
+        self.metrics_server: Optional[prometheus.MetricsServer] = None
+        self.workers = workers
+
+        if lock_dir is None:
+            lock_dir = self._default_lock_dir(self.updater)
+        self.lock_dir = Path(lock_dir) if lock_dir else None
+
+        self.jobs: Dict[str, Job] = {}
+        # (次回実行時刻, 通し番号, ジョブ)のヒープ。先頭は常に有効な項目にしておく
+        self._heap: List[Tuple[datetime, int, Job]] = []
+        self._seq = itertools.count()
+        self._lock = Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.add_job("update", self._update_job)
+
+    @staticmethod
+    def _default_lock_dir(updater: DictUpdater) -> Optional[Path]:
+        """辞書ファイルのあるディレクトリ(インメモリの辞書ならNone)"""
+        storage = getattr(getattr(updater, "dict", None), "storage", None)
+        db_path = getattr(storage, "db_path", None)
+        if db_path is None or str(db_path) == ":memory:":
+            return None
+        return Path(db_path).parent
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Dict],
+        trigger=None,
+        overlap: str = "skip"
+    ) -> Job:
+        """
+        ジョブを登録
+
+        Args:
+            name: ジョブ名(スケジューラー内で一意)
+            func: 実行する処理(結果の辞書を返す)
+            trigger: 実行時刻の規則(IntervalTrigger など、None なら run_now() でのみ実行する)
+            overlap: 実行中に期限が来たときの扱い(skip, queue, coalesce)
+
+        Returns:
+            登録したジョブ
+
+        Raises:
+            ValueError: 同じ名前のジョブが登録済みの場合、overlap が不正な場合
+        """
+        lock = None
+        if self.lock_dir is not None:
+            lock = JobLock(self.lock_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}.lock")
+
+        job = Job(name, func, trigger, overlap, lock)
+
+        with self._lock:
+            if name in self.jobs:
+                raise ValueError(f"ジョブ {name} は登録済みです")
+            self.jobs[name] = job
+            self._reschedule(job, datetime.now())
+
+        logger.info(f"Registered job {job}")
+        return job
+
+    def remove_job(self, name: str):
+        """ジョブを削除(実行中の回は最後まで実行される)"""
+        with self._lock:
+            job = self.jobs.pop(name, None)
+            if job is not None:
+                job.heap_seq = None
+                self._prune_heap()
+
+    def _set_trigger(self, name: str, trigger):
+        job = self.jobs[name]
+        with self._lock:
+            job.trigger = trigger
+            self._reschedule(job, datetime.now())
+        logger.info(f"Scheduled {job}")
+
+    def _reschedule(self, job: Job, after: datetime):
+        """
+        次回実行時刻を設定してヒープに積み、メインループを起こす
+
+        self._lock を取った状態で呼ぶ。
+        """
+        job.reschedule(after)
+        if job.next_run is None:
+            job.heap_seq = None
+        else:
+            job.heap_seq = next(self._seq)
+            heapq.heappush(self._heap, (job.next_run, job.heap_seq, job))
+        self._prune_heap()
+        self._lock.notify_all()
+
+    def _prune_heap(self):
+        """先頭の無効な項目(削除・時刻変更したジョブの古い項目)を取り除く"""
+        heap = self._heap
+        while heap and heap[0][2].heap_seq != heap[0][1]:
+            heapq.heappop(heap)
 
     def schedule_daily(self, hour: int = 3, minute: int = 0):
         """
@@ -35,11 +294,7 @@ class UpdateScheduler:
             hour: 実行時(0-23)
             minute: 実行分(0-59)
         """
-        time_str = f"{hour:02d}:{minute:02d}"
-
-        schedule.every().day.at(time_str).do(self._update_job)
-
-        logger.info(f"Scheduled daily update at {time_str}")
+        self._set_trigger("update", DailyTrigger(hour, minute))
 
     def schedule_hourly(self, minute: int = 0):
         """
@@ -48,9 +303,7 @@ class UpdateScheduler:
         Args:
             minute: 実行分(0-59)
         """
-        schedule.every().hour.at(f":{minute:02d}").do(self._update_job)
-
-        logger.info(f"Scheduled hourly update at minute {minute}")
+        self._set_trigger("update", HourlyTrigger(minute))
 
     def schedule_weekly(self, day: str = "monday", hour: int = 3, minute: int = 0):
         """
@@ -61,11 +314,7 @@ class UpdateScheduler:
             hour: 実行時(0-23)
             minute: 実行分(0-59)
         """
-        time_str = f"{hour:02d}:{minute:02d}"
-
-        getattr(schedule.every(), day).at(time_str).do(self._update_job)
-
-        logger.info(f"Scheduled weekly update on {day} at {time_str}")
+        self._set_trigger("update", WeeklyTrigger(day, hour, minute))
 
     def schedule_custom(self, interval_minutes: int):
         """
@@ -74,9 +323,30 @@ class UpdateScheduler:
         Args:
             interval_minutes: 更新間隔(分)
         """
-        schedule.every(interval_minutes).minutes.do(self._update_job)
+        self._set_trigger("update", IntervalTrigger(interval_minutes * 60))
 
-        logger.info(f"Scheduled update every {interval_minutes} minutes")
+    def schedule_source(self, source: str, interval_minutes: float, overlap: str = "coalesce") -> Job:
+        """
+        ソースごとの更新ジョブ("update:<ソース>")を一定間隔でスケジュール
+
+        ジョブごとに別のアップデーター(辞書の接続・クローラー)を使うため、
+        他のソースの更新と並行に実行される。
+
+        Args:
+            source: 更新元(wikipedia, news)
+            interval_minutes: 更新間隔(分)
+            overlap: 前回の更新が終わらないうちに期限が来たときの扱い
+
+        Returns:
+            登録したジョブ
+        """
+        updater = self.updater.for_sources([source])
+        return self.add_job(
+            f"update:{source}",
+            lambda: self._run_update(updater),
+            IntervalTrigger(interval_minutes * 60),
+            overlap
+        )
 
     def start(self, blocking: bool = False):
         """
@@ -92,6 +362,10 @@ class UpdateScheduler:
         self.running = True
         logger.info("Starting scheduler...")
 
+        if self.metrics_port is not None and self.metrics_server is None:
+            self.metrics_server = prometheus.REGISTRY.serve(port=self.metrics_port)
+            logger.info(f"Serving metrics on port {self.metrics_server.port}")
+
         if blocking:
             self._run_scheduler()
         else:
@@ -99,44 +373,172 @@ class UpdateScheduler:
             self.thread.start()
 
     def stop(self):
-        """スケジューラーを停止"""
+        """スケジューラーを停止(実行中のジョブは最後まで実行され、待っている回は取り消す)"""
         logger.info("Stopping scheduler...")
-        self.running = False
+        with self._lock:
+            self.running = False
+            self._lock.notify_all()
 
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=5)
 
-    def run_now(self) -> Dict:
+        with self._lock:
+            for job in self.jobs.values():
+                for future in job.waiting:
+                    future.cancel()
+                job.waiting.clear()
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def run_now(self, name: str = "update", wait: bool = True):
         """
-        即座に更新を実行
+        ジョブを即座に実行
+
+        実行中の場合はジョブの overlap の扱いに従う(skip なら実行しない)。
+
+        Args:
+            name: ジョブ名(省略時は全ソースの更新)
+            wait: 終わるまで待って結果を返すか(False なら Future を返す)
 
         Returns:
-            更新結果の統計
+            ジョブの結果(wait=False の場合は Future)
+
+        Raises:
+            KeyError: ジョブが登録されていない場合
         """
-        return self._update_job()
+        future = self._dispatch(self.jobs[name])
+        with self._lock:
+            self._lock.notify_all()
+        return future.result() if wait else future
+
+    def run_pending(self):
+        """期限の来たジョブを全て実行に回す"""
+        now = datetime.now()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, job = heapq.heappop(self._heap)
+                if job.heap_seq != seq:
+                    continue
+                due.append(job)
+                self._reschedule(job, now)
+            self._prune_heap()
+
+        for job in due:
+            self._dispatch(job)
 
     def _run_scheduler(self):
-        """スケジューラーのメインループ"""
+        """スケジューラーのメインループ(次のジョブの期限まで眠る)"""
         while self.running:
-            schedule.run_pending()
-            time.sleep(1)
+            self.run_pending()
+
+            with self._lock:
+                if not self.running:
+                    break
+                timeout = MAX_SLEEP_SECONDS
+                if self._heap:
+                    timeout = min(timeout, (self._heap[0][0] - datetime.now()).total_seconds())
+                if timeout > 0:
+                    self._lock.wait(timeout)
+
+    def _dispatch(self, job: Job) -> Future:
+        """
+        ジョブをスレッドプールに渡す(実行中なら overlap の扱いに従う)
+
+        Returns:
+            今回の実行の結果を受け取る Future
+        """
+        future: Future = Future()
+
+        with self._lock:
+            if not job.running:
+                job.running = True
+                self._submit(job, future)
+                return future
+
+            if job.overlap == "skip":
+                logger.warning(f"Job {job.name} is still running, skipping this run")
+                future.set_result({"job": job.name, "skipped": True, "reason": "running"})
+                return future
+
+            if job.overlap == "coalesce" and job.waiting:
+                return job.waiting[0]
+
+            job.waiting.append(future)
+            return future
+
+    def _submit(self, job: Job, future: Future):
+        """self._lock を取った状態で呼ぶ"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="neodict-job")
+        self._executor.submit(self._execute, job, future)
+
+    def _execute(self, job: Job, future: Future):
+        """ワーカースレッドでジョブを1回実行し、待っている回があれば続けて実行に回す"""
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+
+            if job.lock is not None and not job.lock.acquire():
+                logger.warning(f"Job {job.name} is running in another process, skipping this run")
+                future.set_result({"job": job.name, "skipped": True, "reason": "locked"})
+                return
+
+            try:
+                logger.info(f"Running job {job.name} at {datetime.now()}")
+                job.last_run = datetime.now()
+                result = job.func()
+                job.last_result = result
+                future.set_result(result)
+            except Exception as e:
+                logger.error(f"Error in job {job.name}: {e}", exc_info=True)
+                future.set_exception(e)
+            finally:
+                if job.lock is not None:
+                    job.lock.release()
+        finally:
+            with self._lock:
+                if job.waiting and self._executor is not None:
+                    self._submit(job, job.waiting.pop(0))
+                else:
+                    job.running = False
 
     def _update_job(self) -> Dict:
-        """更新ジョブを実行"""
-        logger.info(f"Running scheduled update at {datetime.now()}")
+        """全ソースの更新ジョブを実行"""
+        return self._run_update(self.updater)
 
+    def _run_update(self, updater: DictUpdater) -> Dict:
+        """更新を実行(失敗してもエラーの内容を結果として返す)"""
         try:
-            stats = self.updater.update()
+            stats = updater.update()
             logger.info(f"Update completed: {stats}")
-            return stats
 
         except Exception as e:
             logger.error(f"Error during update: {e}", exc_info=True)
-            return {
+            stats = {
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
             }
 
+        self._write_metrics()
+        return stats
+
+    def _write_metrics(self):
+        """指標をファイルに書き出す(metrics_textfile が指定されている場合)"""
+        if not self.metrics_textfile:
+            return
+
+        try:
+            prometheus.REGISTRY.write_textfile(self.metrics_textfile)
+        except OSError as e:
+            logger.error(f"Error writing metrics to {self.metrics_textfile}: {e}")
+
     def get_next_run(self) -> Optional[datetime]:
         """
         次の実行時刻を取得
@@ -144,9 +546,5 @@ class UpdateScheduler:
         Returns:
             次の実行予定時刻(スケジュールされていない場合はNone)
         """
-        jobs = schedule.jobs
-        if jobs:
-            next_job = min(jobs, key=lambda j: j.next_run)
-            return next_job.next_run
-
-        return None
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
@@ -3,10 +3,15 @@
 """
 
 import logging
-from typing import List, Dict, Set
+import re
+import time
+from pathlib import Path
+from typing import List, Dict, Set, Optional
 from datetime import datetime
-from ..core import NeoDict, WordEntry, Word, PartOfSpeech, WordSource
-from ..crawler import WikipediaCrawler, NewsCrawler
+from core import NeoDict, WordEntry, Word, PartOfSpeech, WordSource
+from crawler import WikipediaCrawler, NewsCrawler
+from metrics import profiling, prometheus
+from .locks import JobLock
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +23,13 @@ class DictUpdater:
         self,
         dict_instance: NeoDict = None,
         sources: List[str] = None,
-        min_frequency: int = 2
+        min_frequency: int = 2,
+        reading_workers: int = 1,
+        discovery_path: Optional[str] = None,
+        min_sources: int = 1,
+        candidate_ttl_days: int = 30,
+        max_candidates: int = 200000,
+        lock_dir: Optional[str] = None
     ):
         """
         初期化
@@ -26,102 +37,396 @@ class DictUpdater:
         Args:
             dict_instance: 更新対象の辞書
             sources: 更新元のリスト
-            min_frequency: 辞書に追加する最小頻度
+            min_frequency: 辞書に追加する最小頻度(更新をまたいで積み上げた候補の出現回数)
+            reading_workers: 読み推定に使うプロセス数
+            discovery_path: n-gram統計の保存先(指定した場合はクロールしたテキストから
+                統計的に新語を発見する。crawler.discovery を参照)
+            min_sources: 辞書に追加するのに必要な出現元の数
+            candidate_ttl_days: この日数現れていない候補を削除
+            max_candidates: 候補の最大数(超えた分は出現回数の少ない順に削除)
+            lock_dir: ソースごとのロックファイルを置くディレクトリ(省略時は辞書ファイルと
+                同じ場所、インメモリの辞書ではプロセス間の排他を行わない)
         """
         self.dict = dict_instance or NeoDict()
         self.sources = sources or ["wikipedia", "news"]
         self.min_frequency = min_frequency
+        self.reading_workers = reading_workers
+        self.discovery_path = discovery_path
+        self._discovery = None
+        self.min_sources = min_sources
+        self.candidate_ttl_days = candidate_ttl_days
+        self.max_candidates = max_candidates
+        self.lock_dir = lock_dir
+
+        # クローラー(HTTPセッション)はクロールするときまで作らない
+        self._wikipedia_crawler: Optional[WikipediaCrawler] = None
+        self._news_crawler: Optional[NewsCrawler] = None
+
+    @property
+    def wikipedia_crawler(self) -> WikipediaCrawler:
+        """Wikipediaクローラー(初回アクセス時に生成)"""
+        if self._wikipedia_crawler is None:
+            self._wikipedia_crawler = WikipediaCrawler()
+        return self._wikipedia_crawler
+
+    @wikipedia_crawler.setter
+    def wikipedia_crawler(self, crawler: WikipediaCrawler):
+        self._wikipedia_crawler = crawler
+
+    @property
+    def news_crawler(self) -> NewsCrawler:
+        """ニュースクローラー(初回アクセス時に生成)"""
+        if self._news_crawler is None:
+            self._news_crawler = NewsCrawler()
+        return self._news_crawler
+
+    @news_crawler.setter
+    def news_crawler(self, crawler: NewsCrawler):
+        self._news_crawler = crawler
+
+    @property
+    def discovery(self):
+        """n-gram統計(discovery_path を指定した場合のみ、初回アクセス時に読み込む)"""
+        if self._discovery is None and self.discovery_path:
+            from crawler.discovery import NgramDiscovery
+
+            self._discovery = NgramDiscovery.load(self.discovery_path)
+            self._discovery.refresh()
+        return self._discovery
+
+    def for_sources(self, sources: List[str]) -> "DictUpdater":
+        """
+        指定したソースだけを更新するアップデーターを作成
+
+        別スレッドで並行に更新できるよう、同じ辞書ファイルを別の NeoDict
+        (接続・キャッシュ・形態素解析器を共有しない)で開き、クローラーも別に持つ。
+        インメモリの辞書は開き直せないため、同じ NeoDict を使う。
+
+        Args:
+            sources: 更新元のリスト
+
+        Returns:
+            新しい DictUpdater
+        """
+        storage = self.dict.storage
+        if str(storage.db_path) == ":memory:":
+            dict_instance = self.dict
+        else:
+            dict_instance = NeoDict(
+                db_path=str(storage.db_path), shards=getattr(storage, "num_shards", 1)
+            )
 
-        self.wikipedia_crawler = WikipediaCrawler()
-        self.news_crawler = NewsCrawler()
+        updater = DictUpdater(
+            dict_instance=dict_instance,
+            sources=list(sources),
+            min_frequency=self.min_frequency,
+            reading_workers=self.reading_workers,
+            discovery_path=self.discovery_path,
+            min_sources=self.min_sources,
+            candidate_ttl_days=self.candidate_ttl_days,
+            max_candidates=self.max_candidates,
+            lock_dir=self.lock_dir
+        )
+        # n-gram統計は全ソースで積み上げるため共有する(NgramDiscovery はスレッドセーフ)
+        updater._discovery = self.discovery
+        return updater
 
     def update(self, full_update: bool = False) -> Dict:
         """
         辞書を更新
 
+        差分更新ではソースごとのウォーターマーク(前回確認した最新位置)より
+        新しいものだけを取得する。全更新ではウォーターマークをリセットする。
+
+        同じソースを更新中の別のプロセス・スレッド(cron から起動した neodict update、
+        スケジューラーのソース別のジョブなど)があれば、ソースごとのロックファイルが
+        取れないため更新せずに {"skipped": True, "reason": "locked", ...} を返す。
+
+        計測が有効な場合(metrics.profiling.enable())は、統計の "profile" に
+        この更新でのタイマー・カウンターの集計を含める。所要時間・書き込み件数・
+        辞書の語数は常に metrics.prometheus の指標に記録する。
+
         Args:
             full_update: 全更新を行うか(Falseの場合は差分更新)
 
         Returns:
             更新結果の統計
         """
-        logger.info("Starting dictionary update...")
+        locks = self._source_locks()
+        acquired = []
+        try:
+            for lock in locks:
+                if not lock.acquire():
+                    logger.warning(f"Another update holds {lock.path}, skipping this update")
+                    return {
+                        "skipped": True,
+                        "reason": "locked",
+                        "sources": list(self.sources),
+                        "timestamp": datetime.now().isoformat()
+                    }
+                acquired.append(lock)
+
+            with profiling.collect() as profile:
+                with profiling.timer("update.total"):
+                    stats = self._update(full_update)
+        except Exception:
+            prometheus.UPDATES.inc(result="error")
+            raise
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+        if profile is not None:
+            stats["profile"] = profile.snapshot()
+
+        prometheus.UPDATES.inc(result="success")
+        prometheus.UPDATE_DURATION.observe(stats["duration_seconds"])
+        prometheus.LAST_UPDATE.set(time.time())
+        prometheus.DICTIONARY_WORDS.set(self.dict.storage.get_stats()["total_words"])
+
+        logger.info(f"Update completed: {stats}")
+        return stats
+
+    def _source_locks(self) -> List[JobLock]:
+        """ソースごとのロックファイル(取得順がそろうようソース名の順、インメモリの辞書なら空)"""
+        db_path = self.dict.storage.db_path
+        if str(db_path) == ":memory:":
+            return []
+
+        db_path = Path(db_path)
+        lock_dir = Path(self.lock_dir) if self.lock_dir else db_path.parent
+        return [
+            JobLock(lock_dir / f"{db_path.name}.update-{re.sub(r'[^A-Za-z0-9_.-]', '_', source)}.lock")
+            for source in sorted(set(self.sources))
+        ]
+
+    def _update(self, full_update: bool) -> Dict:
+        """update() の本体"""
+        logger.info(f"Starting dictionary update ({'full' if full_update else 'incremental'})...")
 
         start_time = datetime.now()
         collected_words = []
+        storage = self.dict.storage
+
+        if full_update:
+            storage.clear_watermarks()
+            watermarks = {}
+        else:
+            watermarks = storage.get_watermarks()
+
+        new_watermarks = {}
+
+        discovery = self.discovery
+        if discovery is not None:
+            if "wikipedia" in self.sources:
+                self.wikipedia_crawler.extractor.discovery = discovery
+            if "news" in self.sources:
+                self.news_crawler.extractor.discovery = discovery
 
         # 各ソースから単語を収集
         if "wikipedia" in self.sources:
             logger.info("Collecting from Wikipedia...")
-            wiki_words = self.wikipedia_crawler.crawl(
-                recent_changes=True,
-                limit=100
-            )
+            with profiling.timer("update.crawl.wikipedia"):
+                wiki_words = self.wikipedia_crawler.crawl(
+                    recent_changes=True,
+                    limit=100,
+                    since=watermarks.get("wikipedia:recentchanges")
+                )
             collected_words.extend(wiki_words)
+            new_watermarks.update(
+                (f"wikipedia:{key}", value)
+                for key, value in self.wikipedia_crawler.watermarks.items()
+            )
 
         if "news" in self.sources:
             logger.info("Collecting from news sources...")
-            news_words = self.news_crawler.crawl(
-                sources=["nhk", "yahoo"],
-                limit=50
-            )
+            with profiling.timer("update.crawl.news"):
+                news_words = self.news_crawler.crawl(
+                    sources=["nhk", "yahoo"],
+                    limit=50,
+                    since={
+                        key.split(":", 1)[1]: value
+                        for key, value in watermarks.items()
+                        if key.startswith("news:")
+                    }
+                )
             collected_words.extend(news_words)
+            new_watermarks.update(
+                (f"news:{key}", value)
+                for key, value in self.news_crawler.watermarks.items()
+            )
+
+        # 今回のテキストを加えたn-gram統計から候補を求め直し、次回の抽出に使う
+        discovered = 0
+        if discovery is not None:
+            with profiling.timer("update.discovery"):
+                discovered = len(discovery.refresh())
+                discovery.save(self.discovery_path)
 
         # 単語を集計(同じ表層形の頻度を合算)
         word_freq = {}
         word_data = {}
+        word_sources = {}
+
+        with profiling.timer("update.aggregate"):
+            for word_info in collected_words:
+                surface = word_info["surface"]
+                freq = word_info.get("frequency", 1)
+
+                if surface in word_freq:
+                    word_freq[surface] += freq
+                else:
+                    word_freq[surface] = freq
+                    word_data[surface] = word_info
+                    word_sources[surface] = set()
+                word_sources[surface].add(word_info.get("source", "other"))
+
+            # 辞書にない語は候補として積み上げ、累積の出現回数・出現元の数が
+            # しきい値に達したら辞書に追加する(1回の更新で少ししか現れない語も失わない)
+            existing = set(self.dict.get_words(word_freq))
+            staged = {
+                surface: {
+                    "count": freq,
+                    "sources": word_sources[surface],
+                    "reading": word_data[surface].get("reading"),
+                    "source": word_data[surface].get("source", "other"),
+                    "category": word_data[surface].get("category")
+                }
+                for surface, freq in word_freq.items() if surface not in existing
+            }
+            expected = self._expected_promotions(staged, storage.get_candidates(staged))
+
+        # 読みの推定(形態素解析)は時間がかかるため、書き込みロックを取る前に済ませる
+        with profiling.timer("update.readings"):
+            missing = storage.get_surfaces_without_reading(existing) + [
+                surface for surface in expected if not expected[surface]
+            ]
+            readings = self.dict.suggest_readings(missing, workers=self.reading_workers)
+
+        # NumPyの読み込みは重いため、コスト計算を行うときまで遅らせる
+        from core.cost import assign_costs
+
+        # 書き込みは1トランザクション・1つの版として公開する。
+        # 他プロセスの読み込みはコミットされるまで更新前の辞書を見る
+        with profiling.timer("update.write"), storage.transaction():
+            version = storage.begin_version(f"{'full' if full_update else 'incremental'} update")
+
+            # 読みの推定中に他のプロセスが追加した語も既存として扱う
+            for surface in storage.get_words(staged):
+                existing.add(surface)
+                del staged[surface]
+
+            storage.upsert_candidates(staged)
+            promoted = storage.promote_candidates(self.min_frequency, self.min_sources)
+
+            # 新規追加(今回の出現回数は下の record_frequency で加算する)。
+            # 辞書の書き込みバッファを通さず、このトランザクションで書き込む
+            self.dict.add_entries([
+                self.dict.make_entry(
+                    surface=surface,
+                    reading=candidate["reading"],
+                    source=self._normalize_source(candidate["source"] or "other"),
+                    category=candidate["category"],
+                    frequency=candidate["count"] - word_freq.get(surface, 0)
+                )
+                for surface, candidate in promoted.items()
+            ])
+            added_count = len(promoted)
+            updated_count = len(existing)
+
+            # 累積頻度・日単位カウント・減衰スコアをまとめて更新
+            accepted = {
+                surface: word_freq[surface]
+                for surface in list(existing) + list(promoted) if surface in word_freq
+            }
+            storage.record_frequency(accepted)
+
+            # 読みが未設定の語に推定した読みを設定
+            readings_filled = storage.set_readings(readings)
+
+            # 頻度の変化をコストに反映(差分更新では今回出現した語のみ、
+            # 減衰による全体の見直しは全更新か `neodict costs` で行う)
+            with profiling.timer("update.costs"):
+                costs_updated = assign_costs(
+                    storage, surfaces=None if full_update else set(accepted) | set(promoted)
+                )
 
-        for word_info in collected_words:
-            surface = word_info["surface"]
-            freq = word_info.get("frequency", 1)
-
-            if surface in word_freq:
-                word_freq[surface] += freq
-            else:
-                word_freq[surface] = freq
-                word_data[surface] = word_info
-
-        # 頻度フィルタリングして辞書に追加
-        added_count = 0
-        updated_count = 0
-
-        for surface, freq in word_freq.items():
-            if freq < self.min_frequency:
-                continue
-
-            info = word_data[surface]
+            changes = storage.commit_version(version)
 
-            # 既存の単語かチェック
-            existing = self.dict.get_word(surface)
+            # ウォーターマークは単語の書き込みと同時にコミットされる
+            # (シャード分割時は全シャードのコミット後に保存される)
+            storage.set_watermarks(new_watermarks)
 
-            if existing:
-                # 既存の場合は頻度を更新
-                updated_count += 1
-            else:
-                # 新規追加
-                self.dict.add_word(
-                    surface=surface,
-                    source=info.get("source", "other"),
-                    category=info.get("category"),
-                    frequency=freq
-                )
-                added_count += 1
+        # しばらく現れていない候補・上限を超えた分の候補を少しずつ削除
+        with profiling.timer("update.evict"):
+            evicted = storage.evict_candidates(
+                max_idle_days=self.candidate_ttl_days, max_candidates=self.max_candidates
+            )
 
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
 
         stats = {
+            "mode": "full" if full_update else "incremental",
             "collected_words": len(collected_words),
             "unique_words": len(word_freq),
             "added": added_count,
             "updated": updated_count,
+            "staged": len(staged),
+            "candidates_evicted": evicted,
+            "readings_filled": readings_filled,
+            "costs_updated": costs_updated,
+            "discovery_candidates": discovered,
+            "version": version,
+            "changes": changes,
             "duration_seconds": duration,
             "timestamp": end_time.isoformat()
         }
 
-        logger.info(f"Update completed: {stats}")
+        profiling.count("update.collected_words", len(collected_words))
+        profiling.count("update.added", added_count)
+        prometheus.DB_UPSERTS.inc(added_count, op="insert")
+        prometheus.DB_UPSERTS.inc(updated_count, op="update")
         return stats
 
+    def _expected_promotions(self, staged: Dict[str, Dict], known: Dict[str, Dict]) -> Dict[str, bool]:
+        """
+        今回の更新で辞書に追加される見込みの候補(読みを先に推定するため)
+
+        Args:
+            staged: 今回積み上げる候補
+            known: 候補の表に積み上げ済みの値
+
+        Returns:
+            表層形と読みが分かっているかの辞書
+        """
+        expected = {}
+        for surface, info in staged.items():
+            previous = known.get(surface, {})
+            count = previous.get("count", 0) + info["count"]
+            sources = set(previous.get("sources", ())) | info["sources"]
+            if count >= self.min_frequency and len(sources) >= self.min_sources:
+                expected[surface] = bool(previous.get("reading") or info["reading"])
+        return expected
+
+    @staticmethod
+    def _normalize_source(source: str) -> str:
+        """
+        クローラーのソース名(news_nhk等)を WordSource の値に揃える
+
+        Args:
+            source: クローラーが返したソース名
+
+        Returns:
+            WordSource の値
+        """
+        values = {member.value for member in WordSource}
+        if source in values:
+            return source
+
+        prefix = source.split("_", 1)[0]
+        return prefix if prefix in values else WordSource.OTHER.value
+
     def update_from_source(self, source: str, **kwargs) -> int:
         """
         特定のソースから更新
@@ -140,36 +445,60 @@ class DictUpdater:
         elif source == "news":
             words = self.news_crawler.crawl(**kwargs)
 
+        # 同じ語の頻度をメモリ上で合算し、1トランザクションで書き込む
         count = 0
-        for word_info in words:
-            self.dict.add_word(
-                surface=word_info["surface"],
-                source=word_info.get("source", source),
-                category=word_info.get("category"),
-                frequency=word_info.get("frequency", 1)
-            )
-            count += 1
+        with self.dict.batch():
+            for word_info in words:
+                self.dict.add_word(
+                    surface=word_info["surface"],
+                    source=self._normalize_source(word_info.get("source", source)),
+                    category=word_info.get("category"),
+                    frequency=word_info.get("frequency", 1)
+                )
+                count += 1
 
         return count
 
-    def cleanup(self, min_frequency: int = 1, max_age_days: int = 365) -> int:
+    def cleanup(
+        self,
+        min_frequency: int = 1,
+        max_age_days: int = 365,
+        archive: bool = False,
+        batch_size: int = 1000,
+        vacuum: bool = True
+    ) -> Dict:
         """
         低頻度語や古い語を削除
 
+        手動で追加した語は削除対象にしない。
+
         Args:
             min_frequency: この頻度未満の語を削除
             max_age_days: この日数より古い語を削除
+            archive: 削除した語をアーカイブテーブルに退避するか
+            batch_size: 1トランザクションで削除する最大件数
+            vacuum: 削除後に空き領域を返却するか
 
         Returns:
-            削除した単語数
+            削除結果の統計(削除件数、回収したバイト数など)
         """
         logger.info(f"Cleaning up dictionary (freq<{min_frequency}, age>{max_age_days}days)...")
 
-        # TODO: 実装
-        # 現在のストレージAPIでは日付フィルタリングが未実装のため、
-        # 将来的に実装予定
-
-        return 0
+        start_time = datetime.now()
+        storage = self.dict.storage
+        stats = storage.purge_words(
+            min_frequency=min_frequency,
+            max_age_days=max_age_days,
+            archive=archive,
+            batch_size=batch_size,
+            vacuum=vacuum,
+            description="cleanup"
+        )
+        stats["pruned_counts"] = storage.prune_word_counts(max_age_days)
+        stats["duration_seconds"] = (datetime.now() - start_time).total_seconds()
+
+        logger.info(f"Cleanup completed: {stats}")
+        return stats
 
     def get_update_history(self, limit: int = 10) -> List[Dict]:
         """
@@ -179,9 +508,6 @@ class DictUpdater:
             limit: 最大取得数
 
         Returns:
-            更新履歴のリスト
+            更新履歴(版ID・作成日時・語数・説明・変更件数)のリスト
         """
-        # TODO: 実装
-        # バージョン管理テーブルから履歴を取得
-
-        return []
+        return self.dict.get_versions(limit)
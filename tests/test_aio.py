@@ -0,0 +1,81 @@
+"""
+非同期版NeoDictのテスト
+"""
+
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import NeoDict
+from core.aio import AsyncNeoDict
+
+
+class TestAsyncNeoDict:
+    """AsyncNeoDictクラスのテスト"""
+
+    @pytest.fixture
+    def temp_dict(self, tmp_path):
+        """一時的な辞書を作成"""
+        return NeoDict(db_path=str(tmp_path / "dict.db"))
+
+    def test_concurrent_adds_are_coalesced(self, temp_dict):
+        """同時の add_word が少数のトランザクションにまとまるかのテスト"""
+        batches = []
+        add_entries = temp_dict.add_entries
+
+        def counting_add_entries(entries):
+            batches.append(len(entries))
+            return add_entries(entries)
+
+        temp_dict.add_entries = counting_add_entries
+
+        async def run():
+            async with AsyncNeoDict(temp_dict) as neodict:
+                ids = await asyncio.gather(*(
+                    neodict.add_word(f"非同期{i}", source="news", frequency=i) for i in range(300)
+                ))
+                words = await asyncio.gather(*(neodict.get_word(f"非同期{i}") for i in range(300)))
+                return ids, words
+
+        ids, words = asyncio.run(run())
+        assert len(set(ids)) == 300
+        assert [word["frequency"] for word in words] == list(range(300))
+        assert sum(batches) == 300 and len(batches) < 300
+
+    def test_invalid_add_fails_alone(self, temp_dict):
+        """不正な追加がほかの追加を巻き込まないかのテスト"""
+        async def run():
+            async with AsyncNeoDict(temp_dict) as neodict:
+                return await asyncio.gather(
+                    neodict.add_word("正しい語", source="news"),
+                    neodict.add_word("不正な語", source="unknown-source"),
+                    return_exceptions=True
+                )
+
+        ok, error = asyncio.run(run())
+        assert isinstance(ok, int)
+        assert isinstance(error, ValueError)
+        assert temp_dict.get_word("正しい語") is not None
+
+    def test_iter_words(self, temp_dict):
+        """async for で頻度順に全単語を読めるかのテスト"""
+        for i in range(25):
+            temp_dict.add_word(surface=f"走査{i}", source="news", frequency=i)
+
+        async def run():
+            async with AsyncNeoDict(temp_dict) as neodict:
+                frequencies = [record.frequency async for record in neodict.iter_words(batch_size=4)]
+
+                # 途中で抜けても次の操作ができる
+                async for _ in neodict.iter_words(batch_size=4):
+                    break
+                results = await neodict.search("走査1", fuzzy=True)
+                return frequencies, results
+
+        frequencies, results = asyncio.run(run())
+        assert frequencies == sorted(range(25), reverse=True)
+        assert len(results) == 11
@@ -9,7 +9,8 @@ from pathlib import Path
 # パスを追加
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from crawler import WordExtractor
+from bs4 import BeautifulSoup
+from crawler import WordExtractor, NewsCrawler, WikipediaCrawler
 
 
 class TestWordExtractor:
@@ -88,5 +89,84 @@ class TestWordExtractor:
         assert "テスト" in words
 
 
+class TestNewsCrawler:
+    """NewsCrawlerクラスのテスト"""
+
+    def test_take_new_items(self):
+        """ウォーターマークより新しい記事のみ取得するかのテスト"""
+        html = """
+        <ul>
+          <article class="content--list-item"><a href="/news/html/3.html">3</a></article>
+          <article class="content--list-item"><a href="/news/html/2.html">2</a></article>
+          <article class="content--list-item"><a href="/news/html/1.html">1</a></article>
+        </ul>
+        """
+        soup = BeautifulSoup(html, "lxml")
+        items = soup.select("article.content--list-item")
+
+        crawler = NewsCrawler(delay=0)
+        new_items = crawler._take_new_items(
+            "nhk", items, since="https://www3.nhk.or.jp/news/html/2.html"
+        )
+
+        assert [item.get_text() for item in new_items] == ["3"]
+        assert crawler.watermarks["nhk"] == "https://www3.nhk.or.jp/news/html/3.html"
+
+
+class FakeResponse:
+    """requests.Response のスタブ"""
+
+    def __init__(self, data):
+        self.data = data
+        self.content = b""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    """ページごとに応答を返す requests.Session のスタブ"""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requests.append(dict(params))
+        return FakeResponse(self.pages.pop(0))
+
+
+class TestWikipediaCrawler:
+    """WikipediaCrawlerクラスのテスト"""
+
+    def test_recent_changes_follows_continue(self):
+        """ウォーターマークまで continue をたどるかのテスト"""
+        crawler = WikipediaCrawler(delay=0)
+        crawler.session = FakeSession([
+            {
+                "continue": {"rccontinue": "20260101000100|102", "continue": "-||"},
+                "query": {"recentchanges": [
+                    {"title": "新語C", "timestamp": "2026-01-01T00:03:00Z", "rcid": 104},
+                    {"title": "新語B", "timestamp": "2026-01-01T00:02:00Z", "rcid": 103},
+                ]}
+            },
+            {
+                "query": {"recentchanges": [
+                    {"title": "新語A", "timestamp": "2026-01-01T00:01:00Z", "rcid": 102},
+                    {"title": "既知語", "timestamp": "2026-01-01T00:00:00Z", "rcid": 100},
+                ]}
+            },
+        ])
+
+        words = crawler.crawl(limit=2, since="2026-01-01T00:00:00Z|100")
+
+        assert [word["surface"] for word in words] == ["新語C", "新語B", "新語A"]
+        assert crawler.session.requests[1]["rccontinue"] == "20260101000100|102"
+        assert crawler.watermarks["recentchanges"] == "2026-01-01T00:03:00Z|104"
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -6,11 +6,14 @@ import pytest
 import sys
 from pathlib import Path
 import tempfile
+import time
+from datetime import date, timedelta
 
 # パスを追加
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from core import NeoDict, Word, WordEntry, PartOfSpeech, WordSource
+from core.cost import assign_costs
 
 
 class TestNeoDict:
@@ -92,6 +95,125 @@ class TestNeoDict:
         result = temp_dict.get_word(surface)
         assert result is None
 
+    def test_get_words(self, temp_dict):
+        """複数の単語をまとめて取得できるかのテスト"""
+        surfaces = [f"一括{i}" for i in range(1200)]
+        for surface in surfaces[::2]:
+            temp_dict.add_word(surface=surface, source="news")
+
+        words = temp_dict.get_words(surfaces + ["一括0"])
+        assert set(words) == set(surfaces[::2])
+        assert words["一括0"]["surface"] == "一括0"
+
+        # 存在しない語もキャッシュし、追加・削除したときは捨てる
+        assert temp_dict.get_word("一括1") is None
+        temp_dict.add_word(surface="一括1", source="news")
+        assert temp_dict.get_word("一括1") is not None
+        temp_dict.remove_word("一括0")
+        assert temp_dict.get_word("一括0") is None
+
+    def test_lookup_cache_follows_generation(self, temp_dict):
+        """他のインスタンスが更新を公開したらキャッシュを捨てるかのテスト"""
+        temp_dict.add_word(surface="世代語", source="news")
+        assert temp_dict.get_word("世代語")["frequency"] == 0
+
+        writer = NeoDict(db_path=str(temp_dict.storage.db_path))
+        with writer.storage.transaction():
+            version = writer.storage.begin_version("test")
+            writer.storage.record_frequency({"世代語": 3})
+            writer.storage.commit_version(version)
+
+        assert temp_dict.get_word("世代語")["frequency"] == 3
+
+    def test_lookup_cache_follows_plain_writes(self, temp_dict):
+        """版を開かない書き込みでも読み込み専用のインスタンスがキャッシュを捨てるかのテスト"""
+        reader = NeoDict(db_path=str(temp_dict.storage.db_path), read_only=True)
+        assert reader.get_word("後から追加") is None
+        assert reader.find_all("後から追加した") == []
+
+        temp_dict.add_word(surface="後から追加", source="news")
+        assert reader.get_word("後から追加") is not None
+        assert [span["surface"] for span in reader.find_all("後から追加した")] == ["後から追加"]
+
+        temp_dict.remove_word("後から追加")
+        assert reader.get_word("後から追加") is None
+        reader.close()
+
+    def test_find_all_and_segment(self, temp_dict):
+        """生テキストを辞書の語で照合・分割できるかのテスト"""
+        for surface in ["東京", "東京都", "都庁", "生成AI"]:
+            temp_dict.add_word(surface=surface, source="news")
+
+        text = "東京都庁で生成AI"
+        assert [(s["start"], s["end"], s["surface"]) for s in temp_dict.find_all(text)] == [
+            (0, 3, "東京都"), (0, 2, "東京"), (2, 4, "都庁"), (5, 9, "生成AI")
+        ]
+
+        spans = temp_dict.segment(text)
+        assert [(s["surface"], s["known"]) for s in spans] == [
+            ("東京都", True), ("庁で", False), ("生成AI", True)
+        ]
+        assert spans[0]["entry"]["surface"] == "東京都"
+        assert spans[1]["entry"] is None
+
+        # 追加した語はすぐに照合対象になる
+        temp_dict.add_word(surface="庁で", source="news")
+        assert [s["known"] for s in temp_dict.segment(text, with_entries=False)] == [True, True, True]
+
+    def test_segment_many_with_workers(self, temp_dict):
+        """プロセスプールでの分割が1プロセスの結果と一致するかのテスト"""
+        for surface in ["推し活", "生成AI"]:
+            temp_dict.add_word(surface=surface, source="news")
+
+        texts = ["推し活と生成AI", "生成AIの推し活", "該当なし"] * 5
+        matcher = temp_dict.matcher
+        assert list(matcher.segment_many(texts, workers=2, chunksize=2)) == [
+            matcher.segment(text) for text in texts
+        ]
+
+    def test_batch_merges_and_flushes_once(self, temp_dict):
+        """batch() が同じ語の頻度を合算し、1トランザクションで書き込むかのテスト"""
+        flushed = []
+        add_entries = temp_dict.add_entries
+
+        def counting_add_entries(entries):
+            flushed.append([entry.word.surface for entry in entries])
+            return add_entries(entries)
+
+        temp_dict.add_entries = counting_add_entries
+
+        with temp_dict.batch():
+            for i in range(100):
+                assert temp_dict.add_word(surface=f"バッファ{i % 10}", source="news", frequency=1) is None
+            temp_dict.add_word(surface="バッファ0", reading="バッファゼロ", source="news", frequency=5)
+            assert temp_dict.get_word("バッファ0") is None
+
+        assert len(flushed) == 1 and len(flushed[0]) == 10
+        word = temp_dict.get_word("バッファ0")
+        assert word["frequency"] == 15
+        assert word["reading"] == "バッファゼロ"
+
+    def test_batch_auto_flush(self, temp_dict):
+        """件数・時間・例外で書き込まれるかのテスト"""
+        with temp_dict.batch(max_items=3):
+            for i in range(7):
+                temp_dict.add_word(surface=f"自動{i}", source="news")
+            assert temp_dict.get_stats()["total_words"] == 6
+
+        with pytest.raises(RuntimeError):
+            with temp_dict.batch():
+                temp_dict.add_word(surface="例外前の語", source="news")
+                raise RuntimeError("boom")
+        assert temp_dict.get_word("例外前の語") is not None
+
+        temp_dict.enable_write_buffer(max_delay=0.05)
+        temp_dict.add_word(surface="時間で書く語", source="news")
+        deadline = time.time() + 5
+        while temp_dict.get_word("時間で書く語") is None and time.time() < deadline:
+            time.sleep(0.02)
+        assert temp_dict.get_word("時間で書く語") is not None
+        temp_dict.close()
+
     def test_stats(self, temp_dict):
         """統計情報のテスト"""
         # 複数の単語を追加
@@ -104,6 +226,274 @@ class TestNeoDict:
         stats = temp_dict.get_stats()
         assert stats["total_words"] == 10
 
+    def test_stats_maintained_incrementally(self, temp_dict):
+        """集計表が追加・更新・削除に追従するかのテスト"""
+        storage = temp_dict.storage
+        temp_dict.add_word(surface="集計A", source="news", pos=PartOfSpeech.NOUN.value)
+        temp_dict.add_word(surface="集計B", source="news", pos=PartOfSpeech.VERB.value)
+        temp_dict.add_word(surface="集計C", source="manual", pos=PartOfSpeech.NOUN.value)
+
+        entry = storage.get_word("集計B")
+        entry.pos = PartOfSpeech.NOUN
+        entry.source = WordSource.WIKIPEDIA
+        storage.update_word(entry)
+        temp_dict.remove_word("集計C")
+
+        stats = temp_dict.get_stats()
+        assert stats["total_words"] == 2
+        assert stats["sources"] == {"news": 1, "wikipedia": 1}
+        assert stats["pos_distribution"] == {PartOfSpeech.NOUN.value: 2}
+        assert stats["unique_pos"] == 1
+
+        # 作り直しても同じ結果になる
+        storage.recompute_stats()
+        assert temp_dict.get_stats() == stats
+
+    def test_trending(self, temp_dict):
+        """日単位カウントによるトレンド取得のテスト"""
+        for surface in ["昨年の流行語", "今日の流行語"]:
+            temp_dict.add_word(surface=surface, source="news")
+
+        storage = temp_dict.storage
+        storage.record_frequency({"昨年の流行語": 100}, day=date.today() - timedelta(days=365))
+        storage.record_frequency({"今日の流行語": 5})
+
+        trending = temp_dict.get_trending(days=7)
+        assert [item["surface"] for item in trending] == ["今日の流行語"]
+        assert trending[0]["recent_frequency"] == 5
+
+    def test_decayed_score(self, temp_dict):
+        """減衰スコアが増分更新されるかのテスト"""
+        temp_dict.add_word(surface="減衰テスト", source="news")
+
+        storage = temp_dict.storage
+        storage.record_frequency({"減衰テスト": 8}, day=date.today() - timedelta(days=14))
+        storage.record_frequency({"減衰テスト": 1})
+
+        word = temp_dict.get_word("減衰テスト")
+        assert word["frequency"] == 9
+        assert word["score"] == pytest.approx(8 * 0.25 + 1)
+
+    def test_decayed_score_out_of_order(self, temp_dict):
+        """過去日の記録が基準日を戻さないかのテスト"""
+        temp_dict.add_word(surface="順不同テスト", source="news")
+
+        storage = temp_dict.storage
+        storage.record_frequency({"順不同テスト": 1})
+        storage.record_frequency({"順不同テスト": 8}, day=date.today() - timedelta(days=14))
+
+        word = temp_dict.get_word("順不同テスト")
+        assert word["score"] == pytest.approx(1 + 8 * 0.25)
+
+    def test_candidates(self, temp_dict):
+        """候補の積み上げ・昇格・削除のテスト"""
+        storage = temp_dict.storage
+        old_day = date.today() - timedelta(days=60)
+        storage.upsert_candidates({
+            "推し活": {"count": 1, "sources": {"news_nhk"}, "category": "news_katakana"},
+            "一発屋": {"count": 1, "sources": {"wikipedia"}},
+        }, day=old_day)
+        storage.upsert_candidates({
+            "推し活": {"count": 2, "sources": {"wikipedia"}, "reading": "オシカツ"},
+            "ぴえん": {"count": 5, "sources": {"news_nhk"}},
+        })
+
+        candidate = storage.get_candidates(["推し活", "未登録"])["推し活"]
+        assert candidate["count"] == 3
+        assert candidate["sources"] == ["news_nhk", "wikipedia"]
+        assert candidate["first_seen"] == old_day
+        assert candidate["last_seen"] == date.today()
+        assert candidate["reading"] == "オシカツ"
+        assert candidate["category"] == "news_katakana"
+
+        promoted = storage.promote_candidates(min_count=3, min_sources=2)
+        assert list(promoted) == ["推し活"]
+        assert storage.get_candidates(["推し活"]) == {}
+
+        assert storage.evict_candidates(max_idle_days=30, batch_size=1) == 1
+        assert set(storage.get_candidates(["一発屋", "ぴえん"])) == {"ぴえん"}
+
+        storage.upsert_candidates({f"候補{i}": {"count": i + 1, "sources": {"news"}} for i in range(5)})
+        assert storage.evict_candidates(max_candidates=3, batch_size=2) == 3
+        assert set(storage.get_candidates([f"候補{i}" for i in range(5)] + ["ぴえん"])) == {
+            "候補3", "候補4", "ぴえん"
+        }
+
+    def test_remove_word_drops_counts(self, temp_dict):
+        """単語削除で日単位カウントも削除されるかのテスト"""
+        temp_dict.add_word(surface="削除カウント", source="news")
+        temp_dict.storage.record_frequency({"削除カウント": 3})
+
+        temp_dict.remove_word("削除カウント")
+
+        assert temp_dict.storage.get_trending(days=1) == []
+        assert temp_dict.storage.prune_word_counts(max_age_days=-1) == 0
+
+    def test_assign_costs(self, temp_dict):
+        """頻度に応じたコスト計算のテスト"""
+        temp_dict.add_word(surface="頻出新語", source="news", frequency=500)
+        temp_dict.add_word(surface="稀少新語", source="news", frequency=0)
+        temp_dict.add_word(surface="手動新語", source="manual", frequency=500)
+
+        updated = assign_costs(temp_dict.storage)
+        assert updated == 2
+
+        frequent = temp_dict.storage.get_word("頻出新語")
+        rare = temp_dict.storage.get_word("稀少新語")
+        assert frequent.cost < rare.cost
+
+        # 手動登録語のコストは変更しない
+        assert temp_dict.storage.get_word("手動新語").cost == 6000
+
+        # 変化がなければ書き込まない
+        assert assign_costs(temp_dict.storage) == 0
+
+    def test_assign_costs_for_surfaces(self, temp_dict):
+        """指定した語だけコストを再計算するかのテスト"""
+        temp_dict.add_word(surface="対象語", source="news", frequency=500)
+        temp_dict.add_word(surface="対象外語", source="news", frequency=500)
+
+        assert assign_costs(temp_dict.storage, surfaces=["対象語"]) == 1
+        assert temp_dict.storage.get_word("対象外語").cost == 6000
+
+    def test_version_history(self, temp_dict, tmp_path):
+        """版ごとの差分から過去の内容を再現・巻き戻しできるかのテスト"""
+        storage = temp_dict.storage
+        temp_dict.add_word(surface="版前からある語", source="manual")
+
+        with storage.transaction():
+            v1 = storage.begin_version("v1")
+            temp_dict.add_word(surface="残る語", source="news", frequency=1)
+            temp_dict.add_word(surface="消える語", source="news", frequency=1)
+            storage.commit_version(v1)
+
+        with storage.transaction():
+            v2 = storage.begin_version("v2")
+            temp_dict.add_word(surface="新しい語", source="news")
+            temp_dict.remove_word("消える語")
+            storage.record_frequency({"残る語": 4})
+            temp_dict.add_word(surface="一時的な語", source="news")
+            temp_dict.remove_word("一時的な語")
+            assert storage.commit_version(v2) == {"add": 1, "remove": 1, "change": 1}
+
+        at_v1 = {record.surface: record.frequency for record in storage.iter_records_at(v1)}
+        assert at_v1 == {"版前からある語": 0, "残る語": 1, "消える語": 1}
+        assert storage.diff_versions(v1) == {
+            "added": ["新しい語"], "removed": ["消える語"], "changed": ["残る語"]
+        }
+        assert storage.diff_versions(v1, v2) == storage.diff_versions(v1)
+
+        temp_dict.export_mecab(str(tmp_path), version=v1)
+        lines = (tmp_path / "neodict.csv").read_text(encoding="utf-8").splitlines()
+        assert sorted(line.split(",")[0] for line in lines) == sorted(at_v1)
+
+        assert temp_dict.rollback(v1) == {"add": 1, "remove": 1, "change": 1}
+        current = {record.surface: record.frequency for record in storage.iter_records()}
+        assert current == at_v1
+        assert storage.get_versions()[0]["description"] == f"rollback to {v1}"
+
+        # 巻き戻し自体も版なので、さらに元に戻せる
+        temp_dict.rollback(v2)
+        assert "新しい語" in {record.surface for record in storage.iter_records()}
+
+        with pytest.raises(ValueError):
+            list(storage.iter_records_at(999))
+
+    def test_writes_outside_version_are_recorded(self, temp_dict):
+        """版を開かずに行った書き込みも版として記録されるかのテスト"""
+        storage = temp_dict.storage
+        temp_dict.add_word(surface="消える語", source="news", frequency=1)
+        with storage.transaction():
+            version = storage.begin_version("v1")
+            storage.commit_version(version)
+
+        temp_dict.add_word(surface="新しい語", source="news")
+        temp_dict.remove_word("消える語")
+        temp_dict.add_entries([temp_dict.make_entry(surface="まとめた語", source="news")])
+
+        assert {record.surface for record in storage.iter_records_at(version)} == {"消える語"}
+        assert storage.diff_versions(version) == {
+            "added": ["まとめた語", "新しい語"], "removed": ["消える語"], "changed": []
+        }
+        assert storage.get_versions()[0]["description"] == "auto"
+
+        temp_dict.rollback(version)
+        assert [record.surface for record in storage.iter_records()] == ["消える語"]
+
+        with pytest.raises(RuntimeError):
+            storage.begin_version("outside")
+
+    def test_read_columns(self, temp_dict):
+        """列読み込みが型付き配列を返すかのテスト"""
+        temp_dict.add_word(surface="生成AI", reading="セイセイエーアイ", source="news", frequency=3)
+        temp_dict.add_word(surface="推し活", source="manual", frequency=7)
+
+        columns = temp_dict.storage.read_columns(
+            ["surface", "reading", "frequency", "surface_length"]
+        )
+        assert columns["frequency"].tolist() == [3, 7]
+        assert columns["surface_length"].tolist() == [4, 3]
+        assert columns["surface"].to_list() == ["生成AI", "推し活"]
+        assert columns["reading"].to_list() == ["セイセイエーアイ", None]
+        assert columns["surface"].byte_lengths().tolist() == [8, 9]
+
+        filtered = temp_dict.storage.read_columns(
+            ["surface"], where="source = ?", params=["manual"], batch_size=1
+        )
+        assert filtered["surface"].to_list() == ["推し活"]
+
+        with pytest.raises(ValueError):
+            temp_dict.storage.read_columns(["surface; DROP TABLE words"])
+
+    def test_suggest_readings_matches_single(self, temp_dict):
+        """一括推定の結果が1語ずつの推定と一致するかのテスト"""
+        surfaces = ["生成AI", "東京都庁", "推し活", "ChatGPT", "東京都庁"]
+        readings = temp_dict.suggest_readings(surfaces)
+
+        assert set(readings) == set(surfaces)
+        for surface in surfaces:
+            expected = "".join(
+                word.feature.kana or word.surface for word in temp_dict.tagger(surface)
+            )
+            assert readings[surface] == expected
+
+    def test_suggest_readings_uses_sqlite_cache(self, temp_dict):
+        """2回目の呼び出しがSQLiteの読みキャッシュを使うかのテスト"""
+        first = temp_dict.suggest_readings(["東京都庁", "推し活"])
+        assert temp_dict.storage.get_cached_readings(["東京都庁", "推し活"]) == first
+
+        # メモリキャッシュを捨て、タガーなしでもキャッシュから返る
+        temp_dict._reading_cache.clear()
+        temp_dict.tagger = None
+        assert temp_dict.suggest_readings(["東京都庁", "推し活"]) == first
+
+    def test_suggest_readings_with_workers(self, temp_dict):
+        """ワーカープロセスによる推定が1プロセスと一致するかのテスト"""
+        surfaces = [f"東京{i}号" for i in range(500)]
+        readings = temp_dict.suggest_readings(surfaces, workers=2)
+
+        assert len(readings) == 500
+        assert readings["東京3号"] == "".join(
+            word.feature.kana or word.surface for word in temp_dict.tagger("東京3号")
+        )
+
+    def test_records_match_entries(self, temp_dict):
+        """WordRecord が WordEntry と同じ内容を返すかのテスト"""
+        temp_dict.add_word(surface="推し活", reading="オシカツ", source="news", frequency=3)
+        temp_dict.add_word(surface="生成AI", source="wikipedia", frequency=5)
+
+        entries = temp_dict.storage.get_all_words()
+        records = temp_dict.storage.get_all_records()
+
+        assert [record.surface for record in records] == ["生成AI", "推し活"]
+        for entry, record in zip(entries, records):
+            assert record.to_dict() == entry.to_dict()
+            assert record.to_mecab_csv() == entry.to_mecab_csv()
+            assert record.to_entry().to_dict() == entry.to_dict()
+            assert not hasattr(record, "__dict__")
+
+        assert [r.surface for r in temp_dict.storage.iter_records(batch_size=1)] == ["生成AI", "推し活"]
+
 
 class TestWord:
     """Wordクラスのテスト"""
@@ -0,0 +1,104 @@
+"""
+n-gram統計による新語の発見のテスト
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from crawler import NgramDiscovery, WordExtractor
+from crawler.discovery import CountMinSketch
+
+PARTICLES = "のにはをがでとも"
+NOISE_CHARS = [chr(c) for c in range(0x4E00, 0x4E00 + 1500)] + [chr(c) for c in range(0x30A2, 0x30F3)]
+
+
+def synthetic_texts(count: int, word: str = "推し活", rate: float = 0.15, seed: int = 0):
+    """ランダムな漢字・カタカナ列の中に word を混ぜた文"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        parts = []
+        for _ in range(8):
+            if rng.random() < rate:
+                surface = word
+            else:
+                surface = "".join(rng.choice(NOISE_CHARS) for _ in range(rng.randint(1, 4)))
+            parts.append(surface + rng.choice(PARTICLES))
+        yield "".join(parts) + "。"
+
+
+@pytest.fixture
+def discovery():
+    return NgramDiscovery(width=1 << 14, capacity=2000)
+
+
+class TestCountMinSketch:
+    """CountMinSketchクラスのテスト"""
+
+    def test_estimates_never_undercount(self):
+        sketch = CountMinSketch(width=64, depth=3)
+        counts = {f"語{i}": i % 7 + 1 for i in range(200)}
+        for key, count in counts.items():
+            for _ in range(count):
+                sketch.add(key)
+
+        assert all(sketch.estimate(key) >= count for key, count in counts.items())
+        assert sketch.estimate("未出現") >= 0
+
+
+class TestNgramDiscovery:
+    """NgramDiscoveryクラスのテスト"""
+
+    def test_planted_word_ranks_first(self, discovery):
+        """コーパスに混ぜた語が最上位の候補になるかのテスト"""
+        discovery.feed_many(synthetic_texts(1500))
+
+        found = discovery.candidates(limit=5)
+        assert found[0].surface == "推し活"
+        assert found[0].count >= 100
+        # 助詞の付いた断片は候補にしない
+        assert not any(candidate.surface[-1] in PARTICLES for candidate in found)
+
+    def test_memory_is_bounded(self, discovery):
+        """追跡するn-gramの数が上限を超えないかのテスト"""
+        discovery.feed_many(synthetic_texts(1500, seed=1))
+
+        assert len(discovery.tracked) <= discovery.capacity
+        assert discovery.left.keys() == discovery.tracked.keys() == discovery.right.keys()
+        assert discovery.threshold > 0
+
+    def test_save_and_load(self, discovery, tmp_path):
+        """保存した統計を読み込んで続きから積み上げられるかのテスト"""
+        path = tmp_path / "dict.ngram"
+        discovery.feed_many(synthetic_texts(500))
+        discovery.save(str(path))
+
+        loaded = NgramDiscovery.load(str(path))
+        assert loaded.total == discovery.total
+        assert loaded.tracked == discovery.tracked
+        assert loaded.candidates() == discovery.candidates()
+
+        loaded.feed_many(synthetic_texts(500, seed=2))
+        assert loaded.sketch.estimate("推し活") > discovery.sketch.estimate("推し活")
+
+        assert NgramDiscovery.load(str(tmp_path / "missing.ngram"), width=128).sketch.width == 128
+        (tmp_path / "broken.ngram").write_bytes(b"not a sketch")
+        with pytest.raises(ValueError):
+            NgramDiscovery.load(str(tmp_path / "broken.ngram"))
+
+    def test_extractor_reports_discovered_words(self, discovery):
+        """発見した語を抽出結果の discovered に含めるかのテスト"""
+        discovery.feed_many(synthetic_texts(1500))
+        discovery.refresh()
+
+        extractor = WordExtractor()
+        extractor.discovery = discovery
+        extracted = extractor.extract_all("週末は推し活に出かけた。")
+
+        assert "推し活" in extracted["discovered"]
+        assert "discovered" not in WordExtractor().extract_all("週末は推し活に出かけた。")
@@ -0,0 +1,91 @@
+"""
+処理時間の計測のテスト
+"""
+
+import pytest
+import sys
+import tempfile
+from pathlib import Path
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import NeoDict
+from crawler import WordExtractor
+from metrics import profiling
+
+
+class ListSink(profiling.ProfileSink):
+    """受け取った集計結果を保持するシンク"""
+
+    def __init__(self):
+        self.reports = []
+
+    def emit(self, report):
+        self.reports.append(report)
+
+
+class TestProfiling:
+    """metrics.profiling のテスト"""
+
+    @pytest.fixture(autouse=True)
+    def reset_profiler(self):
+        yield
+        profiling.disable(flush=False)
+
+    @pytest.fixture
+    def temp_dict(self):
+        """一時的な辞書を作成"""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            db_path = f.name
+
+        neodict = NeoDict(db_path=db_path)
+        yield neodict
+
+        neodict.close()
+        Path(db_path).unlink(missing_ok=True)
+
+    def test_disabled_records_nothing(self, temp_dict):
+        """無効なときは計測箇所を通っても何も記録しないかのテスト"""
+        temp_dict.add_word("生成AI")
+        with profiling.timer("test.block"):
+            profiling.count("test.counter")
+        with profiling.collect() as stats:
+            assert stats is None
+
+        profiler = profiling.enable()
+        assert profiler.snapshot() == {"timers": {}, "counters": {}}
+
+    def test_storage_and_extractor_timers(self, temp_dict):
+        """ストレージのメソッド・抽出の時間が記録されるかのテスト"""
+        sink = ListSink()
+        profiling.enable(sinks=[sink])
+
+        temp_dict.add_word("生成AI")
+        list(temp_dict.storage.iter_records())
+        WordExtractor().extract_all("チャットボットが普及した")
+        profiling.count("test.counter", 3)
+        profiling.disable()
+
+        report = sink.reports[0]
+        assert report["timers"]["storage.add_word"]["count"] == 1
+        assert report["timers"]["storage.iter_records"]["count"] == 1
+        assert report["timers"]["extractor.extract_all"]["count"] == 1
+        assert "storage.transaction" not in report["timers"]
+        assert report["counters"] == {"test.counter": 3}
+
+    def test_collect_is_scoped(self):
+        """collect() はその間に記録された分だけを集計するかのテスト"""
+        profiler = profiling.enable()
+        profiling.count("test.counter")
+
+        with profiling.collect() as stats:
+            profiling.count("test.counter", 2)
+            with profiling.timer("test.block"):
+                pass
+
+        profiling.count("test.counter")
+
+        assert stats.snapshot()["counters"] == {"test.counter": 2}
+        assert stats.snapshot()["timers"]["test.block"]["count"] == 1
+        assert profiler.snapshot()["counters"] == {"test.counter": 4}
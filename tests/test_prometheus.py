@@ -0,0 +1,86 @@
+"""
+Prometheus形式の指標のテスト
+"""
+
+import pytest
+import sys
+import urllib.request
+from pathlib import Path
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from metrics import prometheus
+from updater import UpdateScheduler
+
+
+class FailingUpdater:
+    """常に失敗するアップデーターのスタブ"""
+
+    def update(self):
+        raise RuntimeError("network down")
+
+
+class TestRegistry:
+    """metrics.prometheus.Registry のテスト"""
+
+    def test_render_text_format(self):
+        """カウンター・ヒストグラムがテキスト形式で出力されるかのテスト"""
+        registry = prometheus.Registry()
+        pages = registry.counter("test_pages_total", "Pages", ["host"])
+        latency = registry.histogram("test_latency_seconds", "Latency", ["host"], buckets=(0.1, 1.0))
+
+        pages.inc(host="a.example")
+        pages.inc(2, host='b"example')
+        latency.observe(0.05, host="a.example")
+        latency.observe(0.5, host="a.example")
+        latency.observe(5, host="a.example")
+
+        text = registry.render()
+        assert "# TYPE test_pages_total counter" in text
+        assert 'test_pages_total{host="a.example"} 1' in text
+        assert 'test_pages_total{host="b\\"example"} 2' in text
+        assert "# TYPE test_latency_seconds histogram" in text
+        assert 'test_latency_seconds_bucket{host="a.example",le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{host="a.example",le="1"} 2' in text
+        assert 'test_latency_seconds_bucket{host="a.example",le="+Inf"} 3' in text
+        assert 'test_latency_seconds_sum{host="a.example"} 5.55' in text
+        assert 'test_latency_seconds_count{host="a.example"} 3' in text
+
+    def test_register_returns_existing(self):
+        """同じ名前の指標は同じインスタンスになり、種類が違えばエラーになるかのテスト"""
+        registry = prometheus.Registry()
+        counter = registry.counter("test_total", "Test")
+        assert registry.counter("test_total", "Test") is counter
+
+        with pytest.raises(ValueError):
+            registry.gauge("test_total", "Test")
+        with pytest.raises(ValueError):
+            counter.inc(host="a.example")
+
+    def test_serve_and_textfile(self, tmp_path):
+        """HTTPでの配信とファイルへの書き出しのテスト"""
+        registry = prometheus.Registry()
+        registry.gauge("test_words", "Words").set(42)
+
+        server = registry.serve(port=0)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+                body = response.read().decode("utf-8")
+        finally:
+            server.stop()
+        assert "test_words 42" in body
+
+        path = tmp_path / "neodict.prom"
+        registry.write_textfile(str(path))
+        assert path.read_text(encoding="utf-8") == registry.render()
+
+    def test_scheduler_records_failed_update(self, tmp_path):
+        """スケジューラーの更新ジョブが失敗しても指標を書き出すかのテスト"""
+        path = tmp_path / "neodict.prom"
+        scheduler = UpdateScheduler(updater=FailingUpdater(), metrics_textfile=str(path))
+
+        stats = scheduler.run_now()
+
+        assert stats["error"] == "network down"
+        assert "neodict_updates_total" in path.read_text(encoding="utf-8")
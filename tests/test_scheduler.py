@@ -0,0 +1,152 @@
+"""
+自動更新のスケジューラーのテスト
+"""
+
+import pytest
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from updater import UpdateScheduler
+from updater.scheduler import DailyTrigger, IntervalTrigger, JobLock, WeeklyTrigger
+
+
+class StubUpdater:
+    """呼ばれた回数を数えるアップデーターのスタブ"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def update(self):
+        self.calls += 1
+        return {"added": 0}
+
+
+class BlockingJob:
+    """finished がセットされるまで終わらないジョブ"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.finished = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.finished.wait(5)
+        return {"calls": self.calls}
+
+
+class TestUpdateScheduler:
+    """UpdateSchedulerクラスのテスト"""
+
+    @pytest.fixture
+    def scheduler(self, tmp_path):
+        scheduler = UpdateScheduler(updater=StubUpdater(), lock_dir=str(tmp_path))
+        yield scheduler
+        scheduler.stop()
+
+    @pytest.mark.parametrize("overlap, expected_calls", [("skip", 1), ("queue", 3), ("coalesce", 2)])
+    def test_overlap_policies(self, scheduler, overlap, expected_calls):
+        """実行中に2回実行を要求したときの実行回数のテスト"""
+        job = BlockingJob()
+        scheduler.add_job("slow", job, overlap=overlap)
+
+        first = scheduler.run_now("slow", wait=False)
+        assert job.started.wait(5)
+        second = scheduler.run_now("slow", wait=False)
+        third = scheduler.run_now("slow", wait=False)
+
+        if overlap == "skip":
+            assert second.result(timeout=5)["skipped"] is True
+        if overlap == "coalesce":
+            assert second is third
+
+        job.finished.set()
+        for future in (first, second, third):
+            future.result(timeout=5)
+        assert job.calls == expected_calls
+
+    def test_jobs_run_concurrently(self, scheduler):
+        """時間のかかるジョブの実行中も別のジョブが実行されるかのテスト"""
+        slow = BlockingJob()
+        scheduler.add_job("update:wikipedia", slow)
+        scheduler.add_job("update:news", lambda: {"source": "news"})
+
+        pending = scheduler.run_now("update:wikipedia", wait=False)
+        assert slow.started.wait(5)
+        assert scheduler.run_now("update:news") == {"source": "news"}
+
+        slow.finished.set()
+        pending.result(timeout=5)
+
+    def test_lock_file_blocks_other_process(self, scheduler, tmp_path):
+        """別プロセスがロックを持っている間はジョブを実行しないかのテスト"""
+        other = JobLock(tmp_path / "update.lock")
+        assert other.acquire()
+        try:
+            result = scheduler.run_now()
+        finally:
+            other.release()
+
+        assert result == {"job": "update", "skipped": True, "reason": "locked"}
+        assert scheduler.updater.calls == 0
+        assert scheduler.run_now() == {"added": 0}
+
+    def test_next_run(self, scheduler):
+        """スケジュールした時刻が次回の実行時刻になるかのテスト"""
+        assert scheduler.get_next_run() is None
+
+        scheduler.schedule_daily(hour=3, minute=30)
+        scheduler.schedule_custom(interval_minutes=1)
+        next_run = scheduler.get_next_run()
+        assert 0 < (next_run - datetime.now()).total_seconds() <= 60
+
+        with pytest.raises(ValueError):
+            scheduler.add_job("update", lambda: {})
+
+    def test_event_driven_loop(self, scheduler):
+        """1秒未満の間隔で実行され、stop() ですぐに止まるかのテスト"""
+        runs = []
+        done = threading.Event()
+
+        def tick():
+            runs.append(time.perf_counter())
+            if len(runs) >= 3:
+                done.set()
+            return {}
+
+        scheduler.add_job("tick", tick, IntervalTrigger(0.05))
+        scheduler.start()
+        assert done.wait(2)
+
+        start = time.perf_counter()
+        scheduler.stop()
+        assert time.perf_counter() - start < 0.5
+        assert not scheduler.thread.is_alive()
+
+    def test_next_run_after_remove(self, scheduler):
+        """ジョブの削除・時刻の変更が次回の実行時刻に反映されるかのテスト"""
+        scheduler.add_job("soon", lambda: {}, IntervalTrigger(10))
+        scheduler.add_job("later", lambda: {}, IntervalTrigger(100))
+        soon = scheduler.jobs["soon"].next_run
+
+        assert scheduler.get_next_run() == soon
+        scheduler.remove_job("soon")
+        assert scheduler.get_next_run() == scheduler.jobs["later"].next_run
+
+        scheduler.schedule_custom(interval_minutes=1)
+        assert scheduler.get_next_run() == scheduler.jobs["update"].next_run
+
+    def test_triggers(self):
+        """時刻の規則から次回の実行時刻を求めるテスト"""
+        now = datetime(2026, 1, 7, 12, 0)  # 水曜日
+        assert DailyTrigger(3, 0).next_run(now) == datetime(2026, 1, 8, 3, 0)
+        assert DailyTrigger(13, 15).next_run(now) == datetime(2026, 1, 7, 13, 15)
+        assert WeeklyTrigger("monday", 3, 0).next_run(now) == datetime(2026, 1, 12, 3, 0)
+        assert WeeklyTrigger("wednesday", 12, 0).next_run(now) == datetime(2026, 1, 14, 12, 0)
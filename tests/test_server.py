@@ -0,0 +1,119 @@
+"""
+辞書検索HTTPサーバーのテスト
+"""
+
+import asyncio
+import http.client
+import json
+import pytest
+import sys
+import threading
+from pathlib import Path
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import NeoDict
+from server import LookupServer
+
+
+class TestLookupServer:
+    """LookupServerクラスのテスト"""
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        """別スレッドのイベントループでサーバーを起動"""
+        db_path = str(tmp_path / "dict.db")
+        writer = NeoDict(db_path=db_path)
+        for surface, frequency in [("生成AI", 5), ("生成モデル", 3), ("推し活", 1)]:
+            writer.add_word(surface=surface, source="news", frequency=frequency)
+
+        server = LookupServer(NeoDict(db_path=db_path, read_only=True), port=0, workers=2)
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(server.start())
+            started.set()
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        started.wait(5)
+        yield server
+
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+
+    def request(self, conn, method, path, body=None):
+        conn.request(method, path, body=json.dumps(body) if body is not None else None)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read().decode("utf-8"))
+
+    def test_endpoints_over_keep_alive(self, server):
+        """1本の接続で各エンドポイントを続けて呼べるかのテスト"""
+        conn = http.client.HTTPConnection(server.host, server.port, timeout=5)
+
+        status, word = self.request(conn, "GET", "/word?surface=%E7%94%9F%E6%88%90AI")
+        assert status == 200 and word["frequency"] == 5
+
+        status, body = self.request(conn, "GET", "/prefix?q=%E7%94%9F%E6%88%90")
+        assert [item["surface"] for item in body["results"]] == ["生成AI", "生成モデル"]
+
+        status, body = self.request(conn, "GET", "/search?q=%E6%8E%A8%E3%81%97&fuzzy=1")
+        assert [item["surface"] for item in body["results"]] == ["推し活"]
+
+        status, body = self.request(conn, "POST", "/lookup", {"surfaces": ["推し活", "未登録"]})
+        assert list(body["words"]) == ["推し活"]
+
+        assert self.request(conn, "GET", "/word?surface=x")[0] == 404
+        assert self.request(conn, "GET", "/word")[0] == 400
+        assert self.request(conn, "GET", "/lookup")[0] == 405
+        assert self.request(conn, "GET", "/unknown")[0] == 404
+        conn.close()
+
+    def test_concurrent_word_requests_are_batched(self, server):
+        """同時に届いた /word 要求がまとめて引かれるかのテスト"""
+        calls = []
+        get_words = server.dict.get_words
+
+        def counting_get_words(surfaces):
+            calls.append(list(surfaces))
+            return get_words(surfaces)
+
+        server.dict.get_words = counting_get_words
+
+        async def fetch_all():
+            async def fetch(surface):
+                reader, writer = await asyncio.open_connection(server.host, server.port)
+                writer.write(
+                    f"GET /word?surface={surface} HTTP/1.1\r\nConnection: close\r\n\r\n".encode()
+                )
+                response = await reader.read()
+                writer.close()
+                return response.split(b" ", 2)[1]
+
+            return await asyncio.gather(*(fetch(s) for s in ["a", "b", "c", "d"] * 5))
+
+        statuses = asyncio.run(fetch_all())
+        assert statuses == [b"404"] * 20
+        assert sum(len(batch) for batch in calls) == 20 and len(calls) < 20
+
+    @pytest.mark.parametrize("length", ["abc", "-5", "1e3"])
+    def test_invalid_content_length(self, server, length):
+        """不正な Content-Length に 400 を返すかのテスト"""
+        async def send():
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(f"POST /lookup HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            return response.split(b" ", 2)[1]
+
+        assert asyncio.run(send()) == b"400"
+
+    def test_read_only_connections(self, server):
+        """サーバーの接続では書き込めないかのテスト"""
+        with pytest.raises(Exception):
+            server.dict.add_word(surface="書き込み不可", source="manual")
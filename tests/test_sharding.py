@@ -0,0 +1,147 @@
+"""
+シャード分割ストレージのテスト
+"""
+
+import pytest
+import sys
+import threading
+from pathlib import Path
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import NeoDict, ShardedDictStorage
+from core import storage as storage_module
+from core.cost import assign_costs
+from updater import DictUpdater
+
+
+SURFACES = [f"分割語{i}" for i in range(40)]
+
+
+class TestShardedDictStorage:
+    """ShardedDictStorageクラスのテスト"""
+
+    @pytest.fixture
+    def sharded_dict(self, tmp_path):
+        """4分割の辞書を作成"""
+        neodict = NeoDict(db_path=str(tmp_path / "dict.db"), shards=4)
+        for i, surface in enumerate(SURFACES):
+            neodict.add_word(surface=surface, source="news", frequency=i)
+        return neodict
+
+    def test_words_are_routed_by_surface(self, sharded_dict, tmp_path):
+        """表層形ごとに1つのシャードにだけ書き込まれるかのテスト"""
+        storage = sharded_dict.storage
+        assert len(list(tmp_path.glob("dict.shard*of04.db"))) == 4
+
+        counts = [shard.get_stats()["total_words"] for shard in storage.shards]
+        assert sum(counts) == len(SURFACES)
+        assert all(count > 0 for count in counts)
+
+        for surface in SURFACES:
+            assert storage.shards[storage.shard_index(surface)].get_word(surface) is not None
+        assert sharded_dict.get_word("分割語7")["frequency"] == 7
+
+        assert sharded_dict.remove_word("分割語7") == 1
+        assert sharded_dict.get_word("分割語7") is None
+
+    def test_scatter_gather_reads(self, sharded_dict, tmp_path):
+        """全シャードの結果が頻度順にマージされるかのテスト"""
+        storage = sharded_dict.storage
+
+        frequencies = [record.frequency for record in storage.iter_records(batch_size=3)]
+        assert frequencies == sorted(range(len(SURFACES)), reverse=True)
+
+        assert [entry.frequency for entry in storage.get_all_words(limit=5)] == [39, 38, 37, 36, 35]
+        results = sharded_dict.search("分割語", fuzzy=True)
+        assert [item["frequency"] for item in results] == sorted(range(len(SURFACES)), reverse=True)
+        assert len(sharded_dict.search("分割語", fuzzy=True, limit=3)) == 3
+        assert sharded_dict.get_stats()["total_words"] == len(SURFACES)
+
+        sharded_dict.export_mecab(str(tmp_path / "export"))
+        lines = (tmp_path / "export" / "neodict.csv").read_text(encoding="utf-8").splitlines()
+        assert [line.split(",")[0] for line in lines] == [f"分割語{i}" for i in reversed(range(40))]
+
+    def test_costs_per_shard(self, sharded_dict):
+        """コスト計算がシャードごとの単語IDで行われるかのテスト"""
+        assert assign_costs(sharded_dict.storage) == len(SURFACES)
+        storage = sharded_dict.storage
+        assert storage.get_word("分割語39").cost < storage.get_word("分割語1").cost
+
+    def test_transaction_locks_only_touched_shards(self, sharded_dict, monkeypatch):
+        """トランザクションが書き込んだシャードだけをロックするかのテスト"""
+        monkeypatch.setattr(storage_module, "BUSY_TIMEOUT_SECONDS", 0.1)
+        storage = sharded_dict.storage
+        other = ShardedDictStorage(storage.db_path, num_shards=4)
+
+        first = SURFACES[0]
+        second = next(s for s in SURFACES if storage.shard_index(s) != storage.shard_index(first))
+        errors = []
+
+        def write_other_shard():
+            try:
+                other.record_frequency({second: 1})
+            except Exception as e:
+                errors.append(e)
+
+        with storage.transaction():
+            storage.record_frequency({first: 1})
+            thread = threading.Thread(target=write_other_shard)
+            thread.start()
+            thread.join()
+
+        assert errors == []
+        assert sharded_dict.get_word(second)["frequency"] == SURFACES.index(second) + 1
+
+    def test_promotion_locks_only_shards_with_candidates(self, sharded_dict, monkeypatch):
+        """候補の取り出しとウォーターマークの保存が、候補のないシャードをロックしないかのテスト"""
+        monkeypatch.setattr(storage_module, "BUSY_TIMEOUT_SECONDS", 0.1)
+        storage = sharded_dict.storage
+        other = ShardedDictStorage(storage.db_path, num_shards=4)
+
+        candidate = "昇格候補"
+        index = storage.shard_index(candidate)
+        others = [surface for surface in SURFACES if storage.shard_index(surface) != index]
+        storage.upsert_candidates({candidate: {"count": 5, "sources": ["news_nhk"], "source": "news"}})
+        errors = []
+
+        def write_other_shards():
+            try:
+                other.record_frequency({surface: 1 for surface in others})
+            except Exception as e:
+                errors.append(e)
+
+        with storage.transaction():
+            assert list(storage.promote_candidates(min_count=3)) == [candidate]
+            storage.set_watermarks({"news:nhk": "https://example.com/2"})
+            thread = threading.Thread(target=write_other_shards)
+            thread.start()
+            thread.join()
+            assert storage.get_watermarks() == {}
+
+        assert errors == []
+        assert storage.get_watermarks() == {"news:nhk": "https://example.com/2"}
+        assert storage.shards[0].get_watermarks() == {}
+        other.close()
+
+    def test_updater_with_shards(self, tmp_path):
+        """シャード分割した辞書を更新できるかのテスト"""
+        neodict = NeoDict(db_path=str(tmp_path / "dict.db"), shards=3)
+        updater = DictUpdater(dict_instance=neodict, sources=[], min_frequency=1)
+
+        class Crawler:
+            watermarks = {"nhk": "https://example.com/1"}
+
+            def crawl(self, **kwargs):
+                return [{"surface": surface, "source": "news_nhk"} for surface in SURFACES[:6]]
+
+        updater.sources = ["news"]
+        updater.news_crawler = Crawler()
+        stats = updater.update()
+
+        assert stats["added"] == 6
+        assert stats["changes"]["add"] == 6
+        assert neodict.get_stats()["total_words"] == 6
+        assert neodict.storage.get_watermarks() == {"news:nhk": "https://example.com/1"}
+        assert neodict.generation > 0
@@ -0,0 +1,91 @@
+"""
+起動時間のテスト
+"""
+
+import pytest
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+# import時に読み込まれてはならない重いモジュール
+# (所要時間は benchmarks/suite.py --only startup で計測する)
+HEAVY_MODULES = {"numpy", "fugashi", "requests", "bs4", "lxml", "concurrent.futures.process"}
+
+# CLIの search/stats で読み込まれてはならないモジュール
+CLI_EXCLUDED_MODULES = HEAVY_MODULES | {"crawler", "updater", "schedule"}
+
+
+def loaded_modules(statement: str, env: dict = None) -> set:
+    """
+    新しいインタプリタで statement を実行し、読み込まれたモジュール名(sys.modules)を返す
+
+    Args:
+        statement: 実行するPython文
+        env: 環境変数
+
+    Returns:
+        モジュール名の集合
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env
+    )
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+@pytest.mark.parametrize("package", ["core", "crawler", "updater"])
+def test_package_import_is_light(package):
+    """パッケージのimportで重い依存が読み込まれないかのテスト"""
+    modules = loaded_modules(f"import {package}")
+
+    assert package in modules
+    assert not HEAVY_MODULES & modules
+
+
+def test_neodict_construction_is_lazy(tmp_path):
+    """NeoDictの生成でタガーを読み込まず、スキーマ作成も繰り返さないかのテスト"""
+    sys.path.insert(0, str(SRC_DIR))
+    from core import NeoDict
+    from core.dictionary import _UNLOADED
+
+    db_path = tmp_path / "dict.db"
+    neodict = NeoDict(db_path=str(db_path))
+    assert neodict._tagger is _UNLOADED
+
+    # スキーマバージョンが一致していればDDLを実行しない
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX idx_source")
+    conn.commit()
+    conn.close()
+
+    NeoDict(db_path=str(db_path))
+
+    conn = sqlite3.connect(db_path)
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert "idx_source" not in indexes
+
+
+@pytest.mark.parametrize("args", [["stats"], ["search", "生成AI"]])
+def test_cli_loads_only_dictionary(tmp_path, args):
+    """CLIの search/stats が辞書以外の依存を読み込まないかのテスト"""
+    env = {**os.environ, "HOME": str(tmp_path)}
+    statement = f"from cli.commands import main; main({args!r}, standalone_mode=False)"
+
+    modules = loaded_modules(statement, env=env)
+
+    assert "cli.commands" in modules
+    assert not CLI_EXCLUDED_MODULES & modules
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,296 @@
+"""
+辞書更新システムのテスト
+"""
+
+import pytest
+import sys
+from pathlib import Path
+import tempfile
+
+# パスを追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core import NeoDict
+from crawler import NgramDiscovery, WordExtractor
+from updater import DictUpdater
+from updater.locks import JobLock
+
+
+class FakeCrawler:
+    """ネットワークにアクセスしないクローラーのスタブ"""
+
+    def __init__(self, words, watermarks):
+        self.words = words
+        self.next_watermarks = watermarks
+        self.watermarks = {}
+        self.calls = []
+        self.extractor = WordExtractor()
+
+    def crawl(self, **kwargs):
+        self.calls.append(kwargs)
+        self.watermarks = dict(self.next_watermarks)
+        return list(self.words)
+
+
+class TestDictUpdater:
+    """DictUpdaterクラスのテスト"""
+
+    @pytest.fixture
+    def temp_dict(self):
+        """一時的な辞書を作成"""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            db_path = f.name
+
+        neodict = NeoDict(db_path=db_path)
+        yield neodict
+
+        # クリーンアップ(ソースごとのロックファイルも削除)
+        Path(db_path).unlink(missing_ok=True)
+        for lock_path in Path(db_path).parent.glob(f"{Path(db_path).name}.update-*.lock"):
+            lock_path.unlink()
+
+    @pytest.fixture
+    def updater(self, temp_dict):
+        """スタブのクローラーを持つアップデーターを作成"""
+        updater = DictUpdater(dict_instance=temp_dict, min_frequency=1)
+        updater.wikipedia_crawler = FakeCrawler(
+            [{"surface": "生成AI", "source": "wikipedia", "frequency": 1}],
+            {"recentchanges": "2026-01-01T00:00:00Z|100"}
+        )
+        updater.news_crawler = FakeCrawler(
+            [{"surface": "推し活", "source": "news_nhk", "frequency": 2}],
+            {"nhk": "https://www3.nhk.or.jp/news/html/1.html"}
+        )
+        return updater
+
+    def test_incremental_update_persists_watermarks(self, updater, temp_dict):
+        """差分更新でウォーターマークが保存・利用されるかのテスト"""
+        stats = updater.update()
+        assert stats["mode"] == "incremental"
+        assert stats["added"] == 2
+        assert updater.wikipedia_crawler.calls[0]["since"] is None
+
+        watermarks = temp_dict.storage.get_watermarks()
+        assert watermarks["wikipedia:recentchanges"] == "2026-01-01T00:00:00Z|100"
+        assert watermarks["news:nhk"] == "https://www3.nhk.or.jp/news/html/1.html"
+
+        updater.update()
+        assert updater.wikipedia_crawler.calls[1]["since"] == "2026-01-01T00:00:00Z|100"
+        assert updater.news_crawler.calls[1]["since"] == {
+            "nhk": "https://www3.nhk.or.jp/news/html/1.html"
+        }
+
+    def test_update_profile_stats(self, updater):
+        """計測が有効なときに更新の段階ごとの時間が統計に含まれるかのテスト"""
+        from metrics import profiling
+
+        assert "profile" not in updater.update()
+
+        profiling.enable()
+        try:
+            stats = updater.update()
+        finally:
+            profiling.disable(flush=False)
+
+        timers = stats["profile"]["timers"]
+        for stage in ["update.total", "update.crawl.wikipedia", "update.crawl.news",
+                      "update.aggregate", "update.readings", "update.write", "update.costs"]:
+            assert timers[stage]["count"] == 1
+        assert "storage.record_frequency" in timers
+        assert stats["profile"]["counters"]["update.collected_words"] == 2
+
+    def test_update_records_metrics(self, updater):
+        """更新の結果が Prometheus の指標に記録されるかのテスト"""
+        from metrics import prometheus
+
+        runs = prometheus.UPDATES.get(result="success")
+        inserts = prometheus.DB_UPSERTS.get(op="insert")
+
+        updater.update()
+
+        assert prometheus.UPDATES.get(result="success") == runs + 1
+        assert prometheus.DB_UPSERTS.get(op="insert") == inserts + 2
+        assert prometheus.DICTIONARY_WORDS.get() == 2
+
+    def test_for_sources(self, updater, temp_dict):
+        """ソースを絞ったアップデーターが同じ辞書ファイルを別の接続で開くかのテスト"""
+        news_updater = updater.for_sources(["news"])
+        assert news_updater.sources == ["news"]
+        assert news_updater.dict is not temp_dict
+        assert news_updater.dict.storage.db_path == temp_dict.storage.db_path
+
+        news_updater.news_crawler = updater.news_crawler
+        news_updater.update()
+        assert temp_dict.get_word("推し活") is not None
+        assert temp_dict.get_word("生成AI") is None
+        news_updater.dict.close()
+
+    def test_update_with_discovery(self, updater, tmp_path):
+        """n-gram統計を読み込んでクローラーに渡し、更新後に保存するかのテスト"""
+        path = tmp_path / "dict.ngram"
+        seeded = NgramDiscovery(width=1 << 14)
+        seeded.feed_many(
+            f"{chr(0x4E00 + i % 500)}{chr(0x30A2 + i % 40)}{'はがもと'[i % 3]}推し活{'のにでを'[i % 4]}{chr(0x4F00 + i % 300)}"
+            for i in range(300)
+        )
+        seeded.save(str(path))
+
+        updater.discovery_path = str(path)
+        stats = updater.update()
+
+        assert updater.news_crawler.extractor.discovery is updater.discovery
+        assert "推し活" in updater.discovery.find("推し活")
+        assert stats["discovery_candidates"] >= 1
+        assert NgramDiscovery.load(str(path)).total == seeded.total
+        assert updater.for_sources(["news"]).discovery is updater.discovery
+
+    def test_candidates_accumulate_across_updates(self, updater, temp_dict):
+        """1回の更新ではしきい値に届かない語も、積み上げて辞書に追加されるかのテスト"""
+        updater.min_frequency = 3
+
+        first = updater.update()
+        assert first["added"] == 0
+        assert first["staged"] == 2
+        assert temp_dict.get_word("推し活") is None
+
+        second = updater.update()
+        assert second["added"] == 1
+        assert temp_dict.get_word("推し活")["frequency"] == 4
+        assert temp_dict.get_word("推し活")["reading"]
+        assert temp_dict.storage.get_candidates(["生成AI"])["生成AI"]["count"] == 2
+
+        updater.update()
+        assert temp_dict.get_word("生成AI")["frequency"] == 3
+        assert temp_dict.storage.get_candidates(["推し活", "生成AI"]) == {}
+
+    def test_promotion_bypasses_write_buffer(self, updater, temp_dict):
+        """辞書の書き込みバッファが有効でも昇格した語が同じ更新で書き込まれるかのテスト"""
+        temp_dict.enable_write_buffer()
+        try:
+            stats = updater.update()
+            assert stats["added"] == 2
+            assert temp_dict.get_word("推し活")["frequency"] == 2
+            assert temp_dict.storage.get_candidates(["推し活"]) == {}
+        finally:
+            temp_dict.disable_write_buffer()
+
+    def test_candidates_require_source_diversity(self, updater, temp_dict):
+        """出現元の数がしきい値に届かない候補は追加されないかのテスト"""
+        updater.min_sources = 2
+        updater.news_crawler.words.append({"surface": "生成AI", "source": "news_nhk", "frequency": 1})
+
+        stats = updater.update()
+
+        assert stats["added"] == 1
+        assert temp_dict.get_word("生成AI") is not None
+        assert temp_dict.get_word("推し活") is None
+
+    def test_update_skips_locked_source(self, updater, temp_dict):
+        """同じソースを別の更新が実行中ならスキップし、別のソースは更新できるかのテスト"""
+        db_path = Path(temp_dict.storage.db_path)
+        other = JobLock(db_path.parent / f"{db_path.name}.update-news.lock")
+        assert other.acquire()
+        try:
+            stats = updater.update()
+            assert stats["skipped"] is True and stats["reason"] == "locked"
+            assert updater.news_crawler.calls == [] and updater.wikipedia_crawler.calls == []
+
+            wiki_updater = updater.for_sources(["wikipedia"])
+            wiki_updater.wikipedia_crawler = updater.wikipedia_crawler
+            assert wiki_updater.update()["added"] == 1
+            wiki_updater.dict.close()
+        finally:
+            other.release()
+
+        assert updater.update().get("skipped") is None
+
+    def test_update_history(self, updater, temp_dict):
+        """更新ごとに版が記録されるかのテスト"""
+        first = updater.update()
+        second = updater.update()
+        assert first["changes"] == {"add": 2, "remove": 0, "change": 0}
+        assert second["changes"] == {"add": 0, "remove": 0, "change": 2}
+
+        history = updater.get_update_history()
+        assert [item["version"] for item in history] == [second["version"], first["version"]]
+        assert history[0]["word_count"] == 2
+        assert history[0]["description"] == "incremental update"
+
+    def test_update_is_published_atomically(self, updater, temp_dict):
+        """更新中の読み込みが途中の状態を見ず、ロック待ちにもならないかのテスト"""
+        reader = NeoDict(db_path=str(temp_dict.storage.db_path))
+        generation = reader.generation
+        seen = []
+
+        record_frequency = temp_dict.storage.record_frequency
+
+        def record_and_read(*args, **kwargs):
+            result = record_frequency(*args, **kwargs)
+            # 書き込みトランザクションの途中で別の接続から読む
+            seen.append(reader.get_word("生成AI"))
+            seen.append(reader.generation)
+            return result
+
+        temp_dict.storage.record_frequency = record_and_read
+        updater.update()
+
+        assert seen == [None, generation]
+        assert reader.get_word("生成AI")["frequency"] == 1
+        assert reader.generation > generation
+
+    def test_update_accumulates_frequency(self, updater, temp_dict):
+        """既存語の頻度が更新ごとに加算されるかのテスト"""
+        updater.update()
+        stats = updater.update()
+
+        assert stats["updated"] == 2
+        word = temp_dict.get_word("推し活")
+        assert word["source"] == "news"
+        assert word["frequency"] == 4
+        assert word["score"] == 4
+
+    def test_update_fills_readings(self, updater, temp_dict):
+        """新規語の読みが推定されるかのテスト"""
+        stats = updater.update()
+
+        assert stats["readings_filled"] == 2
+        assert temp_dict.get_word("推し活")["reading"] == temp_dict.suggest_reading("推し活")
+        assert temp_dict.get_word("生成AI")["reading"]
+
+    def test_full_update_resets_watermarks(self, updater):
+        """全更新でウォーターマークがリセットされるかのテスト"""
+        updater.update()
+        stats = updater.update(full_update=True)
+
+        assert stats["mode"] == "full"
+        assert updater.wikipedia_crawler.calls[1]["since"] is None
+        assert updater.news_crawler.calls[1]["since"] == {}
+
+    def test_cleanup(self, updater, temp_dict):
+        """低頻度語の削除とアーカイブのテスト"""
+        for i in range(5):
+            temp_dict.add_word(surface=f"低頻度{i}", source="news", frequency=1)
+        temp_dict.add_word(surface="高頻度", source="news", frequency=10)
+        temp_dict.add_word(surface="手動語", source="manual", frequency=0)
+        temp_dict.add_word(surface="出典なし", source="news", frequency=0)
+        with temp_dict.storage._connect() as conn:
+            conn.execute("UPDATE words SET source = NULL WHERE surface = '出典なし'")
+
+        stats = updater.cleanup(min_frequency=2, archive=True, batch_size=2)
+
+        assert stats["deleted"] == 6
+        assert stats["archived"] == 6
+        assert temp_dict.get_word("出典なし") is None
+        assert stats["bytes_reclaimed"] >= 0
+        assert temp_dict.get_word("高頻度") is not None
+        assert temp_dict.get_word("手動語") is not None
+        assert temp_dict.get_word("低頻度0") is None
+
+        # バッチごとに1つの版として記録される
+        cleanups = [item for item in temp_dict.get_versions(20) if item["description"] == "cleanup"]
+        assert len(cleanups) == 3
+        assert sum(item["changes"]["remove"] for item in cleanups) == 6
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])